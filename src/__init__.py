@@ -44,14 +44,45 @@ def create_app():
     def after_request(response):
         # Don't log static file requests
         if not request.path.startswith("/static"):
-            logger.info(
-                "Request completed",
-                extra={
-                    "request_id": getattr(g, "request_id", "unknown"),
-                    "status_code": response.status_code,
-                    "content_length": response.content_length,
-                },
-            )
+            extra = {
+                "request_id": getattr(g, "request_id", "unknown"),
+                "status_code": response.status_code,
+                "content_length": response.content_length,
+            }
+
+            # Attach per-request database statistics collected by the instrumented cursors.
+            # They also go into the message, since the text formatters drop extras.
+            message = "Request completed"
+            query_stats = g.get("query_stats")
+            if query_stats is not None:
+                summary = query_stats.summary()
+                extra.update(summary)
+                message = (
+                    f"Request completed {request.method} {request.path} {response.status_code}: "
+                    f"{summary['db_query_count']} queries, {summary['db_time_ms']}ms in db, "
+                    f"slowest {summary['db_slowest_ms']}ms"
+                )
+                if summary["db_slowest_statement"]:
+                    message += f" ({summary['db_slowest_statement']})"
+
+                threshold = app.config.get("QUERY_REPEAT_THRESHOLD", 5)
+                suspects = query_stats.repeated(min_count=threshold + 1)
+                if suspects:
+                    repeated = "; ".join(
+                        f"{item['count']}x {item['statement']}" for item in suspects
+                    )
+                    logger.warning(
+                        f"Possible N+1 query pattern detected on {request.path} "
+                        f"(more than {threshold} runs): {repeated}",
+                        extra={
+                            "request_id": extra["request_id"],
+                            "path": request.path,
+                            "threshold": threshold,
+                            "repeated_statements": suspects,
+                        },
+                    )
+
+            logger.info(message, extra=extra)
         return response
 
     # Register blueprints for different parts of the app
@@ -79,6 +110,36 @@ def create_app():
     
     logger.info("Blueprints registered successfully")
 
+    # Configure shared caches used by the services
+    from .background_flush import background_flusher
+
+    background_flusher.init_app(app)
+
+    from .services.similarity_cache import similarity_cache
+
+    similarity_cache.configure(app.config)
+
+    from .services.meal_plan_jobs import meal_plan_job_runner
+
+    meal_plan_job_runner.init_app(app)
+
+    from .services.meal_plan_cache import meal_plan_cache
+
+    meal_plan_cache.init_app(app)
+
+    from .services.expiry_cache import expiry_prediction_cache
+
+    expiry_prediction_cache.init_app(app)
+
+    from .services.subscription_maintenance import subscription_maintenance
+
+    subscription_maintenance.init_app(app)
+
+    # Register maintenance CLI commands
+    from . import commands
+
+    commands.init_app(app)
+
     # Add template global functions
     @app.template_global()
     def get_user_limits_status(user_id):
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, session, current_app
 from src.database import get_db
+from src.services.spend_rollup import get_daily_spend, get_spend_totals, week_start
 
 budget_bp = Blueprint("budget", __name__, url_prefix="/api")
 
@@ -66,30 +67,20 @@ def get_budget_overview():
             db.commit()
 
             allocated_amount = monthly_budget
-            total_spent = 0
-            remaining = monthly_budget
         else:
             allocated_amount = float(current_budget["allocated_amount"])
-            total_spent = float(current_budget["total_spent"] or 0)
-            remaining = float(current_budget["remaining_amount"] or 0)
 
-        # Get total trips this month
-        trips_query = """
-            SELECT COUNT(DISTINCT c.cart_ID) as total_trips
-            FROM shopping_cart c
-            WHERE c.user_ID = %s 
-              AND c.status = 'purchased'
-              AND MONTH(c.created_at) = MONTH(CURRENT_DATE())
-              AND YEAR(c.created_at) = YEAR(CURRENT_DATE())
-        """
-        cursor.execute(trips_query, (user_ID,))
-        trips_result = cursor.fetchone()
-        total_trips = trips_result["total_trips"] or 0
-
-        # Calculate daily average (based on current day of month)
+        # Spending and trips this month from the daily spend rollup
         from datetime import datetime
 
-        current_day = datetime.now().day
+        today = datetime.now().date()
+        month_totals = get_spend_totals(cursor, user_ID, today.replace(day=1), today)
+        total_spent = month_totals["total_spent"]
+        remaining = allocated_amount - total_spent
+        total_trips = month_totals["trip_count"]
+
+        # Calculate daily average (based on current day of month)
+        current_day = today.day
         daily_avg = total_spent / current_day if current_day > 0 else 0
 
         cursor.close()
@@ -126,91 +117,45 @@ def get_spending_trends():
     cursor = db.cursor()
 
     try:
+        from datetime import datetime, timedelta
+
+        # Aggregate the daily spend rollup into the period's buckets
+        today = datetime.now().date()
         if period == "7d":
             # Last 7 days - daily buckets
-            query = """
-                SELECT DATE(c.created_at) as date, 
-                       COALESCE(SUM(i.price * i.quantity), 0) as amount
-                FROM shopping_cart c
-                LEFT JOIN cart_item i ON c.cart_ID = i.cart_ID
-                WHERE c.user_ID = %s 
-                  AND c.status = 'purchased'
-                  AND c.created_at >= DATE_SUB(CURRENT_DATE(), INTERVAL 7 DAY)
-                GROUP BY DATE(c.created_at)
-                ORDER BY date
-            """
+            start_date = today - timedelta(days=7)
         elif period == "1m":
             # Last 30-31 days - weekly buckets (4-5 bars)
-            query = """
-                SELECT 
-                    DATE(DATE_SUB(c.created_at, INTERVAL WEEKDAY(c.created_at) DAY)) AS date,
-                    COALESCE(SUM(i.price * i.quantity), 0) AS amount
-                FROM shopping_cart c
-                LEFT JOIN cart_item i ON c.cart_ID = i.cart_ID
-                WHERE c.user_ID = %s
-                    AND c.status = 'purchased'
-                    AND c.created_at >= DATE_SUB(CURRENT_DATE(), INTERVAL 30 DAY)
-                GROUP BY date
-                ORDER BY date;
-            """
+            start_date = today - timedelta(days=30)
         elif period == "3m":
             # Last 90 days - weekly buckets (6-12 bars)
-            query = """
-                SELECT 
-                    DATE(DATE_SUB(c.created_at, INTERVAL WEEKDAY(c.created_at) DAY)) AS date,
-                    COALESCE(SUM(i.price * i.quantity), 0) AS amount
-                FROM shopping_cart c
-                LEFT JOIN cart_item i ON c.cart_ID = i.cart_ID
-                WHERE c.user_ID = %s
-                    AND c.status = 'purchased'
-                    AND c.created_at >= DATE_SUB(CURRENT_DATE(), INTERVAL 90 DAY)
-                GROUP BY date
-                ORDER BY date;
-            """
+            start_date = today - timedelta(days=90)
         else:  # 1y - Last 12 months - monthly buckets
-            query = '''
-                SELECT 
-                  months.month_start AS date,
-                  COALESCE(SUM(i.price * i.quantity), 0) AS amount
-                FROM (
-                  SELECT DATE_FORMAT(DATE_SUB(CURDATE(), INTERVAL seq MONTH), '%%Y-%%m-01') AS month_start
-                  FROM (
-                    SELECT 0 AS seq UNION SELECT 1 UNION SELECT 2 UNION SELECT 3 UNION SELECT 4 UNION
-                    SELECT 5 UNION SELECT 6 UNION SELECT 7 UNION SELECT 8 UNION SELECT 9 UNION
-                    SELECT 10 UNION SELECT 11
-                  ) AS seqs
-                ) AS months
-                LEFT JOIN shopping_cart c
-                  ON DATE_FORMAT(c.created_at, '%%Y-%%m-01') = months.month_start
-                  AND c.user_ID = %s
-                  AND c.status = 'purchased'
-                LEFT JOIN cart_item i
-                  ON c.cart_ID = i.cart_ID
-                GROUP BY months.month_start
-                ORDER BY months.month_start;
-            '''
-            
-        cursor.execute(query, (user_ID,))  
-        trends = cursor.fetchall()
-              
-        # Create a complete date range for the period
-        from datetime import datetime, timedelta
+            month = today.replace(day=1)
+            for _ in range(11):
+                month = (month - timedelta(days=1)).replace(day=1)
+            start_date = month
 
-        # Debug: print raw data
-        print(f"DEBUG: Period={period}, Raw trends count: {len(trends)}")
-        for trend in trends:
-            print(f"DEBUG: Raw trend: {trend}")
+        rows = get_daily_spend(cursor, user_ID, start_date, today)
 
-        # Convert existing data to dictionary for easy lookup
+        # Convert rollup rows to bucket -> amount
         trend_data = {}
-        for trend in trends:
-            date_key = trend["date"]
-            if period != "1y": # 1y is already in str format
-              date_key = trend["date"].strftime("%Y-%m-%d")
-            
-            trend_data[date_key] = float(trend["amount"])
-            print(f"DEBUG: Added to trend_data: {date_key} = {trend_data[date_key]}")
-        
+        if period == "1y":
+            # Every month is shown, including months without purchases
+            month = start_date
+            while month <= today:
+                trend_data[month.strftime("%Y-%m-%d")] = 0.0
+                month = (month + timedelta(days=32)).replace(day=1)
+        for row in rows:
+            if period == "7d":
+                bucket = row["spend_date"]
+            elif period == "1y":
+                bucket = row["spend_date"].replace(day=1)
+            else:
+                bucket = week_start(row["spend_date"])
+            date_key = bucket.strftime("%Y-%m-%d")
+            trend_data[date_key] = trend_data.get(date_key, 0.0) + float(row["total_spent"])
+
         # Generate complete date range and labels based on period
         formatted_trends = []
         if period == "7d":
@@ -278,71 +223,52 @@ def get_spending_details():
         except ValueError:
             return jsonify({"error": "Invalid date format"}), 400
 
-        # Build query based on period type to get items for the specific time range
+        # Resolve the date range of the clicked bar
         if period == "7d":
             # Single day
-            query = """
-                SELECT c.cart_ID, c.store_name, c.created_at,
-                       i.item_name, i.quantity, i.price, i.image_url,
-                       (i.quantity * i.price) as item_total
-                FROM shopping_cart c
-                JOIN cart_item i ON c.cart_ID = i.cart_ID
-                WHERE c.user_ID = %s 
-                  AND c.status = 'purchased'
-                  AND DATE(c.created_at) = %s
-                ORDER BY c.created_at DESC, i.item_name ASC
-            """
-            cursor.execute(query, (user_ID, target_date))
+            range_start = range_end = target_date
         elif period == "1m" or period == "3m":
             # Week range (Monday to Sunday)
-            week_start = target_date
-            week_end = target_date + timedelta(days=6)
-            query = """
-                SELECT c.cart_ID, c.store_name, c.created_at,
-                       i.item_name, i.quantity, i.price, i.image_url,
-                       (i.quantity * i.price) as item_total
-                FROM shopping_cart c
-                JOIN cart_item i ON c.cart_ID = i.cart_ID
-                WHERE c.user_ID = %s 
-                  AND c.status = 'purchased'
-                  AND DATE(c.created_at) BETWEEN %s AND %s
-                ORDER BY c.created_at DESC, i.item_name ASC
-            """
-            cursor.execute(query, (user_ID, week_start, week_end))
+            range_start = target_date
+            range_end = target_date + timedelta(days=6)
         else:  # 1y - Monthly range
             # Entire month
+            range_start = target_date
             if target_date.month == 12:
-                month_end = target_date.replace(
+                range_end = target_date.replace(
                     year=target_date.year + 1, month=1, day=1
                 ) - timedelta(days=1)
             else:
-                month_end = target_date.replace(
+                range_end = target_date.replace(
                     month=target_date.month + 1, day=1
                 ) - timedelta(days=1)
 
-            query = """
-                SELECT c.cart_ID, c.store_name, c.created_at,
-                       i.item_name, i.quantity, i.price, i.image_url,
-                       (i.quantity * i.price) as item_total
-                FROM shopping_cart c
-                JOIN cart_item i ON c.cart_ID = i.cart_ID
-                WHERE c.user_ID = %s 
-                  AND c.status = 'purchased'
-                  AND DATE(c.created_at) BETWEEN %s AND %s
-                ORDER BY c.created_at DESC, i.item_name ASC
-            """
-            cursor.execute(query, (user_ID, target_date, month_end))
+        # Period totals come from the daily spend rollup
+        period_totals = get_spend_totals(cursor, user_ID, range_start, range_end)
+
+        # Items for the range; created_at is compared as a range so the index can be used
+        query = """
+            SELECT c.cart_ID, c.store_name, c.created_at,
+                   i.item_name, i.quantity, i.price, i.image_url,
+                   (i.quantity * i.price) as item_total
+            FROM shopping_cart c
+            JOIN cart_item i ON c.cart_ID = i.cart_ID
+            WHERE c.user_ID = %s 
+              AND c.status = 'purchased'
+              AND c.created_at >= %s
+              AND c.created_at < %s
+            ORDER BY c.created_at DESC, i.item_name ASC
+        """
+        cursor.execute(query, (user_ID, range_start, range_end + timedelta(days=1)))
 
         items = cursor.fetchall()
 
         # Group items by shopping trip (cart_ID)
         trips = {}
-        total_amount = 0
 
         for item in items:
             cart_id = item["cart_ID"]
             item_total = float(item["item_total"])
-            total_amount += item_total
 
             if cart_id not in trips:
                 trips[cart_id] = {
@@ -384,7 +310,9 @@ def get_spending_details():
                 "period_label": period_labels.get(
                     period, target_date.strftime("%B %d, %Y")
                 ),
-                "total_amount": round(total_amount, 2),
+                "total_amount": round(period_totals["total_spent"], 2),
+                # Counted from the list itself: the rollup's trip_count also
+                # includes purchased carts without items, which the list omits
                 "total_trips": len(trips_list),
                 "total_items": sum(len(trip["items"]) for trip in trips_list),
                 "trips": trips_list,
@@ -136,6 +136,8 @@ def batch_match_ingredients():
     
     try:
         results = fuzzy_matching_service.batch_match_ingredients(user_id, ingredients)
+        # Nothing else is written here, so commit the suggestion cache rows
+        get_db().commit()
         
         # Convert results to JSON-serializable format
         results_dict = []
@@ -267,7 +269,9 @@ def generate_shopping_list_with_matching():
             for ing in ingredients
         ]
         
-        matching_results = fuzzy_matching_service.batch_match_ingredients(user_id, ingredients_list)
+        matching_results = fuzzy_matching_service.batch_match_ingredients(
+            user_id, ingredients_list, cursor=cursor
+        )
         
         # Store detailed matching results
         shopping_items = []
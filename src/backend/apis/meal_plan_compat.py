@@ -4,7 +4,9 @@ This module provides backward compatibility for the old meal plan structure
 while using the new individual meals database structure underneath.
 """
 
-from flask import Blueprint, request, jsonify, session
+import hashlib
+import json
+from flask import Blueprint, request, jsonify, session, make_response
 from src.database import get_db
 from datetime import date
 
@@ -113,18 +115,52 @@ def get_meal_plan_details(plan_id):
     cursor = db.cursor()
 
     try:
-        # Verify session belongs to user (plan_id is actually session_id in new structure)
-        verify_query = "SELECT * FROM meal_plan_sessions WHERE session_id = %s AND user_id = %s"
+        # Verify session belongs to user (plan_id is actually session_id in new structure).
+        # The same query summarizes everything the response is built from, for the ETag.
+        verify_query = """
+            SELECT s.*,
+                (SELECT CONCAT_WS(':', COUNT(*), MAX(m.updated_at), MAX(rt.updated_at))
+                 FROM meals m
+                 LEFT JOIN recipe_templates rt ON m.recipe_template_id = rt.template_id
+                 WHERE m.session_id = s.session_id) AS meals_state,
+                (SELECT CONCAT_WS(':', COUNT(*), MAX(updated_at))
+                 FROM session_batch_prep WHERE session_id = s.session_id) AS prep_state,
+                (SELECT CONCAT_WS(':', COUNT(*), MAX(updated_at))
+                 FROM session_shopping_lists WHERE session_id = s.session_id) AS shopping_state,
+                (SELECT CONCAT_WS(':', sgs.generation_id, sgs.auto_matched_count, sgs.confirm_needed_count,
+                                  sgs.missing_count, sgs.completed_at,
+                                  (SELECT CONCAT_WS(':', COUNT(*), MAX(gim.updated_at))
+                                   FROM generation_ingredient_matches gim
+                                   WHERE gim.generation_id = sgs.generation_id))
+                 FROM shopping_generation_sessions sgs
+                 WHERE sgs.meal_plan_session_id = s.session_id
+                 ORDER BY sgs.generated_at DESC
+                 LIMIT 1) AS matching_state,
+                (SELECT version FROM user_pantry_versions WHERE user_id = s.user_id) AS pantry_version
+            FROM meal_plan_sessions s
+            WHERE s.session_id = %s AND s.user_id = %s
+        """
         cursor.execute(verify_query, (plan_id, user_id))
         session_info = cursor.fetchone()
 
         if not session_info:
             return jsonify({"success": False, "message": "Meal plan not found"})
 
-        # Get meals for this session and convert to old recipe format
+        # Unchanged plans are answered without rebuilding the response
+        etag = hashlib.sha256(
+            json.dumps(session_info, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:32]
+        if request.if_none_match.contains_weak(etag):
+            response = make_response("", 304)
+            response.set_etag(etag, weak=True)
+            response.headers["Cache-Control"] = "private, no-cache"
+            return response
+
+        # Get meals with their templates for this session and convert to old recipe format
         meals_query = """
             SELECT 
                 m.meal_id,
+                m.recipe_template_id,
                 m.meal_date,
                 m.meal_type,
                 m.notes,
@@ -147,7 +183,23 @@ def get_meal_plan_details(plan_id):
         cursor.execute(meals_query, (plan_id,))
         meal_data = cursor.fetchall()
 
-        # Get ingredients for each meal
+        # Get ingredients for every template in the plan with one query
+        ingredients_by_template = {}
+        template_ids = list(dict.fromkeys(
+            meal['recipe_template_id'] for meal in meal_data if meal['recipe_template_id'] and meal['recipe_name']
+        ))
+        if template_ids:
+            placeholders = ", ".join(["%s"] * len(template_ids))
+            ingredients_query = f"""
+                SELECT template_id, ingredient_name, quantity, unit, notes as ingredient_notes
+                FROM template_ingredients 
+                WHERE template_id IN ({placeholders})
+                ORDER BY ingredient_id
+            """
+            cursor.execute(ingredients_query, template_ids)
+            for ingredient in cursor.fetchall():
+                ingredients_by_template.setdefault(ingredient['template_id'], []).append(ingredient)
+
         recipes_with_ingredients = []
         for meal in meal_data:
             # Calculate day number relative to session start
@@ -155,25 +207,8 @@ def get_meal_plan_details(plan_id):
             meal_date = meal['meal_date']
             day_number = (meal_date - start_date).days + 1
 
-            # Get ingredients (template + custom)
-            ingredients = []
-            
-            if meal['recipe_name']:  # Has template
-                template_query = """
-                    SELECT rt.template_id FROM recipe_templates rt 
-                    WHERE rt.recipe_name = %s
-                """
-                cursor.execute(template_query, (meal['recipe_name'],))
-                template = cursor.fetchone()
-                
-                if template:
-                    ingredients_query = """
-                        SELECT ingredient_name, quantity, unit, notes as ingredient_notes
-                        FROM template_ingredients 
-                        WHERE template_id = %s
-                    """
-                    cursor.execute(ingredients_query, (template['template_id'],))
-                    ingredients.extend(cursor.fetchall())
+            # Template ingredients (custom meals have none)
+            ingredients = ingredients_by_template.get(meal['recipe_template_id'], [])
 
             # Format as old recipe structure
             recipe_entry = {
@@ -313,7 +348,10 @@ def get_meal_plan_details(plan_id):
             } if generation_summary else None
         }
 
-        return jsonify({"success": True, "meal_plan": structured_plan})
+        response = make_response(jsonify({"success": True, "meal_plan": structured_plan}))
+        response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
 
     except Exception as e:
         return jsonify({"success": False, "message": f"Failed to get meal plan: {str(e)}"})
@@ -334,11 +372,12 @@ def delete_meal_plan(plan_id):
     try:
         # First verify the meal plan belongs to the current user
         cursor.execute("""
-            SELECT session_id FROM meal_plan_sessions 
+            SELECT session_id, start_date, end_date FROM meal_plan_sessions 
             WHERE session_id = %s AND user_id = %s
         """, (plan_id, user_id))
         
-        if not cursor.fetchone():
+        plan_info = cursor.fetchone()
+        if not plan_info:
             return jsonify({"success": False, "message": "Meal plan not found or access denied"})
         
         # Delete in order to respect foreign key constraints
@@ -364,6 +403,10 @@ def delete_meal_plan(plan_id):
             DELETE FROM meal_plan_sessions WHERE session_id = %s
         """, (plan_id,))
         
+        # 5. Drop the deleted meals from the daily nutrition summaries
+        from src.services.nutrition_summary import dates_between, refresh_daily_summaries
+        refresh_daily_summaries(cursor, user_id, dates_between(plan_info["start_date"], plan_info["end_date"]))
+        
         db.commit()
         
         return jsonify({
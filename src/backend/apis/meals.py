@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify, session
 from src.database import get_db
 from src.timezone_utils import get_user_current_date
-from src.subscription_utils import subscription_required, check_subscription_limit, SubscriptionLimitExceeded, increment_usage, get_user_subscription_info
+from src.subscription_utils import subscription_required, check_subscription_limit, SubscriptionLimitExceeded, consume_usage, release_usage, get_user_subscription_info
+from src.services.user_preferences import get_user_preferences, invalidate_user_preferences
 import json
 from datetime import datetime, timedelta
 
@@ -155,14 +156,18 @@ def get_daily_nutrition_summary(date):
         cursor.execute(meals_query, (user_id, target_date))
         meals_data = cursor.fetchall()
         
-        # Calculate daily totals
+        # Daily totals of completed meals come from the maintained summary
+        from src.services.nutrition_summary import get_daily_summaries
+        summary = get_daily_summaries(cursor, user_id, target_date, target_date)[target_date]
+        db.commit()
+        
         daily_totals = {
-            "calories": 0,
-            "protein": 0,
-            "carbs": 0,
-            "fat": 0,
-            "fiber": 0,
-            "sodium": 0
+            "calories": float(summary["total_calories"]),
+            "protein": float(summary["total_protein_g"]),
+            "carbs": float(summary["total_carbohydrates_g"]),
+            "fat": float(summary["total_fat_g"]),
+            "fiber": float(summary["total_fiber_g"]),
+            "sodium": float(summary["total_sodium_mg"])
         }
         
         meals_with_nutrition = []
@@ -198,15 +203,6 @@ def get_daily_nutrition_summary(date):
                 "serving_size": meal["serving_size"]
             }
             
-            # Add to daily totals if meal is completed (or if we want to show planned vs actual)
-            if meal["is_completed"]:
-                daily_totals["calories"] += meal_nutrition["nutrition"]["calories"] or 0
-                daily_totals["protein"] += meal_nutrition["nutrition"]["protein"] or 0
-                daily_totals["carbs"] += meal_nutrition["nutrition"]["carbs"] or 0
-                daily_totals["fat"] += meal_nutrition["nutrition"]["fat"] or 0
-                daily_totals["fiber"] += meal_nutrition["nutrition"]["fiber"] or 0
-                daily_totals["sodium"] += meal_nutrition["nutrition"]["sodium"] or 0
-            
             meals_with_nutrition.append(meal_nutrition)
         
         # Filter daily totals based on subscription tier
@@ -218,7 +214,7 @@ def get_daily_nutrition_summary(date):
             "daily_totals": filtered_daily_totals,
             "meals": meals_with_nutrition,
             "total_meals": len(meals_data),
-            "completed_meals": len([m for m in meals_data if m["is_completed"]])
+            "completed_meals": summary["meals_logged"]
         }
         
         # Add subscription-related metadata
@@ -236,13 +232,78 @@ def get_daily_nutrition_summary(date):
 
 @meals_bp.route("/generate-meal-plan", methods=["POST"])
 def generate_meal_plan():
-    """Generate a meal plan and store as individual meals"""
+    """
+    Generate a meal plan and store as individual meals.
+
+    Send "async": true (or ?async=1) to queue the generation as a background job
+    instead; the response is 202 with a job_id to poll at /api/meal-plan-jobs/<job_id>.
+    """
     if "user_ID" not in session:
         return jsonify({"success": False, "message": "Not authenticated"})
 
-    data = request.get_json()
+    data = request.get_json() or {}
     user_id = session["user_ID"]
 
+    params, error_response = prepare_meal_plan_request(user_id, data)
+    if error_response is not None:
+        return error_response
+
+    if data.get("async") or request.args.get("async") in ("1", "true"):
+        from src.services.meal_plan_jobs import meal_plan_job_runner
+
+        try:
+            job_id = meal_plan_job_runner.enqueue(user_id, params)
+        except Exception as e:
+            return jsonify({"success": False, "message": f"Failed to queue meal plan generation: {str(e)}"})
+
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/meal-plan-jobs/{job_id}"
+        }), 202
+
+    result = run_meal_plan_generation(user_id, params)
+    if result.get("requires_upgrade"):
+        return jsonify(result), 403
+    return jsonify(result)
+
+
+@meals_bp.route("/meal-plan-jobs/<job_id>", methods=["GET"])
+def get_meal_plan_job(job_id):
+    """
+    Get the status of a queued meal plan generation job.
+
+    Pass ?wait=<seconds> to long-poll until the job finishes or the wait expires.
+    """
+    if "user_ID" not in session:
+        return jsonify({"success": False, "message": "Not authenticated"})
+
+    from src.services.meal_plan_jobs import meal_plan_job_runner
+
+    try:
+        wait = float(request.args.get("wait", 0))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "message": "Invalid wait value"})
+
+    try:
+        job = meal_plan_job_runner.get_status(job_id, session["user_ID"], wait=wait)
+    except Exception as e:
+        return jsonify({"success": False, "message": f"Failed to get job status: {str(e)}"})
+
+    if job is None:
+        return jsonify({"success": False, "message": "Job not found"}), 404
+
+    return jsonify({"success": True, **job})
+
+
+def prepare_meal_plan_request(user_id, data):
+    """
+    Validate a meal plan request and resolve its inputs.
+
+    Returns:
+        (params, None) on success, or (None, response) when the request is rejected
+    """
     # Check subscription limits first
     try:
         # Check active meal plans limit (3 for free tier)
@@ -265,15 +326,13 @@ def generate_meal_plan():
             check_subscription_limit(user_id, 'meal_plans_advance_days')
     
     except SubscriptionLimitExceeded as e:
-        return jsonify({
+        return None, (jsonify({
             'success': False,
             'message': str(e),
             'limit_type': e.limit_type,
             'current_limit': e.current_limit,
             'requires_upgrade': True
-        }), 403
-
-    # Required fields (reuse from above checks)
+        }), 403)
 
     # Optional fields with defaults
     ingredients = data.get("ingredients", [])
@@ -282,40 +341,30 @@ def generate_meal_plan():
     cooking_time = data.get("cooking_time", 60)
     minimal_cooking_sessions = data.get("minimal_cooking_sessions", False)
     selected_meals = data.get("selected_meals", None)  # New parameter for meal selection
-    nutrition_tracking_enabled = True
 
     try:
         days = int(days)
         if days < 1 or days > 7:
-            return jsonify({"success": False, "message": "Days must be between 1 and 7"})
+            return None, jsonify({"success": False, "message": "Days must be between 1 and 7"})
     except (ValueError, TypeError):
-        return jsonify({"success": False, "message": "Invalid number of days"})
-
-    # Parse start date or use today
-    if not start_date:  
-        start_date = datetime.now().date()
-    elif type(start_date) == str:
-        try:
-            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-        except ValueError:
-            return jsonify({"success": False, "message": "Invalid start date format. Use YYYY-MM-DD"})
+        return None, jsonify({"success": False, "message": "Invalid number of days"})
 
     end_date = start_date + timedelta(days=days - 1)
 
     try:
         cooking_time = int(cooking_time)
         if cooking_time < 10 or cooking_time > 300:
-            return jsonify({"success": False, "message": "Cooking time must be between 10 and 300 minutes"})
+            return None, jsonify({"success": False, "message": "Cooking time must be between 10 and 300 minutes"})
     except (ValueError, TypeError):
-        return jsonify({"success": False, "message": "Invalid cooking time"})
+        return None, jsonify({"success": False, "message": "Invalid cooking time"})
 
     if budget:
         try:
             budget = float(budget)
             if budget < 10 or budget > 1000:
-                return jsonify({"success": False, "message": "Budget must be between $10 and $1000"})
+                return None, jsonify({"success": False, "message": "Budget must be between $10 and $1000"})
         except (ValueError, TypeError):
-            return jsonify({"success": False, "message": "Invalid budget amount"})
+            return None, jsonify({"success": False, "message": "Invalid budget amount"})
 
     db = get_db()
     cursor = db.cursor()
@@ -347,55 +396,124 @@ def generate_meal_plan():
         
         # Check if there are any existing meals in the date range
         if existing_meals:
-            existing_dates = set()
-            locked_meals = []
-            unlocked_meals = []
-            
-            for meal in existing_meals:
-                meal_date_str = meal['meal_date'].strftime('%Y-%m-%d')
-                existing_dates.add(meal_date_str)
-                
-                if meal['is_locked']:
-                    locked_meals.append(f"{meal_date_str} ({meal['meal_type']})")
-                else:
-                    unlocked_meals.append(f"{meal_date_str} ({meal['meal_type']})")
-            
-            # Create detailed error message
-            error_parts = []
-            if locked_meals:
-                error_parts.append(f"Locked meals: {', '.join(locked_meals)}")
-            if unlocked_meals:
-                error_parts.append(f"Existing meals: {', '.join(unlocked_meals)}")
-            
-            error_message = f"Cannot generate meal plan. The selected date range conflicts with existing meals. {' | '.join(error_parts)}. Please choose a different date range or delete conflicting meals first."
-            
-            return jsonify({
-                "success": False, 
-                "message": error_message,
-                "conflicting_dates": list(existing_dates),
-                "locked_meals": locked_meals,
-                "unlocked_meals": unlocked_meals
-            })
-        
-        # No existing meals, safe to proceed
-        blocked_slots = set()
-
-        # Generate meal plan using AI
-        meal_plan_data = generate_meal_plan_with_ai(
-            days=days,
-            start_date=start_date,
-            ingredients=ingredients,
-            dietary_preference=dietary_preference,
-            budget=budget,
-            cooking_time=cooking_time,
-            blocked_slots=blocked_slots,
-            minimal_cooking_sessions=minimal_cooking_sessions,
-            selected_meals=selected_meals,
-            nutrition_tracking_enabled=nutrition_tracking_enabled
-        )
+            return None, jsonify(meal_conflict_payload(existing_meals))
+
+    except Exception as e:
+        return None, jsonify({"success": False, "message": f"Failed to generate meal plan: {str(e)}"})
+    finally:
+        cursor.close()
+
+    # Plain JSON types so the params can be stored with a queued job
+    params = {
+        "days": days,
+        "start_date": start_date.strftime("%Y-%m-%d"),
+        "ingredients": ingredients,
+        "dietary_preference": dietary_preference,
+        "budget": budget,
+        "cooking_time": cooking_time,
+        "minimal_cooking_sessions": minimal_cooking_sessions,
+        "selected_meals": selected_meals,
+    }
+    return params, None
+
+
+def meal_conflict_payload(existing_meals):
+    """Error payload for a generation request whose date range already has meals"""
+    existing_dates = set()
+    locked_meals = []
+    unlocked_meals = []
+
+    for meal in existing_meals:
+        meal_date_str = meal['meal_date'].strftime('%Y-%m-%d')
+        existing_dates.add(meal_date_str)
+
+        if meal['is_locked']:
+            locked_meals.append(f"{meal_date_str} ({meal['meal_type']})")
+        else:
+            unlocked_meals.append(f"{meal_date_str} ({meal['meal_type']})")
+
+    # Create detailed error message
+    error_parts = []
+    if locked_meals:
+        error_parts.append(f"Locked meals: {', '.join(locked_meals)}")
+    if unlocked_meals:
+        error_parts.append(f"Existing meals: {', '.join(unlocked_meals)}")
+
+    error_message = f"Cannot generate meal plan. The selected date range conflicts with existing meals. {' | '.join(error_parts)}. Please choose a different date range or delete conflicting meals first."
+
+    return {
+        "success": False,
+        "message": error_message,
+        "conflicting_dates": sorted(existing_dates),
+        "locked_meals": locked_meals,
+        "unlocked_meals": unlocked_meals
+    }
 
-        if not meal_plan_data:
-            return jsonify({"success": False, "message": "Failed to generate meal plan. Please try again."})
+
+def run_meal_plan_generation(user_id, params):
+    """
+    Generate a meal plan with AI and persist it. Used by the synchronous endpoint
+    and by queued jobs.
+
+    Returns:
+        Response payload dict ("success" is False on failure)
+    """
+    from src.database import close_db
+
+    days = params["days"]
+    start_date = datetime.strptime(params["start_date"], "%Y-%m-%d").date()
+    end_date = start_date + timedelta(days=days - 1)
+    ingredients = params["ingredients"]
+    dietary_preference = params["dietary_preference"]
+    budget = params["budget"]
+    cooking_time = params["cooking_time"]
+    minimal_cooking_sessions = params["minimal_cooking_sessions"]
+    selected_meals = params["selected_meals"]
+    nutrition_tracking_enabled = True
+
+    # No existing meals, safe to proceed
+    blocked_slots = set()
+
+    # Don't hold a pooled connection while waiting on the AI provider
+    close_db()
+
+    # Generate meal plan using AI
+    meal_plan_data = generate_meal_plan_with_ai(
+        days=days,
+        start_date=start_date,
+        ingredients=ingredients,
+        dietary_preference=dietary_preference,
+        budget=budget,
+        cooking_time=cooking_time,
+        blocked_slots=blocked_slots,
+        minimal_cooking_sessions=minimal_cooking_sessions,
+        selected_meals=selected_meals,
+        nutrition_tracking_enabled=nutrition_tracking_enabled
+    )
+
+    if not meal_plan_data:
+        return {"success": False, "message": "Failed to generate meal plan. Please try again."}
+
+    db = get_db()
+    cursor = db.cursor()
+
+    try:
+        # Claim the active meal plan allowance before writing the plan; the claim
+        # commits or rolls back together with it
+        consume_usage(user_id, 'meal_plans_active', cursor=cursor)
+
+        # The range was checked before generating, but meals may have been added
+        # since; re-check under a locking read so no concurrent write can slip in
+        cursor.execute("""
+            SELECT meal_date, meal_type, is_locked
+            FROM meals
+            WHERE user_id = %s AND meal_date BETWEEN %s AND %s
+            FOR UPDATE
+        """, (user_id, start_date, end_date))
+        existing_meals = cursor.fetchall()
+        if existing_meals:
+            db.rollback()
+            return meal_conflict_payload(existing_meals)
 
         # Create meal plan session
         session_name = f"Meal Plan - {start_date.strftime('%b %d')}"
@@ -417,9 +535,9 @@ def generate_meal_plan():
         from src.backend.views.shopping import get_user_preference
         nutrition_tracking_enabled = get_user_preference(user_id, "nutrition_tracking_enabled", True)
         
-        # Process each day and create individual meals
-        created_meals = []
-        recipe_template_map = {}
+        # Process each day and queue individual meals for a bulk write
+        from src.services.meal_plan_writer import MealPlanWriter
+        writer = MealPlanWriter(cursor, user_id, session_id, nutrition_tracking_enabled)
 
         # Create a lookup for selected meals if provided
         selected_meals_lookup = {}
@@ -489,42 +607,21 @@ def generate_meal_plan():
                     else:
                         recipe_name = recipe_data.get("name", "")
 
-                    # Get or create recipe template
-                    print(f"DEBUG: Creating template for {recipe_name} ({meal_type})")
-                    template_id = get_or_create_recipe_template(cursor, recipe_data, meal_type)
-                    print(f"DEBUG: Created template_id = {template_id}")
-                    recipe_template_map[template_id] = recipe_data
-
-                    # Create individual meal
-                    meal_query = """
-                        INSERT INTO meals (
-                            user_id, meal_date, meal_type, recipe_template_id, session_id
-                        ) VALUES (%s, %s, %s, %s, %s)
-                    """
-                    cursor.execute(meal_query, (user_id, meal_date, meal_type, template_id, session_id))
-                    meal_id = cursor.lastrowid
-                    
-                    # Store nutrition data if available and nutrition tracking is enabled
-                    if nutrition_tracking_enabled:
-                        store_meal_nutrition(cursor, meal_id, user_id, recipe_data)
-                    
-                    created_meals.append({
-                        "meal_id": meal_id,
-                        "date": meal_date.strftime("%Y-%m-%d"),
-                        "type": meal_type,
-                        "recipe_name": recipe_name
-                    })
+                    writer.add_meal(meal_date, meal_type, recipe_data)
+
+        # Write templates, ingredients, meals and nutrition in bulk
+        created_meals, recipe_template_map = writer.flush()
+
+        from src.services.nutrition_summary import dates_between, refresh_daily_summaries
+        refresh_daily_summaries(cursor, user_id, dates_between(start_date, end_date))
 
         # Generate session shopping list and batch prep
         generate_session_shopping_list_with_fuzzy_matching(cursor, session_id, user_id, recipe_template_map)
         generate_session_batch_prep(cursor, session_id, meal_plan_data.get("batch_prep", []))
 
         db.commit()
-        
-        # Increment active meal plans usage counter (for subscription limits)
-        increment_usage(user_id, 'meal_plans_active')
 
-        return jsonify({
+        return {
             "success": True,
             "session_id": session_id,
             "session_name": session_name,
@@ -532,97 +629,25 @@ def generate_meal_plan():
             "start_date": start_date.strftime("%Y-%m-%d"),
             "end_date": end_date.strftime("%Y-%m-%d"),
             "message": f"Successfully generated {len(created_meals)} meals"
-        })
+        }
 
+    except SubscriptionLimitExceeded as e:
+        # A concurrent plan used up the allowance while this one was generating
+        db.rollback()
+        return {
+            "success": False,
+            "message": str(e),
+            "limit_type": e.limit_type,
+            "current_limit": e.current_limit,
+            "requires_upgrade": True
+        }
     except Exception as e:
         db.rollback()
-        return jsonify({"success": False, "message": f"Failed to generate meal plan: {str(e)}"})
+        return {"success": False, "message": f"Failed to generate meal plan: {str(e)}"}
     finally:
         cursor.close()
 
 
-def get_or_create_recipe_template(cursor, recipe_data, meal_type):
-    """Get existing recipe template or create new one"""
-    recipe_name = recipe_data.get("name", "")
-    
-    # Handle instructions - convert array to string if needed
-    instructions_raw = recipe_data.get("instructions", "")
-    if isinstance(instructions_raw, list):
-        # Check if steps are already numbered
-        instructions_list = []
-        for i, step in enumerate(instructions_raw):
-            step_str = str(step).strip()
-            # Check if step already starts with a number and period (e.g., "1. ")
-            if step_str and not (step_str[0].isdigit() and '. ' in step_str[:4]):
-                # Add numbering if not already numbered
-                instructions_list.append(f"{i+1}. {step_str}")
-            else:
-                # Keep as-is if already numbered
-                instructions_list.append(step_str)
-        instructions = "\n".join(instructions_list)
-        print(f"DEBUG: Converted instructions array to string: {len(instructions_raw)} steps")
-    else:
-        instructions = instructions_raw
-    
-    print(f"DEBUG: Final instructions type: {type(instructions)}")
-    
-    # Check if template already exists
-    check_query = """
-        SELECT template_id FROM recipe_templates 
-        WHERE recipe_name = %s AND meal_type = %s AND instructions = %s
-    """
-    cursor.execute(check_query, (recipe_name, meal_type, instructions))
-    existing = cursor.fetchone()
-    
-    if existing:
-        return existing['template_id']
-    
-    # Create new template
-    template_query = """
-        INSERT INTO recipe_templates (
-            recipe_name, description, meal_type, prep_time, cook_time,
-            servings, estimated_cost, difficulty, calories_per_serving, instructions
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-    """
-    cursor.execute(template_query, (
-        recipe_name,
-        recipe_data.get("description", ""),
-        meal_type,
-        recipe_data.get("prep_time", 0),
-        recipe_data.get("cook_time", 0),
-        recipe_data.get("servings", 1),
-        recipe_data.get("cost", 0),
-        recipe_data.get("difficulty", "medium"),
-        recipe_data.get("calories", 0),
-        instructions
-    ))
-    template_id = cursor.lastrowid
-    
-    # Add ingredients
-    ingredients_list = recipe_data.get("ingredients", [])
-    print(f"DEBUG: Adding {len(ingredients_list)} ingredients for template {template_id}")
-    
-    for i, ingredient in enumerate(ingredients_list):
-        print(f"DEBUG: Ingredient {i}: {ingredient}")
-        ingredient_query = """
-            INSERT INTO template_ingredients (
-                template_id, ingredient_name, quantity, unit, notes, estimated_cost
-            ) VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        ingredient_values = (
-            template_id,
-            ingredient.get("name", ""),
-            ingredient.get("quantity", 1),
-            ingredient.get("unit", ""),
-            ingredient.get("notes", ""),
-            ingredient.get("cost", 0)
-        )
-        print(f"DEBUG: Ingredient values: {ingredient_values}")
-        cursor.execute(ingredient_query, ingredient_values)
-    
-    return template_id
-
-
 @meals_bp.route("/meals", methods=["GET"])
 def get_meals():
     """Get meals for date range (for calendar view) - timezone-aware"""
@@ -925,6 +950,11 @@ def update_meal(meal_id):
             """
             cursor.execute(update_query, params)
 
+        # Completion changes what counts towards the day's nutrition totals
+        if 'is_completed' in data:
+            from src.services.nutrition_summary import refresh_daily_summaries
+            refresh_daily_summaries(cursor, user_id, [meal_info['meal_date']])
+
         db.commit()
         return jsonify({"success": True, "message": "Meal updated successfully"})
 
@@ -947,13 +977,17 @@ def delete_meal(meal_id):
 
     try:
         # Verify meal belongs to user
-        verify_query = "SELECT meal_id FROM meals WHERE meal_id = %s AND user_id = %s"
+        verify_query = "SELECT meal_id, meal_date FROM meals WHERE meal_id = %s AND user_id = %s"
         cursor.execute(verify_query, (meal_id, user_id))
-        if not cursor.fetchone():
+        meal_info = cursor.fetchone()
+        if not meal_info:
             return jsonify({"success": False, "message": "Meal not found or access denied"})
 
         # Delete meal (cascades will handle custom ingredients)
         cursor.execute("DELETE FROM meals WHERE meal_id = %s AND user_id = %s", (meal_id, user_id))
+
+        from src.services.nutrition_summary import refresh_daily_summaries
+        refresh_daily_summaries(cursor, user_id, [meal_info['meal_date']])
         
         db.commit()
         return jsonify({"success": True, "message": "Meal deleted successfully"})
@@ -967,32 +1001,52 @@ def delete_meal(meal_id):
 
 # Import AI generation function from the old file
 def generate_meal_plan_with_ai(days, start_date, ingredients, dietary_preference, budget, cooking_time, blocked_slots=None, minimal_cooking_sessions=False, selected_meals=None, nutrition_tracking_enabled=True):
-    """Use Gemini AI to generate a structured meal plan, with OpenAI fallback"""
+    """Use Gemini AI to generate a structured meal plan, hedged with an OpenAI request"""
+    from src.llm_hedging import hedged_call, remaining_time
+    from src.openai_utils import openai_meal_plan_generation
+    from src.services.meal_plan_cache import meal_plan_cache
+
+    # Serve identical requests from the cache before calling any provider
+    cache_key = meal_plan_cache.make_key(days, start_date, ingredients, dietary_preference, budget, cooking_time, blocked_slots, minimal_cooking_sessions, selected_meals, nutrition_tracking_enabled)
+    cached_plan = meal_plan_cache.get(cache_key)
+    if cached_plan is not None:
+        return cached_plan
+
+    # Build the prompt once for both providers
+    prompt = _build_meal_plan_prompt(days, start_date, ingredients, dietary_preference, budget, cooking_time, blocked_slots, minimal_cooking_sessions, selected_meals, nutrition_tracking_enabled)
+
+    meal_plan = hedged_call(
+        "meal_plan",
+        {
+            "gemini": lambda deadline_at: _gemini_meal_plan(prompt, timeout=remaining_time(deadline_at)),
+            "openai": lambda deadline_at: openai_meal_plan_generation(prompt, timeout=remaining_time(deadline_at)),
+        },
+        validate=lambda result: isinstance(result, dict) and "days" in result,
+    )
+
+    if meal_plan:
+        meal_plan_cache.set(cache_key, meal_plan)
+    return meal_plan
+
+
+def _gemini_meal_plan(prompt, timeout=None):
+    """Generate a meal plan with Gemini; returns the parsed plan or None"""
     import os
     import google.generativeai as genai
-    from src.openai_utils import openai_meal_plan_generation
 
     try:
         # Configure Gemini
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
-            print("WARNING: GEMINI_API_KEY not found, trying OpenAI fallback")
-            # Build the prompt first for OpenAI fallback
-            prompt = _build_meal_plan_prompt(days, start_date, ingredients, dietary_preference, budget, cooking_time, blocked_slots, minimal_cooking_sessions, selected_meals, nutrition_tracking_enabled)
-            openai_result = openai_meal_plan_generation(prompt)
-            if openai_result:
-                print("DEBUG: OpenAI fallback successful for meal plan generation")
-                return openai_result
+            print("WARNING: GEMINI_API_KEY not found, relying on OpenAI")
             return None
 
         genai.configure(api_key=api_key)
         model = genai.GenerativeModel("gemini-1.5-flash-latest")
 
-        # Build the prompt
-        prompt = _build_meal_plan_prompt(days, start_date, ingredients, dietary_preference, budget, cooking_time, blocked_slots, minimal_cooking_sessions, selected_meals, nutrition_tracking_enabled)
-
         # Generate the meal plan
-        response = model.generate_content(prompt)
+        request_options = {"timeout": timeout} if timeout is not None else None
+        response = model.generate_content(prompt, request_options=request_options)
         response_text = response.text.strip()
 
         # Clean the response to extract just the JSON
@@ -1017,14 +1071,7 @@ def generate_meal_plan_with_ai(days, start_date, ingredients, dietary_preference
             return None
 
     except Exception as e:
-        print(f"ERROR: Gemini meal plan generation failed: {str(e)}, trying OpenAI fallback")
-        # Try OpenAI fallback
-        prompt = _build_meal_plan_prompt(days, start_date, ingredients, dietary_preference, budget, cooking_time, blocked_slots, minimal_cooking_sessions, selected_meals, nutrition_tracking_enabled)
-        openai_result = openai_meal_plan_generation(prompt)
-        if openai_result:
-            print("DEBUG: OpenAI fallback successful for meal plan generation after Gemini failure")
-            return openai_result
-        print("WARNING: OpenAI fallback also failed")
+        print(f"ERROR: Gemini meal plan generation failed: {str(e)}")
         return None
 
 
@@ -1189,7 +1236,7 @@ def generate_session_shopping_list_with_fuzzy_matching(cursor, session_id, user_
             return
 
         # Get ingredients for all templates used in this session
-        template_ids = [meal['template_id'] for meal in session_meals]
+        template_ids = list(dict.fromkeys(meal['template_id'] for meal in session_meals))
         print(f"DEBUG: template_ids = {template_ids}")
         
         if not template_ids:
@@ -1208,46 +1255,28 @@ def generate_session_shopping_list_with_fuzzy_matching(cursor, session_id, user_
         cursor.execute(ingredients_query, template_ids)
         ingredients = cursor.fetchall()
 
-        # Consolidate ingredients by name
-        consolidated = {}
-        meal_usage = {}
-        
-        for ingredient in ingredients:
-            name = ingredient["ingredient_name"].lower()
-            if name not in consolidated:
-                consolidated[name] = {
-                    "name": ingredient["ingredient_name"],
-                    "total_quantity": 0,
-                    "unit": ingredient["unit"],
-                    "total_cost": 0,
-                    "meals_using": []
-                }
-
-            consolidated[name]["total_quantity"] += float(ingredient["quantity"] or 0)
-            consolidated[name]["total_cost"] += float(ingredient["estimated_cost"] or 0)
-            
-            # Track which meals use this ingredient
-            for meal in session_meals:
-                if meal['template_id'] == ingredient['template_id']:
-                    consolidated[name]["meals_using"].append(meal['meal_id'])
+        # Consolidate by canonical name and unit dimension
+        from src.services.ingredient_consolidation import (
+            consolidate_ingredients, insert_generation_matches, insert_session_shopping_list
+        )
+        consolidated = consolidate_ingredients(ingredients, session_meals)
 
-        # Use enhanced shopping generation with fuzzy matching
-        from src.services.enhanced_shopping_generation import enhanced_shopping_generator
-        
         # Prepare ingredients for fuzzy matching
         ingredients_for_matching = [
             {
-                "ingredient_name": item_data["name"],
-                "quantity": item_data["total_quantity"],
-                "unit": item_data["unit"]
+                "ingredient_name": item.name,
+                "quantity": item.total_quantity,
+                "unit": item.unit
             }
-            for item_data in consolidated.values()
+            for item in consolidated
         ]
         
         # Perform fuzzy matching and get enhanced results
         if ingredients_for_matching:
             from src.services.fuzzy_matching import fuzzy_matching_service
-            matching_results = fuzzy_matching_service.batch_match_ingredients(user_id, ingredients_for_matching)
+            matching_results = fuzzy_matching_service.batch_match_ingredients(
+                user_id, ingredients_for_matching, cursor=cursor
+            )
             
             # Create shopping generation session
             cursor.execute("""
@@ -1258,28 +1287,23 @@ def generate_session_shopping_list_with_fuzzy_matching(cursor, session_id, user_
             
             generation_id = cursor.lastrowid
             
-            # Process matching results and create shopping list entries
+            # Process matching results and collect rows for the batch inserts
             auto_matched = 0
             confirm_needed = 0
             missing = 0
+            match_rows = []
+            shopping_rows = []
             
-            for i, result in enumerate(matching_results):
-                original_data = list(consolidated.values())[i]
-                
+            categories = categorize_ingredients(result.ingredient_name for result in matching_results)
+            
+            for original_data, result, category in zip(consolidated, matching_results, categories):
                 # Skip items with zero or negative required quantities
                 if result.required_quantity <= 0:
                     print(f"DEBUG: Skipping zero-quantity ingredient: {result.ingredient_name}")
                     continue
                 
-                # Store detailed matching result
-                cursor.execute("""
-                    INSERT INTO generation_ingredient_matches 
-                    (generation_id, ingredient_name, required_quantity, required_unit, 
-                     pantry_item_id, pantry_available_quantity, match_confidence, 
-                     match_type, needs_to_buy_quantity, estimated_cost)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, [
-                    generation_id,
+                # Detailed matching result
+                match_rows.append((
                     result.ingredient_name,
                     result.required_quantity,
                     result.required_unit,
@@ -1288,8 +1312,8 @@ def generate_session_shopping_list_with_fuzzy_matching(cursor, session_id, user_
                     result.best_match.confidence_score if result.best_match else None,
                     result.match_type,
                     result.needs_to_buy,
-                    original_data["total_cost"]
-                ])
+                    original_data.total_cost
+                ))
                 
                 # Count match types
                 if result.match_type == "auto":
@@ -1299,25 +1323,19 @@ def generate_session_shopping_list_with_fuzzy_matching(cursor, session_id, user_
                 else:
                     missing += 1
                 
-                # Insert into session shopping list (original table for compatibility)
-                category = categorize_ingredient(result.ingredient_name)
-                
-                shopping_query = """
-                    INSERT INTO session_shopping_lists (
-                        session_id, ingredient_name, total_quantity, unit,
-                        estimated_cost, category, meals_using
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """
-                cursor.execute(shopping_query, (
-                    session_id,
+                # Session shopping list (original table for compatibility)
+                shopping_rows.append((
                     result.ingredient_name,
                     result.required_quantity,  # Show total required quantity, not just what's needed
                     result.required_unit,
-                    original_data["total_cost"],
+                    original_data.total_cost,
                     category,
-                    json.dumps(original_data["meals_using"])
+                    original_data.meals_using
                 ))
             
+            insert_generation_matches(cursor, generation_id, match_rows)
+            insert_session_shopping_list(cursor, session_id, shopping_rows)
+            
             # Update generation session with summary
             cursor.execute("""
                 UPDATE shopping_generation_sessions 
@@ -1339,38 +1357,25 @@ def generate_session_shopping_list_with_fuzzy_matching(cursor, session_id, user_
     except Exception as e:
         print(f"ERROR: Failed to generate enhanced shopping list: {str(e)}")
         # Fallback to basic generation if fuzzy matching fails
-        generate_session_shopping_list_basic(cursor, session_id, consolidated if 'consolidated' in locals() else {})
+        generate_session_shopping_list_basic(cursor, session_id, consolidated if 'consolidated' in locals() else [])
 
 
 def generate_session_shopping_list_basic(cursor, session_id, consolidated):
     """Fallback basic shopping list generation without fuzzy matching"""
     try:
+        from src.services.ingredient_consolidation import insert_session_shopping_list
+
+        # Skip items with zero or negative quantities
+        items = [item for item in consolidated if item.total_quantity > 0]
+        categories = categorize_ingredients(item.name for item in items)
+        
         # Insert consolidated shopping list items using basic method
-        for item_data in consolidated.values():
-            # Skip items with zero or negative quantities
-            if item_data["total_quantity"] <= 0:
-                print(f"DEBUG: Skipping zero-quantity item: {item_data['name']}")
-                continue
-                
-            category = categorize_ingredient(item_data["name"])
+        insert_session_shopping_list(cursor, session_id, [
+            (item.name, item.total_quantity, item.unit, item.total_cost, category, item.meals_using)
+            for item, category in zip(items, categories)
+        ])
             
-            shopping_query = """
-                INSERT INTO session_shopping_lists (
-                    session_id, ingredient_name, total_quantity, unit,
-                    estimated_cost, category, meals_using
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(shopping_query, (
-                session_id,
-                item_data["name"],
-                item_data["total_quantity"],
-                item_data["unit"],
-                item_data["total_cost"],
-                category,
-                json.dumps(item_data["meals_using"])
-            ))
-            
-        print(f"DEBUG: Basic shopping list generated with {len(consolidated)} items")
+        print(f"DEBUG: Basic shopping list generated with {len(items)} items")
         
     except Exception as e:
         print(f"ERROR: Failed to generate basic shopping list: {str(e)}")
@@ -1399,62 +1404,18 @@ def generate_session_batch_prep(cursor, session_id, batch_prep_data):
         print(f"ERROR: Failed to generate batch prep: {str(e)}")
 
 
-def store_meal_nutrition(cursor, meal_id, user_id, recipe_data):
-    """Store nutrition data for a meal if available in recipe_data"""
-    try:
-        # Extract nutrition data from recipe
-        calories = recipe_data.get("calories")
-        macros = recipe_data.get("macros", {})
-        fiber = recipe_data.get("fiber")
-        sodium = recipe_data.get("sodium")
-        servings = recipe_data.get("servings", 1)
-        serving_size = recipe_data.get("serving_size")
-        
-        # Only store if we have at least calories or macros
-        if calories is not None or macros:
-            nutrition_query = """
-                INSERT INTO meal_nutrition (
-                    meal_id, user_id, calories, protein_g, carbohydrates_g, fat_g, 
-                    fiber_g, sodium_mg, servings, serving_size, source_type, ai_model_used
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            
-            cursor.execute(nutrition_query, (
-                meal_id,
-                user_id,
-                calories,
-                macros.get("protein"),
-                macros.get("carbs"),
-                macros.get("fat"), 
-                fiber,
-                sodium,
-                servings,
-                serving_size,
-                'ai_generated',
-                'gemini-1.5-flash-latest'
-            ))
-            
-            print(f"DEBUG: Stored nutrition for meal_id {meal_id}: {calories} calories")
-    except Exception as e:
-        print(f"ERROR: Failed to store nutrition for meal_id {meal_id}: {str(e)}")
-
-
 def categorize_ingredient(ingredient_name):
     """Simple ingredient categorization"""
-    name = ingredient_name.lower()
-
-    if any(word in name for word in ["apple", "banana", "orange", "lettuce", "tomato", "potato", "carrot", "onion"]):
-        return "Produce"
-    elif any(word in name for word in ["chicken", "beef", "pork", "fish", "meat"]):
-        return "Meat & Seafood"
-    elif any(word in name for word in ["milk", "cheese", "yogurt", "butter", "egg"]):
-        return "Dairy"
-    elif any(word in name for word in ["rice", "pasta", "bread", "flour"]):
-        return "Grains"
-    elif any(word in name for word in ["oil", "salt", "pepper", "spice"]):
-        return "Condiments"
-    else:
-        return "Other"
+    from src.services.item_classifier import SHOPPING_CLASSIFIER
+
+    return SHOPPING_CLASSIFIER.classify(ingredient_name).category
+
+
+def categorize_ingredients(ingredient_names):
+    """Categorize a list of ingredients in one pass; returns categories in input order"""
+    from src.services.item_classifier import SHOPPING_CLASSIFIER
+
+    return [classification.category for classification in SHOPPING_CLASSIFIER.classify_many(ingredient_names)]
 
 
 @meals_bp.route("/user/preferences", methods=["GET", "POST"])
@@ -1470,30 +1431,7 @@ def user_preferences():
     try:
         if request.method == "GET":
             # Get user preferences
-            preferences_query = """
-                SELECT preference_key, preference_value, data_type 
-                FROM user_preferences 
-                WHERE user_id = %s
-            """
-            cursor.execute(preferences_query, (user_id,))
-            preferences_data = cursor.fetchall()
-            
-            preferences = {}
-            for pref in preferences_data:
-                key = pref["preference_key"]
-                value = pref["preference_value"]
-                data_type = pref["data_type"]
-                
-                # Convert value based on data type
-                if data_type == "boolean":
-                    preferences[key] = value.lower() == "true"
-                elif data_type == "number":
-                    preferences[key] = float(value) if '.' in value else int(value)
-                elif data_type == "json":
-                    import json
-                    preferences[key] = json.loads(value)
-                else:
-                    preferences[key] = value
+            preferences = get_user_preferences(user_id)
             
             return jsonify({
                 "success": True,
@@ -1534,6 +1472,7 @@ def user_preferences():
                 cursor.execute(upsert_query, (user_id, key, value_str, data_type))
             
             db.commit()
+            invalidate_user_preferences(user_id)
             
             return jsonify({
                 "success": True,
@@ -1560,33 +1499,13 @@ def single_user_preference(preference_key):
     try:
         if request.method == "GET":
             # Get single preference
-            preference_query = """
-                SELECT preference_value, data_type 
-                FROM user_preferences 
-                WHERE user_id = %s AND preference_key = %s
-            """
-            cursor.execute(preference_query, (user_id, preference_key))
-            preference_data = cursor.fetchone()
+            preferences = get_user_preferences(user_id)
             
-            if preference_data:
-                value = preference_data["preference_value"]
-                data_type = preference_data["data_type"]
-                
-                # Convert value based on data type
-                if data_type == "boolean":
-                    converted_value = value.lower() == "true"
-                elif data_type == "number":
-                    converted_value = float(value) if '.' in value else int(value)
-                elif data_type == "json":
-                    import json
-                    converted_value = json.loads(value)
-                else:
-                    converted_value = value
-                
+            if preference_key in preferences:
                 return jsonify({
                     "success": True,
                     "preference_key": preference_key,
-                    "value": converted_value
+                    "value": preferences[preference_key]
                 })
             else:
                 # Return default values for known preferences
@@ -1640,6 +1559,7 @@ def single_user_preference(preference_key):
             cursor.execute(upsert_query, (user_id, preference_key, value_str, data_type))
             
             db.commit()
+            invalidate_user_preferences(user_id)
             
             return jsonify({
                 "success": True,
@@ -1674,17 +1594,15 @@ def advanced_meal_planning_chat():
         "conversation_history": data.get("conversation_history", [])
     }
     
+    consumed = 0
     try:
-        # Check subscription limits for advanced features
-        check_subscription_limit(user_id, 'ai_chat_requests')
+        # Claim a chat request from the subscription allowance up front
+        consumed = consume_usage(user_id, 'ai_chat_requests')
         
         # Generate response using AI
         response = generate_chat_response(message, context, user_id)
         
         if response:
-            # Increment usage counter
-            increment_usage(user_id, 'ai_chat_requests')
-            
             return jsonify({
                 "success": True,
                 "response": response["message"],
@@ -1693,6 +1611,7 @@ def advanced_meal_planning_chat():
                 "meal_plan_data": response.get("meal_plan_data")
             })
         else:
+            release_usage(user_id, 'ai_chat_requests', consumed)
             return jsonify({
                 "success": False, 
                 "message": "Sorry, I'm having trouble processing your request right now. Please try again."
@@ -1708,6 +1627,7 @@ def advanced_meal_planning_chat():
         }), 403
     except Exception as e:
         print(f"ERROR: Advanced meal planning chat failed: {str(e)}")
+        release_usage(user_id, 'ai_chat_requests', consumed)
         return jsonify({
             "success": False, 
             "message": "An error occurred while processing your request."
@@ -1720,12 +1640,17 @@ def generate_chat_response(message, context, user_id):
         # Build conversation prompt
         prompt = build_chat_prompt(message, context, user_id)
         
-        # Try Gemini first, then OpenAI fallback
-        response = gemini_chat_response(prompt)
-        if not response:
-            response = openai_chat_response(prompt)
+        # Race Gemini and OpenAI; the first valid response wins
+        from src.llm_hedging import hedged_call, remaining_time
         
-        return response
+        return hedged_call(
+            "chat",
+            {
+                "gemini": lambda deadline_at: gemini_chat_response(prompt, timeout=remaining_time(deadline_at)),
+                "openai": lambda deadline_at: openai_chat_response(prompt, timeout=remaining_time(deadline_at)),
+            },
+            validate=lambda result: bool(result),
+        )
         
     except Exception as e:
         print(f"ERROR: Chat response generation failed: {str(e)}")
@@ -1815,7 +1740,7 @@ def get_user_pantry_items(user_id):
         return []
 
 
-def gemini_chat_response(prompt):
+def gemini_chat_response(prompt, timeout=30):
     """Generate response using Gemini AI"""
     try:
         import requests
@@ -1837,7 +1762,7 @@ def gemini_chat_response(prompt):
             }
         }
         
-        response = requests.post(url, json=payload, timeout=30)
+        response = requests.post(url, json=payload, timeout=timeout)
         
         if response.status_code == 200:
             result = response.json()
@@ -1865,7 +1790,7 @@ def gemini_chat_response(prompt):
         return None
 
 
-def openai_chat_response(prompt):
+def openai_chat_response(prompt, timeout=30):
     """Generate response using OpenAI as fallback"""
     try:
         import requests
@@ -1891,7 +1816,7 @@ def openai_chat_response(prompt):
             "max_tokens": 1024
         }
         
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
+        response = requests.post(url, json=payload, headers=headers, timeout=timeout)
         
         if response.status_code == 200:
             result = response.json()
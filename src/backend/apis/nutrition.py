@@ -334,18 +334,86 @@ def get_nutrition_stats():
         return jsonify({"success": False, "message": "Not authenticated"})
 
     user_id = session["user_ID"]
-    
-    # This would be implemented when nutrition tracking is fully built out
-    # For now, return placeholder data
-    return jsonify({
-        "success": True,
-        "stats": {
-            "calories_today": 1650,
-            "protein_today": 120,
-            "carbs_today": 180,
-            "fat_today": 55,
-            "fiber_today": 20,
-            "sodium_today": 1800,
-            "goal_progress": 85
+    accessible_fields = get_accessible_nutrition_fields(user_id)
+    days = max(1, min(request.args.get("days", 7, type=int), 90))
+
+    from datetime import timedelta
+    from src.timezone_utils import get_user_current_date
+    from src.services.nutrition_summary import get_daily_summaries
+
+    today = get_user_current_date(user_id)
+    start_date = today - timedelta(days=days - 1)
+
+    db = get_db()
+    cursor = db.cursor()
+
+    try:
+        summaries = get_daily_summaries(cursor, user_id, start_date, today)
+        db.commit()
+
+        cursor.execute("""
+            SELECT daily_calories_goal FROM user_nutrition_goals
+            WHERE user_id = %s AND is_active = TRUE
+            ORDER BY updated_at DESC
+            LIMIT 1
+        """, (user_id,))
+        goals = cursor.fetchone()
+
+        fields = {
+            "calories": "total_calories",
+            "protein": "total_protein_g",
+            "carbs": "total_carbohydrates_g",
+            "fat": "total_fat_g",
+            "fiber": "total_fiber_g",
+            "sodium": "total_sodium_mg",
+        }
+
+        def visible_totals(summary):
+            return {
+                field: float(summary[column]) if accessible_fields[field] else None
+                for field, column in fields.items()
+            }
+
+        daily = []
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            summary = summaries[day]
+            entry = visible_totals(summary)
+            entry["date"] = day.strftime("%Y-%m-%d")
+            entry["meals_logged"] = summary["meals_logged"]
+            daily.append(entry)
+
+        # Averages over days with at least one completed meal
+        logged_days = [entry for entry in daily if entry["meals_logged"]]
+        averages = {
+            field: (round(sum(entry[field] for entry in logged_days) / len(logged_days), 1)
+                    if logged_days and accessible_fields[field] else None)
+            for field in fields
         }
-    })
\ No newline at end of file
+
+        today_totals = daily[-1]
+        calories_goal = float(goals["daily_calories_goal"]) if goals and goals["daily_calories_goal"] else None
+        goal_progress = round(today_totals["calories"] / calories_goal * 100) if calories_goal else None
+
+        return jsonify({
+            "success": True,
+            "stats": {
+                "calories_today": today_totals["calories"],
+                "protein_today": today_totals["protein"],
+                "carbs_today": today_totals["carbs"],
+                "fat_today": today_totals["fat"],
+                "fiber_today": today_totals["fiber"],
+                "sodium_today": today_totals["sodium"],
+                "goal_progress": goal_progress
+            },
+            "days": days,
+            "daily": daily,
+            "averages": averages,
+            "days_logged": len(logged_days)
+        })
+
+    except Exception as e:
+        db.rollback()
+        return jsonify({"success": False, "message": f"Failed to get nutrition stats: {str(e)}"})
+    finally:
+        cursor.close()
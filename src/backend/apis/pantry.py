@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify, session, current_app
 from src.database import get_db
-from src.subscription_utils import check_subscription_limit, SubscriptionLimitExceeded, increment_usage
+from src.subscription_utils import check_subscription_limit, SubscriptionLimitExceeded, consume_usage
 
 pantry_bp = Blueprint("pantry", __name__, url_prefix="/api")
 
@@ -243,10 +243,9 @@ def add_pantry_item():
                 except:
                     continue  # Skip duplicates (likely due to unique constraint)
         
+        # Claim the pantry item allowance in the same transaction
+        consume_usage(user_ID, 'pantry_items', cursor=cursor)
         db.commit()
-        
-        # Increment pantry items usage counter (for subscription limits)
-        increment_usage(user_ID, 'pantry_items')
 
         # Return the created item with tags
         cursor.execute("SELECT * FROM pantry_items WHERE pantry_item_id = %s", (item_id,))
@@ -274,6 +273,15 @@ def add_pantry_item():
             }
         )
 
+    except SubscriptionLimitExceeded as e:
+        db.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'limit_type': e.limit_type,
+            'current_limit': e.current_limit,
+            'requires_upgrade': True
+        }), 403
     except Exception as e:
         db.rollback()
         return jsonify(
@@ -330,7 +338,30 @@ def transfer_shopping_trip_to_pantry():
                 }
             )
 
-        # Create transfer session
+        # Get the original item details from cart_item table in one query
+        item_ids = [item_data.get("item_id") for item_data in items_data if item_data.get("item_id") is not None]
+        original_items = {}
+        if item_ids:
+            placeholders = ", ".join(["%s"] * len(item_ids))
+            item_query = f"SELECT * FROM cart_item WHERE item_ID IN ({placeholders}) AND cart_ID = %s"
+            cursor.execute(item_query, item_ids + [cart_id])
+            original_items = {row["item_ID"]: row for row in cursor.fetchall()}
+
+        # Predict expiry for every item that asked for it with a single batch call
+        to_predict = []
+        for item_data in items_data:
+            original_item = original_items.get(item_data.get("item_id"))
+            if (
+                original_item
+                and original_item["item_name"]
+                and item_data.get("ai_predict_expiry", False)
+                and not item_data.get("expiration_date")
+            ):
+                to_predict.append((original_item["item_name"], item_data.get("storage_type", "pantry")))
+        predictions = predict_expiration_and_category_batch(to_predict) if to_predict else {}
+
+        # Create the transfer session only now, so no row locks are held while the
+        # model answers
         session_query = """
             INSERT INTO pantry_transfer_sessions (user_id, cart_id, items_transferred)
             VALUES (%s, %s, %s)
@@ -342,11 +373,7 @@ def transfer_shopping_trip_to_pantry():
         items_added = 0
         for item_data in items_data:
             item_id = item_data.get("item_id")
-
-            # Get the original item details from cart_item table
-            item_query = "SELECT * FROM cart_item WHERE item_ID = %s AND cart_ID = %s"
-            cursor.execute(item_query, (item_id, cart_id))
-            original_item = cursor.fetchone()
+            original_item = original_items.get(item_id)
 
             if not original_item:
                 print(f"DEBUG: Item {item_id} not found in cart {cart_id}")
@@ -375,7 +402,7 @@ def transfer_shopping_trip_to_pantry():
             is_ai_predicted = False
             predicted_category = None
             if use_ai_prediction and not expiration_date:
-                prediction_result = predict_expiration_and_category(item_name, storage_type)
+                prediction_result = predictions.get((item_name.lower(), storage_type))
                 if prediction_result:
                     expiration_date = prediction_result.get('expiration_date')
                     predicted_category = prediction_result.get('category')
@@ -439,103 +466,324 @@ def predict_expiration_date(item_name, storage_type):
 
 def predict_expiration_and_category(item_name, storage_type):
     """Predict expiration date and category using AI or cached predictions"""
-    db = get_db()
-    cursor = db.cursor()
+    from datetime import datetime, timedelta
+    from src.services.expiry_cache import expiry_prediction_cache, make_key
 
-    try:
-        # First check if we have a cached prediction
-        cache_query = """
-            SELECT predicted_days FROM expiry_predictions 
-            WHERE item_name = %s AND storage_type = %s
-        """
-        cursor.execute(cache_query, (item_name.lower(), storage_type))
-        cached = cursor.fetchone()
+    key = make_key(item_name, storage_type)
 
-        if cached:
-            # Update usage count
-            cursor.execute(
-                """
-                UPDATE expiry_predictions 
-                SET used_count = used_count + 1 
+    # In-process cache first, then the shared expiry_predictions table
+    predicted_days = expiry_prediction_cache.get(key)
+    if predicted_days is None:
+        db = get_db()
+        cursor = db.cursor()
+        try:
+            cache_query = """
+                SELECT predicted_days FROM expiry_predictions 
                 WHERE item_name = %s AND storage_type = %s
-            """,
-                (item_name.lower(), storage_type),
-            )
+            """
+            cursor.execute(cache_query, key)
+            cached = cursor.fetchone()
+        except Exception as e:
+            print(f"Error predicting expiration and category: {str(e)}")
+            return None
+        finally:
+            cursor.close()
 
-            # Calculate expiration date
-            from datetime import datetime, timedelta
+        if cached:
+            predicted_days = cached["predicted_days"]
+            expiry_prediction_cache.set(key, predicted_days)
 
-            expiry_date = datetime.now().date() + timedelta(
-                days=cached["predicted_days"]
-            )
-            cursor.close()
-            
-            # For cached predictions, predict category using simple heuristics
-            predicted_category = get_simple_category_prediction(item_name)
-            
-            return {
-                'expiration_date': expiry_date.strftime("%Y-%m-%d"),
-                'category': predicted_category
-            }
+    if predicted_days is not None:
+        # Usage counts are buffered and flushed in batches
+        expiry_prediction_cache.record_use(key)
 
-        # Use Gemini AI to predict expiration and category
-        prediction_result = get_gemini_prediction_with_category(item_name, storage_type)
+        expiry_date = datetime.now().date() + timedelta(days=predicted_days)
+        
+        # For cached predictions, predict category using simple heuristics
+        predicted_category = get_simple_category_prediction(item_name)
+        
+        return {
+            'expiration_date': expiry_date.strftime("%Y-%m-%d"),
+            'category': predicted_category
+        }
+
+    try:
+        # Use Gemini AI to predict expiration and category; concurrent misses for the
+        # same item share one provider call
+        prediction_result, is_leader = expiry_prediction_cache.coalesce(
+            key, lambda: get_gemini_prediction_with_category(item_name, storage_type)
+        )
 
         if prediction_result and prediction_result.get('days'):
             predicted_days = prediction_result['days']
             predicted_category = prediction_result.get('category', 'Other')
             
-            # Cache the prediction
-            cursor.execute(
-                """
-                INSERT INTO expiry_predictions (item_name, storage_type, predicted_days)
-                VALUES (%s, %s, %s)
-                ON DUPLICATE KEY UPDATE 
-                used_count = used_count + 1, 
-                predicted_days = VALUES(predicted_days)
-            """,
-                (item_name.lower(), storage_type, predicted_days),
-            )
+            if is_leader:
+                # Cache the prediction
+                db = get_db()
+                cursor = db.cursor()
+                try:
+                    cursor.execute(
+                        """
+                        INSERT INTO expiry_predictions (item_name, storage_type, predicted_days)
+                        VALUES (%s, %s, %s)
+                        ON DUPLICATE KEY UPDATE 
+                        used_count = used_count + 1, 
+                        predicted_days = VALUES(predicted_days)
+                    """,
+                        (key[0], storage_type, predicted_days),
+                    )
+                finally:
+                    cursor.close()
+                expiry_prediction_cache.set(key, predicted_days)
+            else:
+                expiry_prediction_cache.record_use(key)
 
             # Calculate expiration date
-            from datetime import datetime, timedelta
-
             expiry_date = datetime.now().date() + timedelta(days=predicted_days)
-            cursor.close()
             
             return {
                 'expiration_date': expiry_date.strftime("%Y-%m-%d"),
                 'category': predicted_category
             }
 
-        cursor.close()
         return None
 
     except Exception as e:
         print(f"Error predicting expiration and category: {str(e)}")
+        return None
+
+
+def predict_expiration_and_category_batch(items):
+    """
+    Predict expiration dates and categories for many items at once.
+
+    Cached predictions are resolved with one query, all misses go to the model in a
+    single structured prompt per chunk, and new predictions are written back with one
+    upsert. Items the model omits fall back to the simple heuristics.
+
+    Args:
+        items: Iterable of (item_name, storage_type) tuples
+
+    Returns:
+        Dict mapping (item_name.lower(), storage_type) to
+        {'expiration_date': 'YYYY-MM-DD', 'category': str}
+    """
+    from datetime import datetime, timedelta
+    from src.services.expiry_cache import expiry_prediction_cache, make_key
+    from src.services.item_classifier import PANTRY_CLASSIFIER, predict_shelf_life_many
+
+    keys = list(dict.fromkeys(make_key(name, storage_type) for name, storage_type in items if name))
+    if not keys:
+        return {}
+
+    db = get_db()
+    cursor = db.cursor()
+    predicted_days = expiry_prediction_cache.get_many(keys)
+    categories = {}
+
+    try:
+        # Resolve remaining cached predictions in one query
+        unresolved = [key for key in keys if key not in predicted_days]
+        if unresolved:
+            placeholders = ", ".join(["(%s, %s)"] * len(unresolved))
+            params = [value for key in unresolved for value in key]
+            cursor.execute(f"""
+                SELECT item_name, storage_type, predicted_days FROM expiry_predictions
+                WHERE (item_name, storage_type) IN ({placeholders})
+            """, params)
+            from_db = {
+                (row["item_name"].lower(), row["storage_type"]): row["predicted_days"]
+                for row in cursor.fetchall()
+            }
+            expiry_prediction_cache.set_many(from_db)
+            predicted_days.update(from_db)
+        cached_keys = list(predicted_days)
+
+        # Categories for cached predictions come from the keyword classifier
+        for key, classification in zip(cached_keys, PANTRY_CLASSIFIER.classify_many(key[0] for key in cached_keys)):
+            categories[key] = classification.category
+
+        # Usage counts are buffered and flushed in batches
+        expiry_prediction_cache.record_uses({key: 1 for key in cached_keys})
+
+        # Ask the model about every miss at once
+        misses = [key for key in keys if key not in predicted_days]
+        ai_predictions = get_batch_ai_predictions(misses) if misses else {}
+
+        if ai_predictions:
+            rows = [(key[0], key[1], prediction["days"]) for key, prediction in ai_predictions.items()]
+            placeholders = ", ".join(["(%s, %s, %s)"] * len(rows))
+            cursor.execute(f"""
+                INSERT INTO expiry_predictions (item_name, storage_type, predicted_days)
+                VALUES {placeholders}
+                ON DUPLICATE KEY UPDATE 
+                used_count = used_count + 1, 
+                predicted_days = VALUES(predicted_days)
+            """, [value for row in rows for value in row])
+            expiry_prediction_cache.set_many({key: prediction["days"] for key, prediction in ai_predictions.items()})
+
+        # Only items the model omitted use the heuristics (and are not cached)
+        omitted = [key for key in misses if key not in ai_predictions]
+        heuristics = dict(zip(omitted, predict_shelf_life_many(omitted)))
+        for key in misses:
+            prediction = ai_predictions.get(key) or heuristics[key]
+            predicted_days[key] = prediction["days"]
+            categories[key] = prediction.get("category", "Other")
+
+    except Exception as e:
+        print(f"Error predicting expiration and category in batch: {str(e)}")
+        remaining = [key for key in keys if key not in predicted_days]
+        for key, prediction in zip(remaining, predict_shelf_life_many(remaining)):
+            predicted_days[key] = prediction["days"]
+            categories[key] = prediction["category"]
+        # Predictions served from memory before the failure still need a category
+        uncategorized = [key for key in predicted_days if key not in categories]
+        for key, classification in zip(uncategorized, PANTRY_CLASSIFIER.classify_many(key[0] for key in uncategorized)):
+            categories[key] = classification.category
+    finally:
         cursor.close()
+
+    today = datetime.now().date()
+    return {
+        key: {
+            'expiration_date': (today + timedelta(days=int(predicted_days[key]))).strftime("%Y-%m-%d"),
+            'category': categories[key]
+        }
+        for key in keys
+    }
+
+
+def get_batch_ai_predictions(keys, chunk_size=None):
+    """
+    Ask the model for expiration days and categories of many (item_name, storage_type)
+    pairs, one structured prompt per chunk.
+
+    Returns:
+        Dict mapping each key the model answered validly to {'days': int, 'category': str}
+    """
+    from src.llm_hedging import hedged_call, remaining_time
+    from src.openai_utils import openai_batch_expiry_prediction
+
+    chunk_size = chunk_size or current_app.config.get("EXPIRY_BATCH_SIZE", 40)
+    predictions = {}
+
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        prompt = _build_batch_expiry_prompt(chunk)
+
+        raw = hedged_call(
+            "expiry_batch",
+            {
+                "gemini": lambda deadline_at, prompt=prompt: _gemini_batch_expiry_prediction(prompt, timeout=remaining_time(deadline_at)),
+                "openai": lambda deadline_at, prompt=prompt: openai_batch_expiry_prediction(prompt, timeout=remaining_time(deadline_at)),
+            },
+            validate=lambda result: isinstance(result, list) and len(result) > 0,
+        )
+
+        for entry in raw or []:
+            try:
+                index = int(entry["index"])
+                days = int(entry["days"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= index < len(chunk) or not 1 <= days <= 3650:
+                continue
+            predictions[chunk[index]] = {"days": days, "category": entry.get("category") or "Other"}
+
+    return predictions
+
+
+def _build_batch_expiry_prompt(keys):
+    """Structured prompt asking for one prediction per numbered item"""
+    items_text = "\n".join(
+        f"{index}. {item_name} (storage: {storage_type})"
+        for index, (item_name, storage_type) in enumerate(keys)
+    )
+    return f"""You are a food safety expert. For each numbered food item below, estimate how many days it will last from today in the given storage, and its category.
+
+Items:
+{items_text}
+
+Available categories: Produce, Meat, Dairy, Grains, Canned Goods, Frozen Foods, Beverages, Snacks, Condiments, Spices, Bread, Other, Fresh Herbs, Oils & Vinegars, Baking Supplies
+
+Important instructions:
+- Respond with ONLY a JSON array, one object per item, in this exact format: [{{"index": NUMBER, "days": NUMBER, "category": "CATEGORY_NAME"}}]
+- Use the item numbers above as "index"
+- Use conservative estimates for food safety
+- For pantry items, assume they are in a cool, dry place
+- For fridge items, assume proper refrigeration (35-40°F)
+- For freezer items, assume proper freezing (0°F or below)
+
+Example: [{{"index": 0, "days": 7, "category": "Dairy"}}, {{"index": 1, "days": 5, "category": "Bread"}}]
+
+Respond only with the JSON array:"""
+
+
+def _gemini_batch_expiry_prediction(prompt, timeout=None):
+    """Ask Gemini for a batch of predictions; returns the parsed JSON list or None"""
+    import os
+    import json
+    import google.generativeai as genai
+
+    try:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            return None
+
+        genai.configure(api_key=api_key)
+        model = genai.GenerativeModel("gemini-1.5-flash-latest")
+
+        request_options = {"timeout": timeout} if timeout is not None else None
+        response = model.generate_content(prompt, request_options=request_options)
+        response_text = response.text.strip()
+
+        # Extract the JSON array from the response
+        json_start = response_text.find("[")
+        json_end = response_text.rfind("]")
+        if json_start == -1 or json_end == -1:
+            print(f"WARNING: No JSON array found in Gemini batch response: {response_text}")
+            return None
+
+        result = json.loads(response_text[json_start:json_end + 1])
+        return result if isinstance(result, list) else None
+
+    except Exception as e:
+        print(f"ERROR: Gemini batch prediction failed: {str(e)}")
         return None
 
 
 def get_gemini_prediction_with_category(item_name, storage_type):
-    """Use Gemini AI to predict expiration date and category based on item and storage type, with OpenAI fallback"""
+    """Use Gemini AI to predict expiration date and category based on item and storage type, hedged with OpenAI"""
+    from src.llm_hedging import hedged_call, remaining_time
+    from src.openai_utils import openai_expiry_prediction
+
+    result = hedged_call(
+        "expiry",
+        {
+            "gemini": lambda deadline_at: _gemini_expiry_prediction(item_name, storage_type, timeout=remaining_time(deadline_at)),
+            "openai": lambda deadline_at: openai_expiry_prediction(item_name, storage_type, timeout=remaining_time(deadline_at)),
+        },
+        validate=lambda result: bool(result) and bool(result.get('days')),
+    )
+    if result:
+        return result
+
+    print(f"WARNING: No AI prediction for {item_name}, using simple prediction")
+    return get_simple_prediction_with_category(item_name, storage_type)
+
+
+def _gemini_expiry_prediction(item_name, storage_type, timeout=None):
+    """Ask Gemini for expiration days and category; returns None when unavailable or invalid"""
     import os
     import google.generativeai as genai
-    from src.openai_utils import openai_expiry_prediction
 
     try:
         # Configure Gemini with API key from environment
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
-            print(
-                "WARNING: GEMINI_API_KEY not found in environment, trying OpenAI fallback"
-            )
-            # Try OpenAI fallback
-            openai_result = openai_expiry_prediction(item_name, storage_type)
-            if openai_result:
-                print(f"DEBUG: OpenAI fallback successful for {item_name}")
-                return openai_result
-            return get_simple_prediction_with_category(item_name, storage_type)
+            print("WARNING: GEMINI_API_KEY not found in environment, relying on OpenAI")
+            return None
 
         genai.configure(api_key=api_key)
         model = genai.GenerativeModel("gemini-1.5-flash-latest")
@@ -568,7 +816,8 @@ Examples:
 Respond only with the JSON object:"""
 
         # Generate prediction
-        response = model.generate_content(prompt)
+        request_options = {"timeout": timeout} if timeout is not None else None
+        response = model.generate_content(prompt, request_options=request_options)
         prediction_text = response.text.strip()
 
         # Log the actual response for debugging
@@ -591,29 +840,17 @@ Respond only with the JSON object:"""
                 # Validate the prediction (sanity check)
                 if 1 <= days <= 3650:  # Between 1 day and 10 years
                     return {'days': days, 'category': category}
-                else:
-                    print(
-                        f"WARNING: Gemini prediction {days} days seems unrealistic, falling back"
-                    )
-                    return get_simple_prediction_with_category(item_name, storage_type)
+                print(f"WARNING: Gemini prediction {days} days seems unrealistic")
+                return None
             except json.JSONDecodeError:
                 print(f"WARNING: Could not parse JSON from Gemini response: {prediction_text}")
-                return get_simple_prediction_with_category(item_name, storage_type)
-        else:
-            print(f"WARNING: No JSON found in Gemini response: {prediction_text}")
-            return get_simple_prediction_with_category(item_name, storage_type)
+                return None
+        print(f"WARNING: No JSON found in Gemini response: {prediction_text}")
+        return None
 
     except Exception as e:
-        print(
-            f"ERROR: Gemini prediction failed: {str(e)}, trying OpenAI fallback"
-        )
-        # Try OpenAI fallback
-        openai_result = openai_expiry_prediction(item_name, storage_type)
-        if openai_result:
-            print(f"DEBUG: OpenAI fallback successful for {item_name} after Gemini failure")
-            return openai_result
-        print("WARNING: OpenAI fallback also failed, using simple prediction")
-        return get_simple_prediction_with_category(item_name, storage_type)
+        print(f"ERROR: Gemini prediction failed: {str(e)}")
+        return None
 
 
 def get_gemini_prediction(item_name, storage_type):
@@ -709,82 +946,16 @@ Just respond with the number of days:"""
 
 def get_simple_prediction_with_category(item_name, storage_type):
     """Simple heuristic-based expiration and category prediction"""
-    item_lower = item_name.lower()
-
-    # Storage-based multipliers
-    storage_multiplier = {"freezer": 30, "fridge": 1, "pantry": 1}
-
-    # Item category predictions (base days for fridge)
-    if any(word in item_lower for word in ["milk", "dairy", "yogurt", "cheese", "butter", "cream"]):
-        return {"days": 14 * storage_multiplier.get(storage_type, 1), "category": "Dairy"}
-    elif any(word in item_lower for word in ["meat", "chicken", "beef", "pork", "fish", "turkey", "lamb"]):
-        return {"days": 3 * storage_multiplier.get(storage_type, 1), "category": "Meat"}
-    elif any(word in item_lower for word in ["bread", "bagel", "muffin", "baguette", "roll"]):
-        return {"days": 5 * storage_multiplier.get(storage_type, 1), "category": "Bread"}
-    elif any(word in item_lower for word in ["apple", "banana", "orange", "fruit", "vegetable", "lettuce", "carrot", "tomato", "onion", "potato"]):
-        return {"days": 7 * storage_multiplier.get(storage_type, 1), "category": "Produce"}
-    elif any(word in item_lower for word in ["rice", "pasta", "grain", "cereal", "oats", "quinoa", "barley"]):
-        return {"days": 365 * storage_multiplier.get(storage_type, 1), "category": "Grains"}
-    elif any(word in item_lower for word in ["canned", "can", "jar"]):
-        return {"days": 730 * storage_multiplier.get(storage_type, 1), "category": "Canned Goods"}
-    elif any(word in item_lower for word in ["frozen", "ice cream"]):
-        return {"days": 90 * storage_multiplier.get(storage_type, 1), "category": "Frozen Foods"}
-    elif any(word in item_lower for word in ["juice", "soda", "water", "beer", "wine", "coffee", "tea"]):
-        return {"days": 30 * storage_multiplier.get(storage_type, 1), "category": "Beverages"}
-    elif any(word in item_lower for word in ["chips", "crackers", "cookies", "candy", "chocolate"]):
-        return {"days": 60 * storage_multiplier.get(storage_type, 1), "category": "Snacks"}
-    elif any(word in item_lower for word in ["ketchup", "mustard", "mayo", "sauce", "dressing", "vinegar"]):
-        return {"days": 180 * storage_multiplier.get(storage_type, 1), "category": "Condiments"}
-    elif any(word in item_lower for word in ["salt", "pepper", "spice", "herb", "oregano", "basil", "thyme"]):
-        return {"days": 1095 * storage_multiplier.get(storage_type, 1), "category": "Spices"}
-    elif any(word in item_lower for word in ["parsley", "cilantro", "mint", "dill", "chives"]):
-        return {"days": 7 * storage_multiplier.get(storage_type, 1), "category": "Fresh Herbs"}
-    elif any(word in item_lower for word in ["oil", "olive oil", "coconut oil", "vinegar", "balsamic"]):
-        return {"days": 365 * storage_multiplier.get(storage_type, 1), "category": "Oils & Vinegars"}
-    elif any(word in item_lower for word in ["flour", "sugar", "baking powder", "baking soda", "vanilla", "cocoa"]):
-        return {"days": 730 * storage_multiplier.get(storage_type, 1), "category": "Baking Supplies"}
-    else:
-        # Default prediction
-        base_days = (
-            30 if storage_type == "pantry" else 14 if storage_type == "fridge" else 90
-        )
-        return {"days": base_days, "category": "Other"}
+    from src.services.item_classifier import predict_shelf_life
+
+    return predict_shelf_life(item_name, storage_type)
 
 
 def get_simple_category_prediction(item_name):
     """Simple heuristic-based category prediction"""
-    item_lower = item_name.lower()
-    
-    if any(word in item_lower for word in ["milk", "dairy", "yogurt", "cheese", "butter", "cream"]):
-        return "Dairy"
-    elif any(word in item_lower for word in ["meat", "chicken", "beef", "pork", "fish", "turkey", "lamb"]):
-        return "Meat"
-    elif any(word in item_lower for word in ["bread", "bagel", "muffin", "baguette", "roll"]):
-        return "Bread"
-    elif any(word in item_lower for word in ["apple", "banana", "orange", "fruit", "vegetable", "lettuce", "carrot", "tomato", "onion", "potato"]):
-        return "Produce"
-    elif any(word in item_lower for word in ["rice", "pasta", "grain", "cereal", "oats", "quinoa", "barley"]):
-        return "Grains"
-    elif any(word in item_lower for word in ["canned", "can", "jar"]):
-        return "Canned Goods"
-    elif any(word in item_lower for word in ["frozen", "ice cream"]):
-        return "Frozen Foods"
-    elif any(word in item_lower for word in ["juice", "soda", "water", "beer", "wine", "coffee", "tea"]):
-        return "Beverages"
-    elif any(word in item_lower for word in ["chips", "crackers", "cookies", "candy", "chocolate"]):
-        return "Snacks"
-    elif any(word in item_lower for word in ["ketchup", "mustard", "mayo", "sauce", "dressing", "vinegar"]):
-        return "Condiments"
-    elif any(word in item_lower for word in ["salt", "pepper", "spice", "herb", "oregano", "basil", "thyme"]):
-        return "Spices"
-    elif any(word in item_lower for word in ["parsley", "cilantro", "mint", "dill", "chives"]):
-        return "Fresh Herbs"
-    elif any(word in item_lower for word in ["oil", "olive oil", "coconut oil", "vinegar", "balsamic"]):
-        return "Oils & Vinegars"
-    elif any(word in item_lower for word in ["flour", "sugar", "baking powder", "baking soda", "vanilla", "cocoa"]):
-        return "Baking Supplies"
-    else:
-        return "Other"
+    from src.services.item_classifier import PANTRY_CLASSIFIER
+
+    return PANTRY_CLASSIFIER.classify(item_name).category
 
 
 def get_simple_prediction(item_name, storage_type):
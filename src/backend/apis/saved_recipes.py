@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify, session
 from src.database import get_db
 from src.timezone_utils import get_user_current_date
-from src.subscription_utils import check_subscription_limit, SubscriptionLimitExceeded, increment_usage
+from src.subscription_utils import check_subscription_limit, SubscriptionLimitExceeded, consume_usage
 import json
 from datetime import datetime, date
 
@@ -344,11 +344,10 @@ def save_recipe_from_meal(meal_id):
                     ingredient["estimated_cost"]
                 ))
         
+        # Claim the saved recipe allowance in the same transaction
+        consume_usage(user_id, 'saved_recipes', cursor=cursor)
         db.commit()
         
-        # Increment saved recipes usage counter (for subscription limits)
-        increment_usage(user_id, 'saved_recipes')
-        
         return jsonify({
             "success": True,
             "message": f"Recipe '{recipe_name}' saved successfully",
@@ -356,6 +355,15 @@ def save_recipe_from_meal(meal_id):
             "recipe_name": recipe_name
         })
     
+    except SubscriptionLimitExceeded as e:
+        db.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'limit_type': e.limit_type,
+            'current_limit': e.current_limit,
+            'requires_upgrade': True
+        }), 403
     except Exception as e:
         db.rollback()
         return jsonify({"success": False, "message": f"Failed to save recipe: {str(e)}"})
@@ -454,17 +462,25 @@ def create_saved_recipe():
                 ingredient.get("estimated_cost")
             ))
         
+        # Claim the saved recipe allowance in the same transaction
+        consume_usage(user_id, 'saved_recipes', cursor=cursor)
         db.commit()
         
-        # Increment saved recipes usage counter (for subscription limits)
-        increment_usage(user_id, 'saved_recipes')
-        
         return jsonify({
             "success": True,
             "message": f"Recipe '{data['recipe_name']}' created successfully",
             "saved_recipe_id": saved_recipe_id
         })
     
+    except SubscriptionLimitExceeded as e:
+        db.rollback()
+        return jsonify({
+            'success': False,
+            'message': str(e),
+            'limit_type': e.limit_type,
+            'current_limit': e.current_limit,
+            'requires_upgrade': True
+        }), 403
     except Exception as e:
         db.rollback()
         return jsonify({"success": False, "message": f"Failed to create recipe: {str(e)}"})
@@ -676,6 +692,10 @@ def use_saved_recipe(recipe_id):
             ))
             meal_id = cursor.lastrowid
         
+        # Keep the day's nutrition summary in step with the new or replaced meal
+        from src.services.nutrition_summary import refresh_daily_summaries
+        refresh_daily_summaries(cursor, user_id, [meal_date])
+        
         # Log recipe usage
         usage_log_query = """
             INSERT INTO recipe_usage_log (
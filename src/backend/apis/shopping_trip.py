@@ -2,10 +2,20 @@ from flask import Blueprint, request, jsonify, session, current_app
 import requests
 from src.database import get_db
 from src import helper
+from src.services.spend_rollup import refresh_cart_spend
 
 shopping_trip_bp = Blueprint("shopping_trip", __name__, url_prefix="/api")
 
 
+def adjust_cart_totals(cursor, cart_id, item_delta, spent_delta):
+    """Apply an item change to the stored shopping_cart.item_count and total_spent"""
+    cursor.execute("""
+        UPDATE shopping_cart
+        SET item_count = item_count + %s, total_spent = total_spent + %s
+        WHERE cart_ID = %s
+    """, (item_delta, spent_delta, cart_id))
+
+
 @shopping_trip_bp.route("/shopping-trip/add-item", methods=["POST"])
 def add_item():
     if "user_ID" not in session or "cart_ID" not in session:
@@ -41,6 +51,7 @@ def add_item():
             ),
         )
         cart_item_id = cursor.lastrowid
+        adjust_cart_totals(cursor, session["cart_ID"], 1, float(price) * int(data["quantity"]))
         
         # Check if this item matches any shopping list item and link if requested
         list_item_id = data.get("list_item_id")
@@ -62,6 +73,7 @@ def add_item():
             """
             cursor.execute(update_list_item_query, (session["cart_ID"], list_item_id))
 
+        refresh_cart_spend(cursor, session["cart_ID"])
         db.commit()
 
         query = "SELECT * FROM cart_item WHERE cart_ID = %s"
@@ -88,7 +100,7 @@ def remove_last_item():
 
     try:
         # Get the most recently added item
-        query = "SELECT item_ID FROM cart_item WHERE cart_ID = %s ORDER BY item_ID DESC LIMIT 1"
+        query = "SELECT item_ID, price, quantity FROM cart_item WHERE cart_ID = %s ORDER BY item_ID DESC LIMIT 1 FOR UPDATE"
         cursor.execute(query, (session["cart_ID"],))
         last_item = cursor.fetchone()
 
@@ -104,6 +116,8 @@ def remove_last_item():
             # Delete the item
             delete_query = "DELETE FROM cart_item WHERE item_ID = %s"
             cursor.execute(delete_query, (last_item["item_ID"],))
+            adjust_cart_totals(cursor, session["cart_ID"], -1, -float(last_item["price"] or 0) * last_item["quantity"])
+            refresh_cart_spend(cursor, session["cart_ID"])
             db.commit()
 
             # Return updated cart items
@@ -148,14 +162,17 @@ def update_item_quantity():
 
     try:
         # Verify the item belongs to the current user's cart
-        verify_query = "SELECT item_ID FROM cart_item WHERE item_ID = %s AND cart_ID = %s AND user_ID = %s"
+        verify_query = "SELECT item_ID, price, quantity FROM cart_item WHERE item_ID = %s AND cart_ID = %s AND user_ID = %s FOR UPDATE"
         cursor.execute(verify_query, (item_id, session["cart_ID"], session["user_ID"]))
-        if not cursor.fetchone():
+        item = cursor.fetchone()
+        if not item:
             return jsonify({"error": "Item not found"}), 404
 
         # Update the quantity
         update_query = "UPDATE cart_item SET quantity = %s WHERE item_ID = %s"
         cursor.execute(update_query, (quantity, item_id))
+        adjust_cart_totals(cursor, session["cart_ID"], 0, float(item["price"] or 0) * (quantity - item["quantity"]))
+        refresh_cart_spend(cursor, session["cart_ID"])
         db.commit()
 
         # Return updated cart items
@@ -209,9 +226,10 @@ def delete_item():
 
     try:
         # Verify the item belongs to the current user's cart
-        verify_query = "SELECT item_ID FROM cart_item WHERE item_ID = %s AND cart_ID = %s AND user_ID = %s"
+        verify_query = "SELECT item_ID, price, quantity FROM cart_item WHERE item_ID = %s AND cart_ID = %s AND user_ID = %s FOR UPDATE"
         cursor.execute(verify_query, (item_id, session["cart_ID"], session["user_ID"]))
-        if not cursor.fetchone():
+        item = cursor.fetchone()
+        if not item:
             return jsonify({"error": "Item not found"}), 404
 
         # Update shopping list mapping if this item was linked
@@ -225,6 +243,8 @@ def delete_item():
         # Delete the item
         delete_query = "DELETE FROM cart_item WHERE item_ID = %s"
         cursor.execute(delete_query, (item_id,))
+        adjust_cart_totals(cursor, session["cart_ID"], -1, -float(item["price"] or 0) * item["quantity"])
+        refresh_cart_spend(cursor, session["cart_ID"])
         db.commit()
 
         # Return updated cart items
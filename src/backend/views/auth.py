@@ -5,6 +5,7 @@ from src.database import get_db
 from src.logging_config import get_logger
 from src.auth_utils import AuthUtils, jwt_required
 from src.subscription_utils import get_user_limits_status
+from src.services.user_preferences import get_user_preferences as load_user_preferences, invalidate_user_preferences
 
 auth_bp = Blueprint("auth", __name__)
 logger = get_logger("preppr.auth")
@@ -1121,45 +1122,15 @@ def get_user_preferences():
         return jsonify({"success": False, "message": "Not authenticated"}), 401
     
     user_id = session["user_ID"]
-    db = get_db()
-    cursor = db.cursor()
     
     try:
-        # Get all preferences for the user
-        query = """
-            SELECT preference_key, preference_value, data_type 
-            FROM user_preferences 
-            WHERE user_id = %s
-        """
-        cursor.execute(query, (user_id,))
-        preferences_raw = cursor.fetchall()
-        
-        # Convert to a dictionary
-        preferences = {}
-        for pref in preferences_raw:
-            key = pref["preference_key"]
-            value = pref["preference_value"]
-            data_type = pref["data_type"]
-            
-            # Convert value based on data type
-            if data_type == "boolean":
-                preferences[key] = value.lower() == "true"
-            elif data_type == "number":
-                preferences[key] = float(value) if '.' in value else int(value)
-            elif data_type == "json":
-                import json
-                preferences[key] = json.loads(value)
-            else:
-                preferences[key] = value
-        
-        cursor.close()
+        preferences = load_user_preferences(user_id)
         return jsonify({
             "success": True,
             "preferences": preferences
         })
         
     except Exception as e:
-        cursor.close()
         logger.error(f"Error getting user preferences: {e}")
         return jsonify({"success": False, "message": "Failed to get preferences"}), 500
 
@@ -1210,6 +1181,7 @@ def save_user_preferences():
         
         db.commit()
         cursor.close()
+        invalidate_user_preferences(user_id)
         
         logger.info(f"User preferences saved for user {user_id}")
         
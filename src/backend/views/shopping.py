@@ -1,46 +1,79 @@
-from flask import Blueprint, render_template, request, session, url_for, redirect, flash, jsonify
+import csv
+import io
+import json
+from datetime import datetime
+
+import pymysql.cursors
+from flask import Blueprint, render_template, request, session, url_for, redirect, flash, jsonify, Response, stream_with_context
 from src.database import get_db
+from src.services.user_preferences import get_user_preferences
+
+HISTORY_PAGE_SIZE = 15
+MAX_HISTORY_PAGE_SIZE = 100
+HISTORY_EXPORT_COLUMNS = ["cart_ID", "store_name", "created_at", "total_items", "total_spent"]
 
 
 def get_user_preference(user_id, preference_key, default_value=None):
-    """Get a user preference value"""
-    db = get_db()
-    cursor = db.cursor()
-    
+    """Get a user preference value from the user's preference snapshot"""
     try:
-        query = """
-            SELECT preference_value, data_type 
-            FROM user_preferences 
-            WHERE user_id = %s AND preference_key = %s
-        """
-        cursor.execute(query, (user_id, preference_key))
-        result = cursor.fetchone()
-        
-        if result:
-            value = result["preference_value"]
-            data_type = result["data_type"]
-            
-            # Convert value based on data type
-            if data_type == "boolean":
-                return value.lower() == "true"
-            elif data_type == "number":
-                return float(value) if '.' in value else int(value)
-            elif data_type == "json":
-                import json
-                return json.loads(value)
-            else:
-                return value
-        else:
-            return default_value
+        return get_user_preferences(user_id).get(preference_key, default_value)
     except Exception as e:
         print(f"Error getting user preference {preference_key}: {e}")
         return default_value
-    finally:
-        cursor.close()
+
 
 shopping_bp = Blueprint("shopping", __name__)
 
 
+def encode_history_cursor(cart):
+    """Keyset cursor for the history row after which the next page starts"""
+    return f"{cart['created_at'].strftime('%Y-%m-%dT%H:%M:%S')}_{cart['cart_ID']}"
+
+
+def decode_history_cursor(token):
+    """(created_at, cart_ID) of a history cursor; raises ValueError when malformed"""
+    created_at, cart_ID = token.rsplit("_", 1)
+    return datetime.strptime(created_at, "%Y-%m-%dT%H:%M:%S"), int(cart_ID)
+
+
+def get_history_page(cursor, user_ID, limit, after=None):
+    """
+    One page of purchased carts, newest first, keyset-paginated on (created_at, cart_ID).
+
+    The (user_ID, status, created_at) index also carries the cart_ID primary key,
+    so each page is an index range scan no matter how deep the user has paged.
+
+    Returns:
+        (carts, next_cursor) - next_cursor is None on the last page
+    """
+    params = [user_ID]
+    keyset = ""
+    if after:
+        created_at, cart_ID = after
+        keyset = "AND (c.created_at < %s OR (c.created_at = %s AND c.cart_ID < %s))"
+        params += [created_at, created_at, cart_ID]
+
+    # Fetch one extra row to know whether another page exists
+    cursor.execute(f"""
+    SELECT c.cart_ID, c.store_name, c.created_at,
+           c.item_count as total_items, c.total_spent
+    FROM shopping_cart c
+    WHERE c.user_ID = %s
+      AND c.status = 'purchased'
+      AND c.item_count > 0
+      {keyset}
+    ORDER BY c.created_at DESC, c.cart_ID DESC
+    LIMIT %s
+    """, params + [limit + 1])
+    carts = cursor.fetchall()
+
+    next_cursor = None
+    if len(carts) > limit:
+        carts = carts[:limit]
+        next_cursor = encode_history_cursor(carts[-1])
+    return carts, next_cursor
+
+
 def retrieve_totals(cart_ID):
     db = get_db()
     cursor = db.cursor()
@@ -49,11 +82,13 @@ def retrieve_totals(cart_ID):
     cursor.execute(query_items, (cart_ID,))
     items = cursor.fetchall()
 
-    query_totals = "SELECT COUNT(*) as num_items, SUM(price * quantity) AS total_spent FROM cart_item WHERE cart_ID = %s"
+    # Totals are maintained on the cart by the shopping trip endpoints
+    query_totals = "SELECT item_count, total_spent FROM shopping_cart WHERE cart_ID = %s"
     cursor.execute(query_totals, (cart_ID,))
     totals = cursor.fetchone()
+    cursor.close()
 
-    total_items = totals.get("num_items", 0) if totals else 0
+    total_items = totals.get("item_count", 0) if totals else 0
     total_spent = totals.get("total_spent", 0) if totals else 0
 
     return items, total_items, total_spent
@@ -83,12 +118,11 @@ def home():
     # Get cart history (completed carts) - limit to 15 initially
     query = """
     SELECT c.cart_ID, c.store_name, c.created_at,
-           (SELECT COUNT(*) FROM cart_item i WHERE i.cart_ID = c.cart_ID) as total_items,
-           (SELECT SUM(i.price * i.quantity) FROM cart_item i WHERE i.cart_ID = c.cart_ID) as total_spent
+           c.item_count as total_items, c.total_spent
     FROM shopping_cart c
     WHERE c.user_ID = %s 
       AND c.status = 'purchased'
-      AND EXISTS (SELECT 1 FROM cart_item i WHERE i.cart_ID = c.cart_ID)
+      AND c.item_count > 0
     ORDER BY c.created_at DESC
     LIMIT 15
     """
@@ -101,7 +135,7 @@ def home():
     FROM shopping_cart c
     WHERE c.user_ID = %s 
       AND c.status = 'purchased'
-      AND EXISTS (SELECT 1 FROM cart_item i WHERE i.cart_ID = c.cart_ID)
+      AND c.item_count > 0
     """
     cursor.execute(count_query, (user_ID,))
     count_result = cursor.fetchone()
@@ -110,8 +144,7 @@ def home():
     # Check for active shopping trip
     active_query = """
     SELECT c.cart_ID, c.store_name, c.created_at,
-           (SELECT COUNT(*) FROM cart_item i WHERE i.cart_ID = c.cart_ID) as total_items,
-           (SELECT SUM(i.price * i.quantity) FROM cart_item i WHERE i.cart_ID = c.cart_ID) as total_spent
+           c.item_count as total_items, c.total_spent
     FROM shopping_cart c
     WHERE c.user_ID = %s AND c.status = 'active'
     ORDER BY c.created_at DESC LIMIT 1
@@ -156,71 +189,120 @@ def shopping_history():
     db = get_db()
     cursor = db.cursor()
     
-    # Get all cart history (completed carts)
-    query = """
-    SELECT c.cart_ID, c.store_name, c.created_at,
-           (SELECT COUNT(*) FROM cart_item i WHERE i.cart_ID = c.cart_ID) as total_items,
-           (SELECT SUM(i.price * i.quantity) FROM cart_item i WHERE i.cart_ID = c.cart_ID) as total_spent
-    FROM shopping_cart c
-    WHERE c.user_ID = %s 
-      AND c.status = 'purchased'
-      AND EXISTS (SELECT 1 FROM cart_item i WHERE i.cart_ID = c.cart_ID)
-    ORDER BY c.created_at DESC
-    """
-    cursor.execute(query, (user_ID,))
-    cart_history = cursor.fetchall()
+    # Only the first page is rendered; the rest is loaded through /api/shopping-history
+    cart_history, next_cursor = get_history_page(cursor, user_ID, HISTORY_PAGE_SIZE)
     
-    # Get total count for pagination
-    count_query = """
-    SELECT COUNT(*) as total_count
+    # Totals over the whole history for the stats summary
+    totals_query = """
+    SELECT COUNT(*) as total_count, COALESCE(SUM(c.total_spent), 0) as total_spent
     FROM shopping_cart c
     WHERE c.user_ID = %s 
       AND c.status = 'purchased'
-      AND EXISTS (SELECT 1 FROM cart_item i WHERE i.cart_ID = c.cart_ID)
+      AND c.item_count > 0
     """
-    cursor.execute(count_query, (user_ID,))
-    count_result = cursor.fetchone()
-    total_trips = count_result.get("total_count", 0) if count_result else 0
+    cursor.execute(totals_query, (user_ID,))
+    totals = cursor.fetchone()
+    total_trips = totals.get("total_count", 0) if totals else 0
+    history_total_spent = float(totals.get("total_spent", 0)) if totals else 0.0
     
     cursor.close()
     
     return render_template(
         "shopping_history.html", 
         cart_history=cart_history,
-        total_trips=total_trips
+        total_trips=total_trips,
+        history_total_spent=history_total_spent,
+        next_cursor=next_cursor
     )
 
 
 @shopping_bp.route("/api/shopping-history")
 def get_shopping_history():
-    """API endpoint to get extended shopping history"""
+    """API endpoint to get extended shopping history, one keyset page at a time"""
     if "user_ID" not in session:
         return jsonify({"error": "Not authenticated"}), 401
 
     user_ID = session["user_ID"]
-    offset = request.args.get("offset", 0, type=int)
-    limit = request.args.get("limit", 35, type=int)  # Default to 35 more (15 + 35 = 50 total)
+    limit = request.args.get("limit", 35, type=int)
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+
+    after = None
+    token = request.args.get("cursor")
+    if token:
+        try:
+            after = decode_history_cursor(token)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
 
     db = get_db()
     cursor = db.cursor()
+    history, next_cursor = get_history_page(cursor, user_ID, limit, after)
+    cursor.close()
 
-    # Get additional cart history
-    query = """
-    SELECT c.cart_ID, c.store_name, c.created_at,
-           (SELECT COUNT(*) FROM cart_item i WHERE i.cart_ID = c.cart_ID) as total_items,
-           (SELECT SUM(i.price * i.quantity) FROM cart_item i WHERE i.cart_ID = c.cart_ID) as total_spent
-    FROM shopping_cart c
-    WHERE c.user_ID = %s 
-      AND c.status = 'purchased'
-      AND EXISTS (SELECT 1 FROM cart_item i WHERE i.cart_ID = c.cart_ID)
-    ORDER BY c.created_at DESC
-    LIMIT %s OFFSET %s
+    return jsonify({"history": history, "next_cursor": next_cursor})
+
+
+@shopping_bp.route("/api/shopping-history/export")
+def export_shopping_history():
     """
-    cursor.execute(query, (user_ID, limit, offset))
-    additional_history = cursor.fetchall()
-    cursor.close()
+    Stream the user's whole shopping history as NDJSON (default) or CSV.
+
+    Rows are read through an unbuffered server-side cursor and written out as
+    they arrive, so memory use does not grow with the size of the history.
+    """
+    if "user_ID" not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    export_format = request.args.get("format", "ndjson").lower()
+    if export_format not in ("ndjson", "csv"):
+        return jsonify({"error": "Format must be 'ndjson' or 'csv'"}), 400
+
+    user_ID = session["user_ID"]
+    db = get_db()
+
+    def generate():
+        cursor = db.cursor(pymysql.cursors.SSDictCursor)
+        try:
+            cursor.execute("""
+            SELECT c.cart_ID, c.store_name, c.created_at,
+                   c.item_count as total_items, c.total_spent
+            FROM shopping_cart c
+            WHERE c.user_ID = %s
+              AND c.status = 'purchased'
+              AND c.item_count > 0
+            ORDER BY c.created_at DESC, c.cart_ID DESC
+            """, (user_ID,))
+
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=HISTORY_EXPORT_COLUMNS)
+            if export_format == "csv":
+                writer.writeheader()
+                yield buffer.getvalue()
+
+            for cart in cursor:
+                cart["created_at"] = cart["created_at"].isoformat()
+                cart["total_spent"] = float(cart["total_spent"])
+                if export_format == "csv":
+                    buffer.seek(0)
+                    buffer.truncate()
+                    writer.writerow(cart)
+                    yield buffer.getvalue()
+                else:
+                    yield json.dumps(cart) + "\n"
+        finally:
+            # Closing an unbuffered cursor drains any unread rows, freeing the connection
+            cursor.close()
+
+    if export_format == "csv":
+        mimetype, filename = "text/csv", "shopping_history.csv"
+    else:
+        mimetype, filename = "application/x-ndjson", "shopping_history.ndjson"
 
-    return jsonify({"history": additional_history})
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
     
     
 @shopping_bp.route("/start-shopping", methods=["POST"])
@@ -323,9 +405,11 @@ def finish_shopping():
         total_result = cursor.fetchone()
         total_spent = float(total_result["total_spent"] or 0)
 
-        # Update cart status to purchased
+        # Update cart status to purchased and add it to the daily spend rollup
         query = "UPDATE shopping_cart SET status = 'purchased' WHERE cart_ID = %s"
         cursor.execute(query, (cart_ID,))
+        from src.services.spend_rollup import refresh_cart_spend
+        refresh_cart_spend(cursor, cart_ID)
         db.commit()
         cursor.close()
 
@@ -0,0 +1,91 @@
+"""
+Background flushing of buffered cache writes.
+
+Caches buffer their MySQL writes in memory during requests and register a flush
+callback here. A daemon thread per process calls every callback on each tick
+inside an app context, so the writes use their own pooled connection after the
+fact instead of a second connection while a request still holds its own. Light
+periodic housekeeping (meal plan job recovery) rides on the same ticks.
+"""
+
+import atexit
+import os
+import threading
+from typing import Callable, List
+
+from src.logging_config import get_logger
+
+logger = get_logger("preppr.background_flush")
+
+
+class BackgroundFlusher:
+    """
+    Daemon thread calling registered flush callbacks every interval seconds.
+
+    Callbacks are called with force=False on each tick and with force=True on
+    wake() and at interpreter exit; they decide themselves whether anything is due.
+    """
+
+    def __init__(self, interval: float = 5.0):
+        self.app = None
+        self.interval = interval
+        self._callbacks: List[Callable[[bool], None]] = []
+        self._thread = None
+        self._pid = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Apply BACKGROUND_FLUSH_INTERVAL, start with the first request and flush on shutdown"""
+        self.app = app
+        self.interval = app.config.get("BACKGROUND_FLUSH_INTERVAL", self.interval)
+        app.before_request(self.ensure_started)
+        atexit.register(self._flush_on_exit)
+
+    def register(self, callback: Callable[[bool], None]):
+        """Add a flush callback taking a force flag"""
+        if callback not in self._callbacks:
+            self._callbacks.append(callback)
+
+    def wake(self):
+        """Ask the thread for an early, forced flush"""
+        self.ensure_started()
+        self._wake.set()
+
+    def ensure_started(self):
+        """Start the thread for this process, so forked workers get their own"""
+        if self._pid == os.getpid() or self.app is None:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._thread = threading.Thread(target=self._run, name="background-flush", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            forced = self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush_all(force=forced)
+
+    def flush_all(self, force: bool = False):
+        with self.app.app_context():
+            for callback in list(self._callbacks):
+                try:
+                    callback(force)
+                except Exception as e:
+                    # A failing cache must not stop the others from flushing
+                    logger.warning(f"Background flush failed: {e}")
+
+    def _flush_on_exit(self):
+        if self.app is None:
+            return
+        try:
+            self.flush_all(force=True)
+        except Exception:
+            pass
+
+
+# Global instance
+background_flusher = BackgroundFlusher()
@@ -0,0 +1,171 @@
+"""
+Flask CLI commands for maintenance tasks.
+
+Run with `flask --app app <command>`.
+"""
+
+import click
+from flask.cli import with_appcontext
+
+from src.logging_config import get_logger
+
+logger = get_logger("preppr.commands")
+
+
+def init_app(app):
+    """Register maintenance commands on the app's CLI"""
+    app.cli.add_command(backfill_template_hashes)
+    app.cli.add_command(backfill_nutrition_summaries)
+    app.cli.add_command(backfill_daily_spend)
+    app.cli.add_command(reset_usage_counters)
+    app.cli.add_command(downgrade_expired_subscriptions)
+
+
+@click.command("backfill-template-hashes")
+@click.option("--batch-size", default=500, show_default=True, help="Templates hashed per transaction")
+@with_appcontext
+def backfill_template_hashes(batch_size):
+    """Fill recipe_templates.content_hash for templates created before it existed"""
+    from src.database import get_db
+    from src.services.meal_plan_writer import template_content_hash
+
+    db = get_db()
+    cursor = db.cursor()
+    last_id = 0
+    hashed = duplicates = 0
+
+    try:
+        while True:
+            cursor.execute("""
+                SELECT template_id, recipe_name, meal_type, instructions
+                FROM recipe_templates
+                WHERE content_hash IS NULL AND template_id > %s
+                ORDER BY template_id
+                LIMIT %s
+            """, (last_id, batch_size))
+            templates = cursor.fetchall()
+            if not templates:
+                break
+            last_id = templates[-1]["template_id"]
+
+            template_ids = [template["template_id"] for template in templates]
+            placeholders = ", ".join(["%s"] * len(template_ids))
+            cursor.execute(f"""
+                SELECT template_id, ingredient_name, quantity, unit
+                FROM template_ingredients
+                WHERE template_id IN ({placeholders})
+            """, template_ids)
+            ingredients = {}
+            for row in cursor.fetchall():
+                ingredients.setdefault(row["template_id"], []).append(
+                    (row["ingredient_name"], row["quantity"], row["unit"])
+                )
+
+            hashes = {
+                template["template_id"]: template_content_hash(
+                    template["recipe_name"], template["meal_type"], template["instructions"],
+                    ingredients.get(template["template_id"], []),
+                )
+                for template in templates
+            }
+
+            # Duplicate templates keep a NULL hash: the oldest copy becomes the dedupe target
+            placeholders = ", ".join(["%s"] * len(hashes))
+            cursor.execute(f"""
+                SELECT content_hash FROM recipe_templates WHERE content_hash IN ({placeholders})
+            """, list(hashes.values()))
+            taken = {row["content_hash"] for row in cursor.fetchall()}
+
+            updates = []
+            for template_id, content_hash in hashes.items():
+                if content_hash in taken:
+                    duplicates += 1
+                    continue
+                taken.add(content_hash)
+                updates.append((content_hash, template_id))
+
+            if updates:
+                cursor.executemany(
+                    "UPDATE recipe_templates SET content_hash = %s WHERE template_id = %s", updates
+                )
+            db.commit()
+            hashed += len(updates)
+            click.echo(f"Hashed {hashed} templates ({duplicates} duplicates skipped)")
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Template hash backfill failed: {e}")
+        raise click.ClickException(str(e))
+    finally:
+        cursor.close()
+
+    click.echo(f"Done: {hashed} templates hashed, {duplicates} duplicates left unhashed")
+
+
+@click.command("backfill-nutrition-summaries")
+@click.option("--batch-size", default=200, show_default=True, help="Users rebuilt per transaction")
+@with_appcontext
+def backfill_nutrition_summaries(batch_size):
+    """Rebuild daily_nutrition_summary from meals and meal_nutrition for all users"""
+    from src.database import get_db
+    from src.services.nutrition_summary import rebuild_summaries
+
+    try:
+        processed = rebuild_summaries(get_db(), batch_size=batch_size)
+    except Exception as e:
+        logger.error(f"Nutrition summary backfill failed: {e}")
+        raise click.ClickException(str(e))
+
+    click.echo(f"Done: nutrition summaries rebuilt for {processed} users")
+
+
+@click.command("backfill-daily-spend")
+@click.option("--batch-size", default=200, show_default=True, help="Users rebuilt per transaction")
+@with_appcontext
+def backfill_daily_spend(batch_size):
+    """Rebuild user_daily_spend from purchased carts for all users"""
+    from src.database import get_db
+    from src.services.spend_rollup import rebuild_daily_spend
+
+    try:
+        processed = rebuild_daily_spend(get_db(), batch_size=batch_size)
+    except Exception as e:
+        logger.error(f"Daily spend backfill failed: {e}")
+        raise click.ClickException(str(e))
+
+    click.echo(f"Done: daily spend rebuilt for {processed} users")
+
+
+@click.command("reset-usage-counters")
+@click.option("--batch-size", default=1000, show_default=True, help="Counters reset per transaction")
+@with_appcontext
+def reset_usage_counters(batch_size):
+    """Reset daily/weekly subscription usage counters whose period has ended"""
+    from src.database import get_db
+    from src.services.subscription_maintenance import reset_expired_usage_counters
+
+    try:
+        reset = reset_expired_usage_counters(get_db(), batch_size=batch_size)
+    except Exception as e:
+        logger.error(f"Usage counter reset failed: {e}")
+        raise click.ClickException(str(e))
+
+    for limit_type, count in reset.items():
+        click.echo(f"{limit_type}: {count} counters reset")
+
+
+@click.command("downgrade-expired-subscriptions")
+@click.option("--batch-size", default=1000, show_default=True, help="Users downgraded per transaction")
+@with_appcontext
+def downgrade_expired_subscriptions(batch_size):
+    """Downgrade premium subscriptions past their end date to free"""
+    from src.database import get_db
+    from src.services import subscription_maintenance
+
+    try:
+        downgraded = subscription_maintenance.downgrade_expired_subscriptions(get_db(), batch_size=batch_size)
+    except Exception as e:
+        logger.error(f"Subscription downgrade failed: {e}")
+        raise click.ClickException(str(e))
+
+    click.echo(f"Done: {downgraded} expired subscriptions downgraded")
@@ -16,6 +16,33 @@ class Config:
     DB_USER = os.getenv("DB_USER", "root")
     DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
     DB_NAME = os.getenv("DB_NAME", "hacknyu25")
+    DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", 10))
+
+    # Connection pool configuration (sized per worker process)
+    DB_POOL_ENABLED = os.getenv("DB_POOL_ENABLED", "true").lower() == "true"
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = float(os.getenv("DB_POOL_RECYCLE", 300))  # close connections idle longer than this
+    DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", 3600))  # 0 disables
+    DB_POOL_PING = os.getenv("DB_POOL_PING", "true").lower() == "true"
+
+    # Query instrumentation (per-request counts/timings and N+1 detection)
+    QUERY_STATS_ENABLED = os.getenv("QUERY_STATS_ENABLED", "true").lower() == "true"
+    QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", 5))  # warn when a statement runs more than N times
+
+    # Per-process cache of ingredient score rows against a pantry
+    SIMILARITY_CACHE_SIZE = int(os.getenv("SIMILARITY_CACHE_SIZE", 20000))  # ingredient score rows kept per process
+    SIMILARITY_CACHE_TTL_SECONDS = int(os.getenv("SIMILARITY_CACHE_TTL_SECONDS", 24 * 3600))
+
+    # Buffered cache writes are flushed by a background thread this often (seconds)
+    BACKGROUND_FLUSH_INTERVAL = float(os.getenv("BACKGROUND_FLUSH_INTERVAL", 5.0))
+
+    # Background meal plan generation jobs
+    MEAL_PLAN_JOB_WORKERS = int(os.getenv("MEAL_PLAN_JOB_WORKERS", 2))  # threads per process
+    MEAL_PLAN_JOB_TIMEOUT = int(os.getenv("MEAL_PLAN_JOB_TIMEOUT", 300))  # seconds before a running job is considered dead
+    MEAL_PLAN_JOB_MAX_WAIT = int(os.getenv("MEAL_PLAN_JOB_MAX_WAIT", 30))  # longest long-poll on the status endpoint
+    MEAL_PLAN_JOB_RECOVERY_INTERVAL = int(os.getenv("MEAL_PLAN_JOB_RECOVERY_INTERVAL", 60))  # seconds between abandoned-job sweeps
 
     # Nutritionix API configuration
     NUTRITIONIX_API_ID = os.getenv("NUTRITIONIX_API_ID")
@@ -24,6 +51,45 @@ class Config:
     # Gemini AI configuration
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+    # AI provider hedging: start the OpenAI request after HEDGE_DELAY seconds (0 = race immediately)
+    # and give up after DEADLINE seconds overall
+    LLM_HEDGE_MAX_WORKERS = int(os.getenv("LLM_HEDGE_MAX_WORKERS", 16))
+    LLM_MEAL_PLAN_HEDGE_DELAY = float(os.getenv("LLM_MEAL_PLAN_HEDGE_DELAY", 15))
+    LLM_MEAL_PLAN_DEADLINE = float(os.getenv("LLM_MEAL_PLAN_DEADLINE", 120))
+    LLM_EXPIRY_HEDGE_DELAY = float(os.getenv("LLM_EXPIRY_HEDGE_DELAY", 3))
+    LLM_EXPIRY_DEADLINE = float(os.getenv("LLM_EXPIRY_DEADLINE", 15))
+    LLM_EXPIRY_BATCH_HEDGE_DELAY = float(os.getenv("LLM_EXPIRY_BATCH_HEDGE_DELAY", 10))
+    LLM_EXPIRY_BATCH_DEADLINE = float(os.getenv("LLM_EXPIRY_BATCH_DEADLINE", 60))
+    EXPIRY_BATCH_SIZE = int(os.getenv("EXPIRY_BATCH_SIZE", 40))  # items per batch prediction prompt
+
+    # In-process expiry prediction cache
+    EXPIRY_CACHE_SIZE = int(os.getenv("EXPIRY_CACHE_SIZE", 4096))
+    EXPIRY_CACHE_TTL_SECONDS = int(os.getenv("EXPIRY_CACHE_TTL_SECONDS", 3600))
+    EXPIRY_CACHE_FLUSH_INTERVAL = float(os.getenv("EXPIRY_CACHE_FLUSH_INTERVAL", 30))  # seconds between used_count flushes
+    EXPIRY_CACHE_FLUSH_THRESHOLD = int(os.getenv("EXPIRY_CACHE_FLUSH_THRESHOLD", 200))  # pending increments forcing a flush
+    LLM_CHAT_HEDGE_DELAY = float(os.getenv("LLM_CHAT_HEDGE_DELAY", 0))
+    LLM_CHAT_DEADLINE = float(os.getenv("LLM_CHAT_DEADLINE", 30))
+
+    # Cache of parsed AI meal plans keyed by normalized generation inputs
+    MEAL_PLAN_CACHE_ENABLED = os.getenv("MEAL_PLAN_CACHE_ENABLED", "true").lower() == "true"
+    MEAL_PLAN_CACHE_SIZE = int(os.getenv("MEAL_PLAN_CACHE_SIZE", 256))  # plans kept in memory per process
+    MEAL_PLAN_CACHE_TTL_SECONDS = int(os.getenv("MEAL_PLAN_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+    MEAL_PLAN_CACHE_BUDGET_BUCKET = float(os.getenv("MEAL_PLAN_CACHE_BUDGET_BUCKET", 10))  # dollars
+
+    # Process-level cache of the static subscription_tier_features table
+    SUBSCRIPTION_TIER_CACHE_TTL_SECONDS = int(os.getenv("SUBSCRIPTION_TIER_CACHE_TTL_SECONDS", 300))
+
+    # Per-process cache of user subscription rows
+    SUBSCRIPTION_INFO_CACHE_TTL_SECONDS = int(os.getenv("SUBSCRIPTION_INFO_CACHE_TTL_SECONDS", 60))
+
+    # Per-process cache of decoded user preference snapshots
+    USER_PREFERENCE_CACHE_TTL_SECONDS = int(os.getenv("USER_PREFERENCE_CACHE_TTL_SECONDS", 30))
+
+    # Background reset of expired usage counters and subscription downgrades
+    SUBSCRIPTION_MAINTENANCE_ENABLED = os.getenv("SUBSCRIPTION_MAINTENANCE_ENABLED", "true").lower() == "true"
+    SUBSCRIPTION_MAINTENANCE_INTERVAL = int(os.getenv("SUBSCRIPTION_MAINTENANCE_INTERVAL", 900))  # seconds between runs
+    SUBSCRIPTION_MAINTENANCE_BATCH_SIZE = int(os.getenv("SUBSCRIPTION_MAINTENANCE_BATCH_SIZE", 1000))  # rows per transaction
+
     # JWT configuration
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", SECRET_KEY)  # Fallback to main secret key
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", 3600))  # 1 hour default
@@ -1,33 +1,77 @@
+from contextlib import contextmanager
+
 import pymysql.cursors
-from flask import g, current_app
+from flask import g, current_app, jsonify, session
+from .db_pool import ConnectionPool, PoolTimeout
 from .logging_config import get_logger
+from .query_stats import InstrumentedDictCursor
 
 logger = get_logger("preppr.database")
 
 
+def _connect_from_config(config):
+    """Build a connection factory from the app configuration"""
+    if config.get("QUERY_STATS_ENABLED", True):
+        cursorclass = InstrumentedDictCursor
+    else:
+        cursorclass = pymysql.cursors.DictCursor
+
+    def connect():
+        return pymysql.connect(
+            host=config["DB_HOST"],
+            port=config["DB_PORT"],
+            user=config["DB_USER"],
+            password=config["DB_PASSWORD"],
+            db=config["DB_NAME"],
+            charset="utf8mb4",
+            cursorclass=cursorclass,
+            connect_timeout=config.get("DB_CONNECT_TIMEOUT", 10),
+        )
+    return connect
+
+
+def get_pool(app=None):
+    """Return the connection pool for the app, or None when pooling is disabled"""
+    app = app or current_app
+    return app.extensions.get("db_pool")
+
+
+def get_pool_stats(app=None):
+    """Pool statistics for sizing DB_POOL_MAX_SIZE per worker"""
+    pool = get_pool(app)
+    if pool is None:
+        return {"enabled": False}
+    stats = pool.stats()
+    stats["enabled"] = True
+    return stats
+
+
 def get_db():
     """
     Connects to the specific database.
     """
     if "db" not in g:
         try:
-            g.db = pymysql.connect(
-                host=current_app.config["DB_HOST"],
-                port=current_app.config["DB_PORT"],
-                user=current_app.config["DB_USER"],
-                password=current_app.config["DB_PASSWORD"],
-                db=current_app.config["DB_NAME"],
-                charset="utf8mb4",
-                cursorclass=pymysql.cursors.DictCursor,
-            )
+            pool = get_pool()
+            if pool is not None:
+                g.db = pool.acquire()
+            else:
+                g.db = _connect_from_config(current_app.config)()
             logger.debug(
                 "Database connection established",
                 extra={
                     "host": current_app.config["DB_HOST"],
                     "port": current_app.config["DB_PORT"],
                     "database": current_app.config["DB_NAME"],
+                    "pooled": pool is not None,
                 },
             )
+        except PoolTimeout as e:
+            logger.error(
+                "Timed out waiting for a pooled database connection",
+                extra={"error": str(e), "pool": get_pool_stats()},
+            )
+            raise
         except Exception as e:
             logger.error(
                 "Failed to connect to database",
@@ -43,15 +87,38 @@ def get_db():
     return g.db
 
 
+@contextmanager
+def separate_connection():
+    """
+    A connection independent of the request's get_db() connection, for writes that
+    must commit without committing the caller's in-flight transaction (caches, jobs).
+    """
+    pool = get_pool()
+    if pool is not None:
+        with pool.connection() as conn:
+            yield conn
+    else:
+        conn = _connect_from_config(current_app.config)()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+
 def close_db(e=None):
     """
-    Closes the database again at the end of the request.
+    Returns the connection to the pool (or closes it) at the end of the request.
     """
     db = g.pop("db", None)
     if db is not None:
         try:
-            db.close()
-            logger.debug("Database connection closed")
+            pool = get_pool()
+            if pool is not None:
+                pool.release(db)
+                logger.debug("Database connection returned to pool")
+            else:
+                db.close()
+                logger.debug("Database connection closed")
         except Exception as ex:
             logger.error(
                 "Error closing database connection",
@@ -62,4 +129,33 @@ def close_db(e=None):
 
 def init_app(app):
     """Register database functions with the Flask app."""
+    if app.config.get("DB_POOL_ENABLED", True):
+        pool = ConnectionPool(
+            _connect_from_config(app.config),
+            min_size=app.config.get("DB_POOL_MIN_SIZE", 1),
+            max_size=app.config.get("DB_POOL_MAX_SIZE", 10),
+            timeout=app.config.get("DB_POOL_TIMEOUT", 10),
+            recycle=app.config.get("DB_POOL_RECYCLE", 300),
+            max_lifetime=app.config.get("DB_POOL_MAX_LIFETIME", 3600),
+            ping=app.config.get("DB_POOL_PING", True),
+        )
+        app.extensions["db_pool"] = pool
+        try:
+            pool.warm()
+        except Exception as e:
+            # Don't fail app start-up; connections are opened lazily on first checkout
+            logger.warning(
+                "Could not pre-fill database connection pool",
+                extra={"error": str(e)},
+            )
+
     app.teardown_appcontext(close_db)
+
+    @app.route("/api/health/db-pool", methods=["GET"])
+    def db_pool_stats():
+        """Expose pool statistics for this worker process to signed-in users"""
+        if "user_ID" not in session:
+            return jsonify({"error": "Not authenticated"}), 401
+        stats = get_pool_stats(app)
+        stats.pop("pid", None)
+        return jsonify(stats)
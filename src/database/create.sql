@@ -48,9 +48,12 @@ CREATE TABLE shopping_cart (
     status ENUM('active', 'purchased') NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     shopping_list_id INT NULL,
+    item_count INT NOT NULL DEFAULT 0, -- number of cart_item rows, maintained by the shopping trip endpoints
+    total_spent DECIMAL(12,2) NOT NULL DEFAULT 0.00, -- SUM(price * quantity) of cart_item rows
     PRIMARY KEY (cart_ID),                         
     FOREIGN KEY (user_ID) REFERENCES user_account(user_ID),
-    FOREIGN KEY (shopping_list_id) REFERENCES shopping_lists(list_id)
+    FOREIGN KEY (shopping_list_id) REFERENCES shopping_lists(list_id),
+    INDEX idx_cart_user_status_created (user_ID, status, created_at)
 );
 
 -- Create the cart_item table
@@ -286,6 +289,7 @@ CREATE TABLE recipe_templates (
     difficulty ENUM('easy', 'medium', 'hard') DEFAULT 'medium',
     calories_per_serving INT NULL,
     instructions TEXT NOT NULL,
+    content_hash CHAR(64) NULL, -- sha256 of normalized name, meal type, instructions and ingredients
     cuisine_type VARCHAR(50) NULL, -- Italian, Mexican, Asian, etc.
     dietary_tags TEXT NULL, -- JSON array of dietary tags (vegetarian, gluten-free, etc.)
     notes TEXT NULL,
@@ -295,7 +299,8 @@ CREATE TABLE recipe_templates (
     INDEX idx_recipe_name (recipe_name),
     INDEX idx_meal_type (meal_type),
     INDEX idx_cuisine_type (cuisine_type),
-    INDEX idx_difficulty (difficulty)
+    INDEX idx_difficulty (difficulty),
+    UNIQUE KEY unique_template_content (content_hash)
 );
 
 -- Create template_ingredients table for storing ingredients per recipe template
@@ -336,6 +341,37 @@ CREATE TABLE meal_plan_sessions (
     INDEX idx_session_status (status)
 );
 
+-- Queued meal plan generations run by background workers
+CREATE TABLE meal_plan_jobs (
+    job_id CHAR(36) NOT NULL,
+    user_id VARCHAR(50) NOT NULL,
+    status ENUM('queued', 'running', 'succeeded', 'failed') NOT NULL DEFAULT 'queued',
+    params TEXT NOT NULL, -- JSON generation inputs
+    session_id INT NULL, -- meal_plan_sessions row created on success
+    result TEXT NULL, -- JSON response payload
+    error_message TEXT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    PRIMARY KEY (job_id),
+    FOREIGN KEY (user_id) REFERENCES user_account(user_ID) ON DELETE CASCADE,
+    FOREIGN KEY (session_id) REFERENCES meal_plan_sessions(session_id) ON DELETE SET NULL,
+    INDEX idx_job_user_created (user_id, created_at),
+    INDEX idx_job_status_created (status, created_at)
+);
+
+-- Parsed AI meal plans shared across users with identical generation inputs
+CREATE TABLE llm_meal_plan_cache (
+    cache_key CHAR(64) NOT NULL, -- sha256 of the normalized generation inputs
+    meal_plan MEDIUMTEXT NOT NULL, -- parsed meal plan JSON
+    hit_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (cache_key),
+    INDEX idx_meal_plan_cache_expires (expires_at)
+);
+
 -- Create meals table for storing individual meal instances
 CREATE TABLE meals (
     meal_id INT AUTO_INCREMENT,
@@ -445,15 +481,36 @@ CREATE TABLE fuzzy_match_feedback (
     INDEX idx_feedback_date (feedback_date)
 );
 
+-- Daily spend rollup: purchased cart totals per user per day, maintained by the app
+CREATE TABLE user_daily_spend (
+    user_id VARCHAR(50) NOT NULL,
+    spend_date DATE NOT NULL,
+    total_spent DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    trip_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, spend_date),
+    FOREIGN KEY (user_id) REFERENCES user_account(user_ID) ON DELETE CASCADE
+);
+
+-- Per-user pantry version, bumped by triggers whenever the user's pantry changes
+CREATE TABLE user_pantry_versions (
+    user_id VARCHAR(50) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id),
+    FOREIGN KEY (user_id) REFERENCES user_account(user_ID) ON DELETE CASCADE
+);
+
 -- Create table to store pre-computed fuzzy match suggestions for better performance
 CREATE TABLE ingredient_match_suggestions (
     suggestion_id INT AUTO_INCREMENT,
     user_id VARCHAR(50) NOT NULL,
     ingredient_name VARCHAR(100) NOT NULL,
     suggested_matches TEXT NOT NULL, -- JSON array of {pantry_item_name, confidence_score, match_type}
+    pantry_version BIGINT UNSIGNED NOT NULL DEFAULT 0, -- user_pantry_versions.version the matches were computed against
     computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     expires_at TIMESTAMP NULL, -- cache expiration (e.g., when pantry changes significantly)
-    is_stale BOOLEAN DEFAULT FALSE, -- mark as stale when pantry is updated
+    is_stale BOOLEAN DEFAULT FALSE, -- legacy flag, superseded by pantry_version
     PRIMARY KEY (suggestion_id),
     FOREIGN KEY (user_id) REFERENCES user_account(user_ID) ON DELETE CASCADE,
     INDEX idx_user_suggestions (user_id),
@@ -660,7 +717,8 @@ CREATE TABLE subscription_limits (
     FOREIGN KEY (user_id) REFERENCES user_account(user_ID) ON DELETE CASCADE,
     UNIQUE KEY unique_user_limit_type (user_id, limit_type),
     INDEX idx_user_limits (user_id),
-    INDEX idx_limit_type (limit_type)
+    INDEX idx_limit_type (limit_type),
+    INDEX idx_limit_type_reset (limit_type, last_reset_date)
 );
 
 -- Create subscription tier features table for configuration
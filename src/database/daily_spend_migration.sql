@@ -0,0 +1,19 @@
+-- Daily Spend Rollup Migration
+-- Budget charts read per-day totals from user_daily_spend instead of aggregating
+-- every cart_item of the period. The app keeps it current when carts are
+-- purchased or edited.
+--
+-- After running this, fill it from existing carts with:
+--   flask --app app backfill-daily-spend
+
+USE hacknyu25;
+
+CREATE TABLE IF NOT EXISTS user_daily_spend (
+    user_id VARCHAR(50) NOT NULL,
+    spend_date DATE NOT NULL,
+    total_spent DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    trip_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, spend_date),
+    FOREIGN KEY (user_id) REFERENCES user_account(user_ID) ON DELETE CASCADE
+);
@@ -0,0 +1,14 @@
+-- Meal Plan Cache Migration
+-- Adds the shared cache of parsed AI meal plans
+
+USE hacknyu25;
+
+CREATE TABLE IF NOT EXISTS llm_meal_plan_cache (
+    cache_key CHAR(64) NOT NULL, -- sha256 of the normalized generation inputs
+    meal_plan MEDIUMTEXT NOT NULL, -- parsed meal plan JSON
+    hit_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (cache_key),
+    INDEX idx_meal_plan_cache_expires (expires_at)
+);
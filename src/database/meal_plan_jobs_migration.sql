@@ -0,0 +1,23 @@
+-- Meal Plan Jobs Migration
+-- Adds the table backing asynchronous meal plan generation
+
+USE hacknyu25;
+
+CREATE TABLE IF NOT EXISTS meal_plan_jobs (
+    job_id CHAR(36) NOT NULL,
+    user_id VARCHAR(50) NOT NULL,
+    status ENUM('queued', 'running', 'succeeded', 'failed') NOT NULL DEFAULT 'queued',
+    params TEXT NOT NULL, -- JSON generation inputs
+    session_id INT NULL, -- meal_plan_sessions row created on success
+    result TEXT NULL, -- JSON response payload
+    error_message TEXT NULL,
+    attempts INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    PRIMARY KEY (job_id),
+    FOREIGN KEY (user_id) REFERENCES user_account(user_ID) ON DELETE CASCADE,
+    FOREIGN KEY (session_id) REFERENCES meal_plan_sessions(session_id) ON DELETE SET NULL,
+    INDEX idx_job_user_created (user_id, created_at),
+    INDEX idx_job_status_created (status, created_at)
+);
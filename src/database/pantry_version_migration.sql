@@ -0,0 +1,67 @@
+-- Pantry Version Migration
+-- Replaces the blanket "mark all suggestions stale" triggers with a per-user pantry
+-- version. Each pantry change bumps one row instead of rewriting the user's whole
+-- ingredient_match_suggestions cache.
+
+USE hacknyu25;
+
+CREATE TABLE IF NOT EXISTS user_pantry_versions (
+    user_id VARCHAR(50) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id),
+    FOREIGN KEY (user_id) REFERENCES user_account(user_ID) ON DELETE CASCADE
+);
+
+ALTER TABLE ingredient_match_suggestions
+    ADD COLUMN pantry_version BIGINT UNSIGNED NOT NULL DEFAULT 0 AFTER suggested_matches;
+
+-- Existing cache rows were computed against an unknown pantry state; start every
+-- user with a pantry or cached suggestions at version 1 so their rows (still at
+-- version 0) are treated as outdated
+INSERT INTO user_pantry_versions (user_id, version)
+SELECT users.user_id, 1
+FROM (
+    SELECT user_id FROM pantry_items
+    UNION
+    SELECT user_id FROM ingredient_match_suggestions
+) AS users
+ON DUPLICATE KEY UPDATE version = version + 1;
+
+DROP TRIGGER IF EXISTS pantry_update_stale_suggestions;
+DROP TRIGGER IF EXISTS pantry_insert_stale_suggestions;
+DROP TRIGGER IF EXISTS pantry_delete_stale_suggestions;
+
+DELIMITER //
+CREATE TRIGGER pantry_update_bump_version
+    AFTER UPDATE ON pantry_items
+    FOR EACH ROW
+BEGIN
+    IF OLD.item_name != NEW.item_name OR OLD.is_consumed != NEW.is_consumed
+        OR OLD.quantity != NEW.quantity OR OLD.unit != NEW.unit
+        OR NOT (OLD.storage_type <=> NEW.storage_type)
+        OR NOT (OLD.expiration_date <=> NEW.expiration_date) THEN
+        INSERT INTO user_pantry_versions (user_id, version)
+        VALUES (NEW.user_id, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
+    END IF;
+END//
+
+CREATE TRIGGER pantry_insert_bump_version
+    AFTER INSERT ON pantry_items
+    FOR EACH ROW
+BEGIN
+    INSERT INTO user_pantry_versions (user_id, version)
+    VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END//
+
+CREATE TRIGGER pantry_delete_bump_version
+    AFTER DELETE ON pantry_items
+    FOR EACH ROW
+BEGIN
+    INSERT INTO user_pantry_versions (user_id, version)
+    VALUES (OLD.user_id, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
+END//
+DELIMITER ;
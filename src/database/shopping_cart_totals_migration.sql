@@ -0,0 +1,21 @@
+-- Shopping Cart Totals Migration
+-- Home and history pages read item_count and total_spent straight from
+-- shopping_cart instead of running correlated cart_item subqueries per cart.
+-- The shopping trip endpoints keep both columns current.
+
+USE hacknyu25;
+
+ALTER TABLE shopping_cart
+    ADD COLUMN item_count INT NOT NULL DEFAULT 0,
+    ADD COLUMN total_spent DECIMAL(12,2) NOT NULL DEFAULT 0.00,
+    ADD INDEX idx_cart_user_status_created (user_ID, status, created_at);
+
+-- Backfill totals for existing carts
+UPDATE shopping_cart c
+JOIN (
+    SELECT cart_ID, COUNT(*) AS item_count, COALESCE(SUM(price * quantity), 0) AS total_spent
+    FROM cart_item
+    GROUP BY cart_ID
+) totals ON totals.cart_ID = c.cart_ID
+SET c.item_count = totals.item_count,
+    c.total_spent = totals.total_spent;
@@ -0,0 +1,13 @@
+-- Recipe Template Content Hash Migration
+-- Generated meal plans dedupe recipe templates by a hash of the normalized name,
+-- meal type, instructions and ingredient list instead of comparing the full
+-- instructions TEXT column. The unique index turns the lookup into a point read.
+--
+-- After running this, fill the hash for existing templates with:
+--   flask --app app backfill-template-hashes
+
+USE hacknyu25;
+
+ALTER TABLE recipe_templates
+    ADD COLUMN content_hash CHAR(64) NULL AFTER instructions,
+    ADD UNIQUE KEY unique_template_content (content_hash);
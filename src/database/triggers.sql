@@ -56,37 +56,39 @@ END//
 
 DELIMITER ;
 
--- Add trigger to mark match suggestions as stale when pantry items are modified
+-- Bump the user's pantry version when pantry items change. Cached match suggestions
+-- are keyed by this version, so older rows are simply ignored on lookup.
 DELIMITER //
-CREATE TRIGGER pantry_update_stale_suggestions
+CREATE TRIGGER pantry_update_bump_version
     AFTER UPDATE ON pantry_items
     FOR EACH ROW
 BEGIN
-    -- Mark suggestions as stale when pantry item name changes or item is consumed
-    IF OLD.item_name != NEW.item_name OR OLD.is_consumed != NEW.is_consumed THEN
-        UPDATE ingredient_match_suggestions 
-        SET is_stale = TRUE 
-        WHERE user_id = NEW.user_id;
+    -- Only changes that affect cached suggestions (name, availability, amounts, storage, expiry)
+    IF OLD.item_name != NEW.item_name OR OLD.is_consumed != NEW.is_consumed
+        OR OLD.quantity != NEW.quantity OR OLD.unit != NEW.unit
+        OR NOT (OLD.storage_type <=> NEW.storage_type)
+        OR NOT (OLD.expiration_date <=> NEW.expiration_date) THEN
+        INSERT INTO user_pantry_versions (user_id, version)
+        VALUES (NEW.user_id, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
     END IF;
 END//
 
-CREATE TRIGGER pantry_insert_stale_suggestions
+CREATE TRIGGER pantry_insert_bump_version
     AFTER INSERT ON pantry_items
     FOR EACH ROW
 BEGIN
-    -- Mark suggestions as stale when new pantry items are added
-    UPDATE ingredient_match_suggestions 
-    SET is_stale = TRUE 
-    WHERE user_id = NEW.user_id;
+    INSERT INTO user_pantry_versions (user_id, version)
+    VALUES (NEW.user_id, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
 END//
 
-CREATE TRIGGER pantry_delete_stale_suggestions
+CREATE TRIGGER pantry_delete_bump_version
     AFTER DELETE ON pantry_items
     FOR EACH ROW
 BEGIN
-    -- Mark suggestions as stale when pantry items are deleted
-    UPDATE ingredient_match_suggestions 
-    SET is_stale = TRUE 
-    WHERE user_id = OLD.user_id;
+    INSERT INTO user_pantry_versions (user_id, version)
+    VALUES (OLD.user_id, 1)
+    ON DUPLICATE KEY UPDATE version = version + 1;
 END//
-DELIMITER ;
\ No newline at end of file
+DELIMITER ;
@@ -0,0 +1,9 @@
+-- Usage Counter Reset Migration
+-- Expired daily/weekly subscription_limits counters are reset by a batch job
+-- (`flask reset-usage-counters` or the background scheduler) instead of
+-- inside requests. This index lets the job find expired counters per limit type.
+
+USE hacknyu25;
+
+ALTER TABLE subscription_limits
+    ADD INDEX idx_limit_type_reset (limit_type, last_reset_date);
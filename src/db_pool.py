@@ -0,0 +1,278 @@
+"""
+MySQL connection pool used by src.database.
+
+Connections are checked out per request by get_db() and returned at teardown
+instead of being opened and closed every time, so short endpoints no longer pay
+the TCP + MySQL handshake on each call.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from .logging_config import get_logger
+
+logger = get_logger("preppr.database")
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out before the timeout expired"""
+    pass
+
+
+class _PooledEntry:
+    """Bookkeeping for a single physical connection"""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of PyMySQL connections.
+
+    Args:
+        connect: Zero-argument factory returning a new DB-API connection
+        min_size: Connections kept open even when idle
+        max_size: Upper bound on open connections (idle + checked out)
+        timeout: Seconds to wait for a free connection before raising PoolTimeout
+        recycle: Idle seconds after which a connection is closed and replaced
+        max_lifetime: Seconds after which a connection is replaced regardless of use (0 disables)
+        ping: Whether to ping connections on checkout
+    """
+
+    def __init__(self, connect: Callable[[], Any], min_size: int = 1, max_size: int = 10,
+                 timeout: float = 10.0, recycle: float = 300.0, max_lifetime: float = 3600.0,
+                 ping: bool = True):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.max_lifetime = max_lifetime
+        self.ping = ping
+
+        self._cond = threading.Condition()
+        self._reset_state()
+
+    def _reset_state(self):
+        """Reset all bookkeeping (used at construction and after a fork)"""
+        self._pid = os.getpid()
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "ping_failures": 0,
+            "recycled": 0,
+            "reset_failures": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+        }
+
+    def _check_fork(self):
+        """Drop connections inherited from a parent process; sockets cannot be shared"""
+        if self._pid != os.getpid():
+            logger.info("Process fork detected, discarding inherited connection pool")
+            self._reset_state()
+
+    def _open(self) -> _PooledEntry:
+        conn = self._connect()
+        with self._cond:
+            self._stats["created"] += 1
+        return _PooledEntry(conn)
+
+    def _discard(self, entry: _PooledEntry):
+        """Close a connection and release its slot"""
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats["closed"] += 1
+            self._cond.notify()
+
+    def _is_expired(self, entry: _PooledEntry, now: float) -> bool:
+        if self.recycle and now - entry.last_used > self.recycle:
+            return True
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            return True
+        return False
+
+    def warm(self):
+        """Open connections until min_size are available"""
+        while True:
+            with self._cond:
+                self._check_fork()
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def acquire(self):
+        """Check out a healthy connection, opening a new one if the pool has capacity"""
+        deadline = time.monotonic() + self.timeout
+        wait_started = None
+
+        while True:
+            entry = None
+            should_open = False
+
+            with self._cond:
+                self._check_fork()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if wait_started is None:
+                        wait_started = time.monotonic()
+                        self._stats["waits"] += 1
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self.timeout}s waiting for a database connection "
+                            f"(max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    # LIFO keeps a small hot set and lets the rest age out via recycle
+                    entry = self._idle.pop()
+                else:
+                    self._size += 1
+                    should_open = True
+
+            if should_open:
+                try:
+                    entry = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            else:
+                if self._is_expired(entry, time.monotonic()):
+                    with self._cond:
+                        self._stats["recycled"] += 1
+                    self._discard(entry)
+                    continue
+
+                if self.ping:
+                    try:
+                        entry.conn.ping(reconnect=False)
+                    except Exception as e:
+                        logger.warning(
+                            "Discarding pooled connection that failed health ping",
+                            extra={"error": str(e)},
+                        )
+                        with self._cond:
+                            self._stats["ping_failures"] += 1
+                        self._discard(entry)
+                        continue
+
+            with self._cond:
+                self._in_use[id(entry.conn)] = entry
+                self._stats["checkouts"] += 1
+                if wait_started is not None:
+                    waited_ms = (time.monotonic() - wait_started) * 1000
+                    self._stats["total_wait_ms"] += waited_ms
+                    self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], waited_ms)
+            return entry.conn
+
+    def release(self, conn):
+        """Return a connection, resetting transaction and autocommit state first"""
+        with self._cond:
+            if self._pid != os.getpid():
+                # Connection belongs to the parent's pool; never reuse it here
+                entry = None
+            else:
+                entry = self._in_use.pop(id(conn), None)
+
+        if entry is None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            return
+
+        try:
+            if not conn.open:
+                raise ConnectionError("connection already closed")
+            # Roll back anything the request left uncommitted and restore the default mode
+            conn.rollback()
+            if conn.get_autocommit():
+                conn.autocommit(False)
+        except Exception as e:
+            logger.warning(
+                "Discarding pooled connection that could not be reset",
+                extra={"error": str(e)},
+            )
+            with self._cond:
+                self._stats["reset_failures"] += 1
+            self._discard(entry)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            self._stats["checkins"] += 1
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager for code running outside a request (jobs, CLI commands)"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close_all(self):
+        """Close every idle connection; checked-out connections are returned to the pool as usual"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+        for entry in idle:
+            self._discard(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool sizing and usage counters"""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                "pid": self._pid,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "timeout": self.timeout,
+                "recycle": self.recycle,
+            })
+        checkouts = snapshot["checkouts"]
+        snapshot["avg_wait_ms"] = (snapshot["total_wait_ms"] / snapshot["waits"]) if snapshot["waits"] else 0.0
+        snapshot["reuse_ratio"] = (1 - snapshot["created"] / checkouts) if checkouts else 0.0
+        return snapshot
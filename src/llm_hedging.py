@@ -0,0 +1,152 @@
+"""
+Hedged requests across AI providers.
+
+Instead of waiting for Gemini to fail or time out before trying OpenAI, the
+fallback provider is started after a short hedge delay (or immediately) and the
+first valid response wins. Every call is bounded by an overall deadline.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app, has_app_context
+
+from .logging_config import get_logger
+
+logger = get_logger("preppr.llm")
+
+# Defaults per call site: (hedge delay seconds, overall deadline seconds)
+DEFAULT_BUDGETS = {
+    "meal_plan": (15.0, 120.0),
+    "expiry": (3.0, 15.0),
+    "expiry_batch": (10.0, 60.0),
+    "chat": (0.0, 30.0),  # latency critical: race both providers immediately
+}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Shared provider thread pool, recreated after a fork"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            max_workers = 16
+            if has_app_context():
+                max_workers = current_app.config.get("LLM_HEDGE_MAX_WORKERS", max_workers)
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-provider")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def get_budget(call_site: str):
+    """
+    Hedge delay and deadline for a call site, from LLM_<SITE>_HEDGE_DELAY and
+    LLM_<SITE>_DEADLINE when configured.
+    """
+    hedge_delay, deadline = DEFAULT_BUDGETS.get(call_site, (5.0, 60.0))
+    if has_app_context():
+        prefix = f"LLM_{call_site.upper()}"
+        hedge_delay = current_app.config.get(f"{prefix}_HEDGE_DELAY", hedge_delay)
+        deadline = current_app.config.get(f"{prefix}_DEADLINE", deadline)
+    return float(hedge_delay), float(deadline)
+
+
+def remaining_time(deadline_at: float) -> float:
+    """Seconds left until deadline_at (a time.monotonic() value), never negative"""
+    return max(0.0, deadline_at - time.monotonic())
+
+
+def _run_provider(provider: Callable[[float], Any], deadline_at: float) -> Any:
+    """Call provider unless the deadline passed while it was queued on the executor"""
+    if remaining_time(deadline_at) <= 0:
+        return None
+    return provider(deadline_at)
+
+
+def hedged_call(call_site: str, providers: Dict[str, Callable[[float], Any]],
+                validate: Optional[Callable[[Any], bool]] = None,
+                hedge_delay: Optional[float] = None, deadline: Optional[float] = None) -> Any:
+    """
+    Race providers and return the first valid result, or None.
+
+    Args:
+        call_site: Name used for configuration and logging ("meal_plan", "expiry", "chat")
+        providers: Ordered mapping of provider name to a callable taking the absolute
+            deadline (time.monotonic() value) so it can bound its own network timeout.
+            The first entry is the primary; the rest are started as hedges.
+        validate: Predicate for a usable result (defaults to "not None")
+        hedge_delay: Seconds to wait on the primary before starting the next provider
+        deadline: Overall seconds allowed for the call
+
+    Threads cannot be interrupted, so losing requests are abandoned: their results
+    are discarded and their own timeouts (derived from the deadline) bound them.
+    """
+    default_delay, default_deadline = get_budget(call_site)
+    hedge_delay = default_delay if hedge_delay is None else hedge_delay
+    deadline = default_deadline if deadline is None else deadline
+    validate = validate or (lambda result: result is not None)
+
+    started = time.monotonic()
+    deadline_at = started + deadline
+    executor = _get_executor()
+
+    pending_providers = list(providers.items())
+    running = {}
+
+    def start_next():
+        name, provider = pending_providers.pop(0)
+        running[executor.submit(_run_provider, provider, deadline_at)] = name
+
+    start_next()
+    next_hedge_at = started + hedge_delay
+
+    while running:
+        now = time.monotonic()
+        if now >= deadline_at:
+            break
+
+        timeout = deadline_at - now
+        if pending_providers:
+            timeout = min(timeout, max(0.0, next_hedge_at - now))
+
+        done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            name = running.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning(f"{call_site}: provider {name} failed: {e}")
+                result = None
+
+            if validate(result):
+                for loser in running:
+                    loser.cancel()
+                logger.info(
+                    f"{call_site}: provider {name} won",
+                    extra={"duration": round((time.monotonic() - started) * 1000, 2)},
+                )
+                return result
+
+            logger.info(f"{call_site}: provider {name} returned no usable result")
+
+        # Start the next provider when the hedge delay passes or nothing is left running,
+        # as long as some of the budget is left for it
+        if (pending_providers and remaining_time(deadline_at) > 0
+                and (not running or time.monotonic() >= next_hedge_at)):
+            start_next()
+            next_hedge_at = time.monotonic() + hedge_delay
+
+    for future in running:
+        future.cancel()
+    logger.warning(
+        f"{call_site}: no provider returned a usable result",
+        extra={"duration": round((time.monotonic() - started) * 1000, 2)},
+    )
+    return None
@@ -38,6 +38,14 @@ class JSONFormatter(logging.Formatter):
             log_entry["cart_id"] = record.cart_id
         if hasattr(record, "duration"):
             log_entry["duration_ms"] = record.duration
+        if hasattr(record, "db_query_count"):
+            log_entry["db_query_count"] = record.db_query_count
+            log_entry["db_time_ms"] = record.db_time_ms
+            log_entry["db_slowest_ms"] = record.db_slowest_ms
+            log_entry["db_slowest_statement"] = record.db_slowest_statement
+            log_entry["db_repeated_statements"] = record.db_repeated_statements
+        if hasattr(record, "repeated_statements"):
+            log_entry["repeated_statements"] = record.repeated_statements
 
         return str(log_entry)
 
@@ -13,7 +13,7 @@ def get_openai_client():
         return None
     return OpenAI(api_key=api_key)
 
-def openai_expiry_prediction(item_name, storage_type):
+def openai_expiry_prediction(item_name, storage_type, timeout=None):
     """
     Use OpenAI to predict expiration days and category for food items.
     Returns dict with 'days' and 'category' or None if failed.
@@ -41,7 +41,8 @@ Be realistic and conservative with expiration estimates. Consider the storage ty
             model="gpt-3.5-turbo",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.1,
-            max_tokens=100
+            max_tokens=100,
+            timeout=timeout
         )
         
         content = response.choices[0].message.content.strip()
@@ -77,9 +78,9 @@ Be realistic and conservative with expiration estimates. Consider the storage ty
         print(f"OpenAI expiry prediction error: {str(e)}")
         return None
 
-def openai_meal_plan_generation(prompt):
+def openai_meal_plan_generation(prompt, timeout=None):
     """
-    Use OpenAI to generate meal plans when Gemini fails.
+    Use OpenAI to generate meal plans when Gemini fails or is slow.
     Returns parsed JSON meal plan or None if failed.
     """
     client = get_openai_client()
@@ -91,7 +92,8 @@ def openai_meal_plan_generation(prompt):
             model="gpt-4o",  # Use GPT-4o for better meal planning
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
-            max_tokens=4000
+            max_tokens=4000,
+            timeout=timeout
         )
         
         content = response.choices[0].message.content.strip()
@@ -118,4 +120,44 @@ def openai_meal_plan_generation(prompt):
         
     except Exception as e:
         print(f"OpenAI meal plan generation error: {str(e)}")
-        return None
\ No newline at end of file
+        return None
+
+def openai_batch_expiry_prediction(prompt, timeout=None):
+    """
+    Use OpenAI to predict expiration days and categories for several items at once.
+    Returns the parsed JSON list from the model or None if failed.
+    """
+    client = get_openai_client()
+    if not client:
+        return None
+    
+    try:
+        response = client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1,
+            max_tokens=2000,
+            timeout=timeout
+        )
+        
+        content = response.choices[0].message.content.strip()
+        
+        # Clean the response to extract JSON
+        if "```json" in content:
+            json_start = content.find("```json") + 7
+            json_end = content.find("```", json_start)
+            content = content[json_start:json_end]
+        elif "```" in content:
+            json_start = content.find("```") + 3
+            json_end = content.find("```", json_start)
+            content = content[json_start:json_end]
+        
+        result = json.loads(content)
+        if isinstance(result, list):
+            return result
+        
+        return None
+        
+    except Exception as e:
+        print(f"OpenAI batch expiry prediction error: {str(e)}")
+        return None
@@ -4,7 +4,7 @@ Promotional code utilities for validation, redemption, and management.
 
 from flask import request, g
 from src.database import get_db
-from src.subscription_utils import get_user_subscription_info
+from src.subscription_utils import get_user_subscription_info, invalidate_subscription_cache
 from datetime import datetime, timedelta
 import logging
 from typing import Dict, Optional, Tuple, Any
@@ -394,6 +394,7 @@ def grant_premium_subscription(user_id: str, duration_months: int, cursor, is_tr
     
     status = 'trial' if is_trial else 'active'
     cursor.execute(update_query, (status, now, end_date, user_id))
+    invalidate_subscription_cache(user_id)
     
     return {
         'subscription_granted': True,
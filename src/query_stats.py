@@ -0,0 +1,132 @@
+"""
+Per-request query instrumentation for the database layer.
+
+Cursors handed out by src.database.get_db record every statement here so each
+request knows how many queries it issued, how long they took, which one was the
+slowest and which normalized statements were repeated (a likely N+1 pattern).
+"""
+
+import re
+import time
+from typing import Dict, Optional
+
+import pymysql.cursors
+from flask import g, has_app_context
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_LIST = re.compile(r"\bVALUES\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Keep fingerprints short in logs
+_MAX_STATEMENT_LENGTH = 300
+
+
+def normalize_statement(sql) -> str:
+    """
+    Reduce a statement to a fingerprint so the same query with different
+    parameters is counted together.
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", errors="replace")
+    normalized = _STRING_LITERAL.sub("?", sql)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = normalized.replace("%s", "?")
+    normalized = _IN_LIST.sub("IN (?+)", normalized)
+    normalized = _VALUES_LIST.sub(r"VALUES \1+", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip().rstrip(";")
+    return normalized
+
+
+class QueryStats:
+    """Accumulates query counts and timings for a single request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+        self.fingerprints: Dict[str, Dict[str, float]] = {}
+
+    def record(self, sql, duration_ms: float):
+        fingerprint = normalize_statement(sql)
+        self.count += 1
+        self.total_ms += duration_ms
+
+        entry = self.fingerprints.get(fingerprint)
+        if entry is None:
+            entry = {"count": 0, "total_ms": 0.0}
+            self.fingerprints[fingerprint] = entry
+        entry["count"] += 1
+        entry["total_ms"] += duration_ms
+
+        if duration_ms >= self.slowest_ms:
+            self.slowest_ms = duration_ms
+            self.slowest_statement = fingerprint
+
+    def repeated(self, min_count: int = 2):
+        """Fingerprints executed at least min_count times, most frequent first"""
+        repeated = [
+            {
+                "statement": fingerprint[:_MAX_STATEMENT_LENGTH],
+                "count": entry["count"],
+                "total_ms": round(entry["total_ms"], 2),
+            }
+            for fingerprint, entry in self.fingerprints.items()
+            if entry["count"] >= min_count
+        ]
+        repeated.sort(key=lambda item: item["count"], reverse=True)
+        return repeated
+
+    def summary(self) -> Dict:
+        """Fields attached to the "Request completed" log line"""
+        return {
+            "db_query_count": self.count,
+            "db_time_ms": round(self.total_ms, 2),
+            "db_slowest_ms": round(self.slowest_ms, 2),
+            "db_slowest_statement": (self.slowest_statement or "")[:_MAX_STATEMENT_LENGTH] or None,
+            "db_repeated_statements": self.repeated()[:5],
+        }
+
+
+def get_request_stats() -> Optional[QueryStats]:
+    """Stats for the current app context, created on first use"""
+    if not has_app_context():
+        return None
+    stats = g.get("query_stats")
+    if stats is None:
+        stats = QueryStats()
+        g.query_stats = stats
+    return stats
+
+
+def record_query(sql, duration_ms: float):
+    """Record a statement against the current request (no-op outside an app context)"""
+    stats = get_request_stats()
+    if stats is not None:
+        stats.record(sql, duration_ms)
+
+
+class InstrumentedDictCursor(pymysql.cursors.DictCursor):
+    """DictCursor that times every statement and reports it to the request's QueryStats"""
+
+    _in_executemany = False
+
+    def execute(self, query, args=None):
+        if self._in_executemany:
+            return super().execute(query, args)
+        started = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            record_query(query, (time.perf_counter() - started) * 1000)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        self._in_executemany = True
+        try:
+            return super().executemany(query, args)
+        finally:
+            self._in_executemany = False
+            record_query(query, (time.perf_counter() - started) * 1000)
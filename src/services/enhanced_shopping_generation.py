@@ -82,7 +82,9 @@ class EnhancedShoppingGenerator:
             ]
             
             # Perform batch fuzzy matching
-            matching_results = self.fuzzy_service.batch_match_ingredients(user_id, ingredients_for_matching)
+            matching_results = self.fuzzy_service.batch_match_ingredients(
+                user_id, ingredients_for_matching, cursor=cursor
+            )
             
             # Process results and create shopping items
             shopping_items = []
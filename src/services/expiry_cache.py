@@ -0,0 +1,214 @@
+"""
+Expiry Prediction Cache
+
+Process-level front for the expiry_predictions table:
+- an LRU (with TTL) of predicted days per (item_name, storage_type)
+- buffered used_count increments, flushed to MySQL in batches by the background flusher
+- coalescing of concurrent misses, so only one provider call per key is in flight
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from src.logging_config import get_logger
+from src.ttl_cache import TTLCache
+
+logger = get_logger("preppr.expiry_cache")
+
+Key = Tuple[str, str]
+
+
+def make_key(item_name: str, storage_type: str) -> Key:
+    return (item_name.lower(), storage_type)
+
+
+class _InFlight:
+    """A provider call shared by every caller that missed on the same key"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ExpiryPredictionCache:
+    """
+    Args:
+        max_size: Predictions kept in memory per process
+        ttl_seconds: How long a prediction is trusted before re-reading MySQL
+        flush_interval: Seconds between used_count flushes
+        flush_threshold: Pending increments that trigger an early flush
+        coalesce_timeout: Seconds a follower waits for the leader's provider call
+    """
+
+    def __init__(self, max_size: int = 4096, ttl_seconds: int = 3600, flush_interval: float = 30.0,
+                 flush_threshold: int = 200, coalesce_timeout: float = 30.0):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.coalesce_timeout = coalesce_timeout
+        self.app = None
+
+        self._predictions = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._pending_uses: Dict[Key, int] = defaultdict(int)
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+        self._flush_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Key, _InFlight] = {}
+        self._stats = {"coalesced": 0, "provider_calls": 0, "flushes": 0}
+
+    def init_app(self, app):
+        """Apply EXPIRY_CACHE_* settings and hand buffered counts to the background flusher"""
+        self.app = app
+        self.flush_interval = app.config.get("EXPIRY_CACHE_FLUSH_INTERVAL", self.flush_interval)
+        self.flush_threshold = app.config.get("EXPIRY_CACHE_FLUSH_THRESHOLD", self.flush_threshold)
+        self._predictions.max_size = app.config.get("EXPIRY_CACHE_SIZE", self._predictions.max_size)
+        self._predictions.ttl_seconds = app.config.get("EXPIRY_CACHE_TTL_SECONDS", self._predictions.ttl_seconds)
+
+        from src.background_flush import background_flusher
+
+        background_flusher.register(self._background_flush)
+
+    # Predictions
+
+    def get(self, key: Key) -> Optional[int]:
+        return self._predictions.get(key)
+
+    def get_many(self, keys: Iterable[Key]) -> Dict[Key, int]:
+        return self._predictions.get_many(keys)
+
+    def set(self, key: Key, predicted_days: int):
+        self._predictions.set(key, predicted_days)
+
+    def set_many(self, predictions: Dict[Key, int]):
+        self._predictions.set_many(predictions)
+
+    # Coalescing
+
+    def coalesce(self, key: Key, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run compute() once per key across concurrent callers in this process.
+
+        Returns:
+            (result, is_leader) - only the leader should persist the result
+        """
+        with self._lock:
+            inflight = self._inflight.get(key)
+            is_leader = inflight is None
+            if is_leader:
+                inflight = _InFlight()
+                self._inflight[key] = inflight
+                self._stats["provider_calls"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not is_leader:
+            if not inflight.event.wait(self.coalesce_timeout):
+                logger.warning("Timed out waiting for coalesced expiry prediction", extra={"key": list(key)})
+                return None, False
+            if inflight.error is not None:
+                return None, False
+            return inflight.result, False
+
+        try:
+            inflight.result = compute()
+            return inflight.result, True
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.event.set()
+
+    # Buffered used_count
+
+    def record_use(self, key: Key, count: int = 1):
+        """Buffer a used_count increment; written when the interval or threshold is reached"""
+        self.record_uses({key: count})
+
+    def record_uses(self, counts: Dict[Key, int]):
+        with self._lock:
+            for key, count in counts.items():
+                self._pending_uses[key] += count
+                self._pending_total += count
+            over_threshold = self._pending_total >= self.flush_threshold
+
+        # Never write from the request thread; the flusher picks the counts up
+        from src.background_flush import background_flusher
+
+        if over_threshold:
+            background_flusher.wake()
+        else:
+            background_flusher.ensure_started()
+
+    def _background_flush(self, force: bool = False):
+        if force or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Write buffered used_count increments with one UPDATE per distinct increment.
+
+        Commits on get_db(), so call it from the background flusher or a CLI
+        context, not from inside a request transaction.
+        """
+        if not self._flush_lock.acquire(blocking=False):
+            return  # another thread is already flushing
+
+        try:
+            with self._lock:
+                pending = dict(self._pending_uses)
+                self._pending_uses.clear()
+                self._pending_total = 0
+                self._last_flush = time.monotonic()
+
+            if not pending:
+                return
+
+            by_increment = defaultdict(list)
+            for key, count in pending.items():
+                by_increment[count].append(key)
+
+            from src.database import get_db
+
+            conn = get_db()
+            cursor = conn.cursor()
+            try:
+                for increment, keys in by_increment.items():
+                    placeholders = ", ".join(["(%s, %s)"] * len(keys))
+                    cursor.execute(f"""
+                        UPDATE expiry_predictions
+                        SET used_count = used_count + %s
+                        WHERE (item_name, storage_type) IN ({placeholders})
+                    """, [increment] + [value for key in keys for value in key])
+                conn.commit()
+                self._stats["flushes"] += 1
+            except Exception as e:
+                conn.rollback()
+                # Put the counts back so they are retried on the next flush
+                logger.warning(f"Failed to flush expiry prediction usage counts: {e}")
+                with self._lock:
+                    for key, count in pending.items():
+                        self._pending_uses[key] += count
+                        self._pending_total += count
+            finally:
+                cursor.close()
+        finally:
+            self._flush_lock.release()
+
+    def stats(self) -> Dict:
+        stats = dict(self._stats)
+        stats.update(self._predictions.stats())
+        with self._lock:
+            stats["pending_uses"] = self._pending_total
+            stats["in_flight"] = len(self._inflight)
+        return stats
+
+
+# Global instance
+expiry_prediction_cache = ExpiryPredictionCache()
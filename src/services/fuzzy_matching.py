@@ -9,9 +9,12 @@ import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
+import numpy as np
+import pymysql
 from rapidfuzz import fuzz, process
 from src.database import get_db
 from src.logging_config import get_logger
+from src.services.similarity_cache import pantry_fingerprint, similarity_cache
 
 logger = get_logger("preppr.fuzzy_matching")
 
@@ -50,6 +53,9 @@ class FuzzyMatchingService:
     # Cache expiration (24 hours)
     CACHE_EXPIRATION_HOURS = 24
     
+    # Maximum ingredients per bulk cache read/write statement
+    CACHE_BATCH_SIZE = 500
+    
     def __init__(self):
         self.db = None
         self.cursor = None
@@ -157,28 +163,78 @@ class FuzzyMatchingService:
     def find_fuzzy_matches(self, ingredient_name: str, pantry_items: List[Dict], 
                           limit: int = 5) -> List[Tuple[Dict, float]]:
         """Find fuzzy matches for an ingredient against pantry items"""
-        normalized_ingredient = self.normalize_ingredient_name(ingredient_name)
-        
-        # Create list of pantry item names for fuzzy matching
-        pantry_names = [item['item_name'] for item in pantry_items]
-        normalized_pantry_names = [self.normalize_ingredient_name(name) for name in pantry_names]
-        
-        # Use RapidFuzz to find best matches
-        matches = process.extract(
-            normalized_ingredient, 
-            normalized_pantry_names, 
-            scorer=fuzz.ratio, 
-            limit=limit
-        )
-        
-        # Map back to original pantry items with scores
-        result = []
-        for match_name, score, index in matches:
-            pantry_item = pantry_items[index]
-            result.append((pantry_item, float(score)))
-        
-        return result
+        return self.find_fuzzy_matches_batch([ingredient_name], pantry_items, limit=limit)[0]
     
+    def _score_matrix(self, normalized_ingredients: List[str], normalized_pantry_names: List[str],
+                      workers: int = 1) -> np.ndarray:
+        """
+        Ingredient x pantry similarity matrix. Score rows already cached for this
+        pantry are reused; the rest are scored with a single cdist call.
+        """
+        unique_ingredients = list(dict.fromkeys(normalized_ingredients))
+        unique_pantry_names = list(dict.fromkeys(normalized_pantry_names))
+        fingerprint = pantry_fingerprint(unique_pantry_names)
+        
+        rows = similarity_cache.get_rows(fingerprint, unique_ingredients)
+        missing = [ingredient for ingredient in unique_ingredients if ingredient not in rows]
+        if missing:
+            computed = process.cdist(
+                missing,
+                unique_pantry_names,
+                scorer=fuzz.ratio,
+                dtype=np.float64,
+                workers=workers
+            )
+            new_rows = dict(zip(missing, computed))
+            similarity_cache.set_rows(fingerprint, new_rows)
+            rows.update(new_rows)
+        
+        unique_scores = np.vstack([rows[ingredient] for ingredient in unique_ingredients])
+        if len(unique_ingredients) == len(normalized_ingredients) and len(unique_pantry_names) == len(normalized_pantry_names):
+            return unique_scores
+        
+        # Expand back to the original (possibly repeated) names
+        ingredient_index = {name: index for index, name in enumerate(unique_ingredients)}
+        pantry_index = {name: index for index, name in enumerate(unique_pantry_names)}
+        return unique_scores[np.ix_(
+            [ingredient_index[name] for name in normalized_ingredients],
+            [pantry_index[name] for name in normalized_pantry_names]
+        )]
+    
+    def find_fuzzy_matches_batch(self, ingredient_names: List[str], pantry_items: List[Dict],
+                                 limit: int = 5, workers: int = 1) -> List[List[Tuple[Dict, float]]]:
+        """
+        Find fuzzy matches for many ingredients at once.
+
+        The pantry is normalized once and the full ingredient x pantry score matrix is
+        built in one pass: score rows already cached for the same pantry contents are
+        reused and the rest are computed with a single rapidfuzz cdist call. Results are ordered by
+        score descending, pantry order on ties (the same as process.extract).
+
+        Args:
+            ingredient_names: Ingredient names to match
+            pantry_items: Pantry rows as returned by get_pantry_items
+            limit: Maximum matches per ingredient
+            workers: Threads used by cdist (-1 uses all cores)
+        """
+        if not ingredient_names:
+            return []
+        if not pantry_items:
+            return [[] for _ in ingredient_names]
+
+        normalized_ingredients = [self.normalize_ingredient_name(name) for name in ingredient_names]
+        normalized_pantry_names = [self.normalize_ingredient_name(item['item_name']) for item in pantry_items]
+
+        scores = self._score_matrix(normalized_ingredients, normalized_pantry_names, workers=workers)
+
+        # Stable sort on negated scores keeps pantry order for ties, like process.extract
+        top_indices = np.argsort(-scores, axis=1, kind='stable')[:, :limit]
+
+        results = []
+        for row, indices in enumerate(top_indices):
+            results.append([(pantry_items[index], float(scores[row, index])) for index in indices])
+        return results
+
     def classify_match(self, confidence_score: float) -> str:
         """Classify match based on confidence score"""
         if confidence_score >= self.AUTO_MATCH_THRESHOLD:
@@ -188,24 +244,44 @@ class FuzzyMatchingService:
         else:
             return 'missing'
     
-    def get_cached_suggestions(self, user_id: str, ingredient_name: str) -> Optional[List[Dict]]:
+    def get_pantry_version(self, user_id: str) -> int:
+        """
+        Get the user's current pantry version
+        
+        The version is bumped by triggers on pantry_items, so cached suggestions
+        computed against an older version are no longer valid.
+        """
+        db, cursor = self._get_db_connection()
+        
+        cursor.execute(
+            "SELECT version FROM user_pantry_versions WHERE user_id = %s",
+            [user_id]
+        )
+        result = cursor.fetchone()
+        return int(result['version']) if result else 0
+    
+    def get_cached_suggestions(self, user_id: str, ingredient_name: str,
+                               pantry_version: Optional[int] = None) -> Optional[List[Dict]]:
         """Get cached fuzzy match suggestions for an ingredient"""
         try:
             db, cursor = self._get_db_connection()
             
-            # Check for non-stale cached suggestions
+            if pantry_version is None:
+                pantry_version = self.get_pantry_version(user_id)
+            
+            # Only suggestions computed against the current pantry version are valid
             query = """
                 SELECT suggested_matches, computed_at 
                 FROM ingredient_match_suggestions 
                 WHERE user_id = %s AND ingredient_name = %s 
-                  AND is_stale = FALSE 
+                  AND pantry_version = %s 
                   AND (expires_at IS NULL OR expires_at > NOW())
                 ORDER BY computed_at DESC 
                 LIMIT 1
             """
             
             logger.debug(f"Executing cache query for user_id={user_id}, ingredient={ingredient_name}")
-            cursor.execute(query, [user_id, ingredient_name])
+            cursor.execute(query, [user_id, ingredient_name, pantry_version])
             result = cursor.fetchone()
             
             logger.debug(f"Cache query result type: {type(result)}, value: {result}")
@@ -226,31 +302,228 @@ class FuzzyMatchingService:
             logger.error(f"Error in get_cached_suggestions: {e}", exc_info=True)
             return None
     
-    def cache_suggestions(self, user_id: str, ingredient_name: str, suggestions: List[Dict]):
+    def cache_suggestions(self, user_id: str, ingredient_name: str, suggestions: List[Dict],
+                          pantry_version: Optional[int] = None):
         """Cache fuzzy match suggestions for future use"""
         db, cursor = self._get_db_connection()
         
+        if pantry_version is None:
+            pantry_version = self.get_pantry_version(user_id)
+        
         suggestions_json = json.dumps(suggestions)
         expires_at = datetime.now() + timedelta(hours=self.CACHE_EXPIRATION_HOURS)
         
         # Upsert cached suggestions
         query = """
             INSERT INTO ingredient_match_suggestions 
-            (user_id, ingredient_name, suggested_matches, expires_at)
-            VALUES (%s, %s, %s, %s)
+            (user_id, ingredient_name, suggested_matches, pantry_version, expires_at)
+            VALUES (%s, %s, %s, %s, %s)
             ON DUPLICATE KEY UPDATE 
                 suggested_matches = VALUES(suggested_matches),
+                pantry_version = VALUES(pantry_version),
                 computed_at = CURRENT_TIMESTAMP,
                 expires_at = VALUES(expires_at),
                 is_stale = FALSE
         """
         
-        cursor.execute(query, [user_id, ingredient_name, suggestions_json, expires_at])
+        cursor.execute(query, [user_id, ingredient_name, suggestions_json, pantry_version, expires_at])
         db.commit()
         
         logger.debug(f"Cached suggestions for {ingredient_name}", 
                     extra={'user_id': user_id, 'ingredient': ingredient_name})
     
+    def get_cached_suggestions_batch(self, user_id: str, ingredient_names: List[str],
+                                     pantry_version: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """
+        Get cached fuzzy match suggestions for many ingredients in one query
+        
+        Returns:
+            Dict mapping ingredient name to its cached suggestions (misses are omitted)
+        """
+        names = list(dict.fromkeys(ingredient_names))
+        if not names:
+            return {}
+        
+        cached = {}
+        try:
+            db, cursor = self._get_db_connection()
+            
+            if pantry_version is None:
+                pantry_version = self.get_pantry_version(user_id)
+            
+            for start in range(0, len(names), self.CACHE_BATCH_SIZE):
+                chunk = names[start:start + self.CACHE_BATCH_SIZE]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                query = f"""
+                    SELECT ingredient_name, suggested_matches
+                    FROM ingredient_match_suggestions 
+                    WHERE user_id = %s AND ingredient_name IN ({placeholders})
+                      AND pantry_version = %s 
+                      AND (expires_at IS NULL OR expires_at > NOW())
+                """
+                cursor.execute(query, [user_id] + chunk + [pantry_version])
+                
+                for row in cursor.fetchall():
+                    try:
+                        suggestions = json.loads(row['suggested_matches'])
+                    except (json.JSONDecodeError, KeyError, TypeError) as e:
+                        logger.warning(f"Failed to parse cached suggestions for {row.get('ingredient_name')}: {e}")
+                        continue
+                    if suggestions:
+                        cached[row['ingredient_name']] = suggestions
+            
+            logger.debug(f"Cache lookup for {len(names)} ingredients returned {len(cached)} hits",
+                         extra={'user_id': user_id})
+            return cached
+            
+        except Exception as e:
+            logger.error(f"Error in get_cached_suggestions_batch: {e}", exc_info=True)
+            return cached
+    
+    def cache_suggestions_batch(self, user_id: str, suggestions_by_name: Dict[str, List[Dict]],
+                                pantry_version: Optional[int] = None, cursor=None):
+        """
+        Cache fuzzy match suggestions for many ingredients with one upsert
+        
+        The rows are written in the current transaction of the request connection
+        and are committed by the caller; this never commits or rolls back, since
+        callers such as meal plan generation have their own writes in flight.
+        A statement-level failure (bad data, duplicate key) is logged and skipped,
+        since MySQL discards only that statement. OperationalErrors are re-raised:
+        a deadlock or lock wait timeout can roll back the whole transaction, and
+        the caller must not go on writing and commit half of its work.
+        """
+        if not suggestions_by_name:
+            return
+        
+        own_cursor = cursor is None
+        if own_cursor:
+            cursor = get_db().cursor()
+        
+        if pantry_version is None:
+            pantry_version = self.get_pantry_version(user_id)
+        
+        expires_at = datetime.now() + timedelta(hours=self.CACHE_EXPIRATION_HOURS)
+        rows = [
+            (user_id, ingredient_name, json.dumps(suggestions), pantry_version, expires_at)
+            for ingredient_name, suggestions in suggestions_by_name.items()
+        ]
+        
+        try:
+            for start in range(0, len(rows), self.CACHE_BATCH_SIZE):
+                chunk = rows[start:start + self.CACHE_BATCH_SIZE]
+                placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(chunk))
+                query = f"""
+                    INSERT INTO ingredient_match_suggestions 
+                    (user_id, ingredient_name, suggested_matches, pantry_version, expires_at)
+                    VALUES {placeholders}
+                    ON DUPLICATE KEY UPDATE 
+                        suggested_matches = VALUES(suggested_matches),
+                        pantry_version = VALUES(pantry_version),
+                        computed_at = CURRENT_TIMESTAMP,
+                        expires_at = VALUES(expires_at),
+                        is_stale = FALSE
+                """
+                cursor.execute(query, [value for row in chunk for value in row])
+        except pymysql.err.OperationalError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to cache suggestions for {len(rows)} ingredients: {e}",
+                           extra={'user_id': user_id})
+            return
+        finally:
+            if own_cursor:
+                cursor.close()
+        
+        logger.debug(f"Cached suggestions for {len(rows)} ingredients", extra={'user_id': user_id})
+    
+    def _matches_from_cache(self, ingredient_name: str, cached_suggestions: List[Dict]) -> List[IngredientMatch]:
+        """Rebuild IngredientMatch objects from cached suggestions"""
+        matches = []
+        for suggestion in cached_suggestions:
+            match = IngredientMatch(
+                ingredient_name=ingredient_name,
+                pantry_item_name=suggestion['pantry_item_name'],
+                pantry_item_id=suggestion['pantry_item_id'],
+                available_quantity=suggestion['available_quantity'],
+                available_unit=suggestion['available_unit'],
+                confidence_score=suggestion['confidence_score'],
+                match_type=suggestion['match_type'],
+                storage_type=suggestion.get('storage_type', 'pantry'),
+                expiration_date=suggestion.get('expiration_date')
+            )
+            matches.append(match)
+        return matches
+    
+    def _matches_from_fuzzy(self, ingredient_name: str,
+                            fuzzy_matches: List[Tuple[Dict, float]]) -> Tuple[List[IngredientMatch], List[Dict]]:
+        """Convert fuzzy matches to IngredientMatch objects plus their cacheable form"""
+        matches = []
+        suggestions_to_cache = []
+        
+        for pantry_item, confidence in fuzzy_matches:
+            match_type = self.classify_match(confidence)
+            
+            match = IngredientMatch(
+                ingredient_name=ingredient_name,
+                pantry_item_name=pantry_item['item_name'],
+                pantry_item_id=pantry_item['pantry_item_id'],
+                available_quantity=float(pantry_item['quantity']),
+                available_unit=pantry_item['unit'],
+                confidence_score=confidence,
+                match_type=match_type,
+                storage_type=pantry_item['storage_type'],
+                expiration_date=str(pantry_item['expiration_date']) if pantry_item['expiration_date'] else None
+            )
+            matches.append(match)
+            
+            # Prepare for caching
+            suggestions_to_cache.append({
+                'pantry_item_name': match.pantry_item_name,
+                'pantry_item_id': match.pantry_item_id,
+                'available_quantity': match.available_quantity,
+                'available_unit': match.available_unit,
+                'confidence_score': match.confidence_score,
+                'match_type': match.match_type,
+                'storage_type': match.storage_type,
+                'expiration_date': match.expiration_date
+            })
+        
+        return matches, suggestions_to_cache
+    
+    def _build_matching_result(self, ingredient_name: str, required_quantity: float,
+                               required_unit: str, matches: List[IngredientMatch]) -> MatchingResult:
+        """Determine best match and calculate how much still needs to be bought"""
+        best_match = matches[0] if matches else None
+        overall_match_type = best_match.match_type if best_match else 'missing'
+        needs_to_buy = required_quantity
+        
+        if best_match and best_match.match_type in ['auto', 'confirm']:
+            # Calculate how much is still needed after using pantry item
+            available_in_required_unit = self._convert_units(
+                best_match.available_quantity, 
+                best_match.available_unit, 
+                required_unit
+            )
+            
+            if available_in_required_unit is not None:
+                needs_to_buy = max(0, required_quantity - available_in_required_unit)
+            else:
+                # If conversion fails, assume we need to buy the full amount
+                # but log this for improvement
+                logger.warning(f"Unit conversion failed: {best_match.available_unit} -> {required_unit}")
+                needs_to_buy = required_quantity
+        
+        return MatchingResult(
+            ingredient_name=ingredient_name,
+            required_quantity=required_quantity,
+            required_unit=required_unit,
+            matches=matches,
+            best_match=best_match,
+            match_type=overall_match_type,
+            needs_to_buy=needs_to_buy
+        )
+    
     def match_ingredient_to_pantry(self, user_id: str, ingredient_name: str, 
                                  required_quantity: float = 1.0, 
                                  required_unit: str = 'pcs') -> MatchingResult:
@@ -266,25 +539,15 @@ class FuzzyMatchingService:
         Returns:
             MatchingResult with matches and recommendations
         """
+        # Read the pantry version before the pantry so a concurrent change invalidates what we cache
+        pantry_version = self.get_pantry_version(user_id)
+        
         # Check cache first
-        cached_suggestions = self.get_cached_suggestions(user_id, ingredient_name)
+        cached_suggestions = self.get_cached_suggestions(user_id, ingredient_name, pantry_version)
         
         if cached_suggestions:
             # Use cached results
-            matches = []
-            for suggestion in cached_suggestions:
-                match = IngredientMatch(
-                    ingredient_name=ingredient_name,
-                    pantry_item_name=suggestion['pantry_item_name'],
-                    pantry_item_id=suggestion['pantry_item_id'],
-                    available_quantity=suggestion['available_quantity'],
-                    available_unit=suggestion['available_unit'],
-                    confidence_score=suggestion['confidence_score'],
-                    match_type=suggestion['match_type'],
-                    storage_type=suggestion.get('storage_type', 'pantry'),
-                    expiration_date=suggestion.get('expiration_date')
-                )
-                matches.append(match)
+            matches = self._matches_from_cache(ingredient_name, cached_suggestions)
         else:
             # Perform fresh fuzzy matching
             pantry_items = self.get_pantry_items(user_id)
@@ -303,98 +566,72 @@ class FuzzyMatchingService:
             
             # Find fuzzy matches
             fuzzy_matches = self.find_fuzzy_matches(ingredient_name, pantry_items)
-            
-            # Convert to IngredientMatch objects
-            matches = []
-            suggestions_to_cache = []
-            
-            for pantry_item, confidence in fuzzy_matches:
-                match_type = self.classify_match(confidence)
-                
-                match = IngredientMatch(
-                    ingredient_name=ingredient_name,
-                    pantry_item_name=pantry_item['item_name'],
-                    pantry_item_id=pantry_item['pantry_item_id'],
-                    available_quantity=float(pantry_item['quantity']),
-                    available_unit=pantry_item['unit'],
-                    confidence_score=confidence,
-                    match_type=match_type,
-                    storage_type=pantry_item['storage_type'],
-                    expiration_date=str(pantry_item['expiration_date']) if pantry_item['expiration_date'] else None
-                )
-                matches.append(match)
-                
-                # Prepare for caching
-                suggestions_to_cache.append({
-                    'pantry_item_name': match.pantry_item_name,
-                    'pantry_item_id': match.pantry_item_id,
-                    'available_quantity': match.available_quantity,
-                    'available_unit': match.available_unit,
-                    'confidence_score': match.confidence_score,
-                    'match_type': match.match_type,
-                    'storage_type': match.storage_type,
-                    'expiration_date': match.expiration_date
-                })
+            matches, suggestions_to_cache = self._matches_from_fuzzy(ingredient_name, fuzzy_matches)
             
             # Cache the suggestions
             if suggestions_to_cache:
-                self.cache_suggestions(user_id, ingredient_name, suggestions_to_cache)
-        
-        # Determine best match and calculate needs
-        best_match = matches[0] if matches else None
-        overall_match_type = best_match.match_type if best_match else 'missing'
-        needs_to_buy = required_quantity
+                self.cache_suggestions(user_id, ingredient_name, suggestions_to_cache, pantry_version)
         
-        if best_match and best_match.match_type in ['auto', 'confirm']:
-            # Calculate how much is still needed after using pantry item
-            available_in_required_unit = self._convert_units(
-                best_match.available_quantity, 
-                best_match.available_unit, 
-                required_unit
-            )
-            
-            if available_in_required_unit is not None:
-                needs_to_buy = max(0, required_quantity - available_in_required_unit)
-            else:
-                # If conversion fails, assume we need to buy the full amount
-                # but log this for improvement
-                logger.warning(f"Unit conversion failed: {best_match.available_unit} -> {required_unit}")
-                needs_to_buy = required_quantity
-        
-        return MatchingResult(
-            ingredient_name=ingredient_name,
-            required_quantity=required_quantity,
-            required_unit=required_unit,
-            matches=matches,
-            best_match=best_match,
-            match_type=overall_match_type,
-            needs_to_buy=needs_to_buy
-        )
+        return self._build_matching_result(ingredient_name, required_quantity, required_unit, matches)
     
     def batch_match_ingredients(self, user_id: str, 
-                              ingredients: List[Dict]) -> List[MatchingResult]:
+                              ingredients: List[Dict], workers: int = 1, cursor=None) -> List[MatchingResult]:
         """
         Match multiple ingredients to pantry items in batch
         
+        Cached suggestions are used where available. All remaining ingredients are
+        scored against the pantry in one pass: the pantry is fetched and normalized
+        once and the ingredient x pantry matrix is computed with a single cdist call.
+        
         Args:
             user_id: User ID
             ingredients: List of dicts with keys: ingredient_name, quantity, unit
+            workers: Threads used for scoring (-1 uses all cores)
+            cursor: Cursor of the caller's transaction for the cache writes; the
+                caller commits either way
             
         Returns:
-            List of MatchingResult objects
+            List of MatchingResult objects, in the same order as ingredients
         """
-        results = []
+        matches_by_name: Dict[str, List[IngredientMatch]] = {}
+        unique_names = list(dict.fromkeys(ingredient['ingredient_name'] for ingredient in ingredients))
         
-        for ingredient in ingredients:
-            result = self.match_ingredient_to_pantry(
-                user_id=user_id,
-                ingredient_name=ingredient['ingredient_name'],
-                required_quantity=float(ingredient.get('quantity', 1.0)),
-                required_unit=ingredient.get('unit', 'pcs')
-            )
-            results.append(result)
+        # Read the pantry version before the pantry so a concurrent change invalidates what we cache
+        pantry_version = self.get_pantry_version(user_id)
         
-        logger.info(f"Batch matched {len(ingredients)} ingredients for user {user_id}")
+        # One query for every cached ingredient
+        cached = self.get_cached_suggestions_batch(user_id, unique_names, pantry_version)
+        for ingredient_name, cached_suggestions in cached.items():
+            matches_by_name[ingredient_name] = self._matches_from_cache(ingredient_name, cached_suggestions)
+        
+        uncached_names = [name for name in unique_names if name not in matches_by_name]
+        
+        if uncached_names:
+            pantry_items = self.get_pantry_items(user_id)
+            fuzzy_results = self.find_fuzzy_matches_batch(uncached_names, pantry_items, workers=workers)
+            
+            suggestions_by_name = {}
+            for ingredient_name, fuzzy_matches in zip(uncached_names, fuzzy_results):
+                matches, suggestions_to_cache = self._matches_from_fuzzy(ingredient_name, fuzzy_matches)
+                matches_by_name[ingredient_name] = matches
+                if suggestions_to_cache:
+                    suggestions_by_name[ingredient_name] = suggestions_to_cache
+            
+            # One upsert for every miss, committed with the caller's transaction
+            self.cache_suggestions_batch(user_id, suggestions_by_name, pantry_version, cursor=cursor)
+        
+        results = []
+        for ingredient in ingredients:
+            ingredient_name = ingredient['ingredient_name']
+            results.append(self._build_matching_result(
+                ingredient_name,
+                float(ingredient.get('quantity', 1.0)),
+                ingredient.get('unit', 'pcs'),
+                matches_by_name.get(ingredient_name, [])
+            ))
+        
+        logger.info(f"Batch matched {len(ingredients)} ingredients for user {user_id}",
+                    extra={'user_id': user_id, 'cache_misses': len(uncached_names)})
         return results
     
     def record_user_feedback(self, user_id: str, ingredient_name: str, 
@@ -0,0 +1,164 @@
+"""
+Ingredient Consolidation
+
+Turns the template ingredient rows of a meal plan into shopping list lines in
+linear time. Ingredients are grouped by (canonical name, unit dimension), so
+"200 g rice" and "1 kg rice" add up while "2 cups rice" becomes a separate line
+instead of being added to the grams. Quantities are summed in the dimension's
+base unit and reported in the first unit seen for the group.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Unit alias -> (dimension, factor to the dimension's base unit)
+# Base units: grams for weight, milliliters for volume, pieces for counts
+UNITS: Dict[str, Tuple[str, float]] = {
+    # Weight
+    'g': ('weight', 1), 'gram': ('weight', 1),
+    'kg': ('weight', 1000), 'kilogram': ('weight', 1000),
+    'lb': ('weight', 453.592), 'pound': ('weight', 453.592),
+    'oz': ('weight', 28.3495), 'ounce': ('weight', 28.3495),
+
+    # Volume
+    'ml': ('volume', 1), 'milliliter': ('volume', 1),
+    'l': ('volume', 1000), 'liter': ('volume', 1000),
+    'cup': ('volume', 240),
+    'tbsp': ('volume', 15), 'tablespoon': ('volume', 15),
+    'tsp': ('volume', 5), 'teaspoon': ('volume', 5),
+    'fl oz': ('volume', 29.5735), 'fluid ounce': ('volume', 29.5735),
+    'pint': ('volume', 473.176),
+    'quart': ('volume', 946.353),
+    'gallon': ('volume', 3785.41),
+
+    # Count
+    'pc': ('count', 1), 'pcs': ('count', 1), 'piece': ('count', 1),
+    'count': ('count', 1), 'item': ('count', 1), 'unit': ('count', 1), '': ('count', 1),
+}
+
+
+def canonical_ingredient_name(name: str) -> str:
+    """Lowercased name with collapsed whitespace"""
+    return " ".join(str(name or "").lower().split())
+
+
+def unit_dimension(unit: Optional[str]) -> Tuple[str, float]:
+    """
+    Dimension and base-unit factor for a unit.
+
+    Unknown units ("clove", "pinch") get a dimension of their own, so they are
+    only ever added to the same unit.
+    """
+    unit = " ".join(str(unit or "").lower().split()).rstrip('.')
+    if unit in UNITS:
+        return UNITS[unit]
+    singular = unit.rstrip('s')
+    if singular in UNITS:
+        return UNITS[singular]
+    return (f"unit:{singular}", 1)
+
+
+@dataclass
+class ConsolidatedIngredient:
+    """One shopping list line: an ingredient in one unit dimension"""
+    name: str
+    unit: str
+    dimension: str
+    base_quantity: float = 0.0
+    total_cost: float = 0.0
+    meals_using: List[int] = field(default_factory=list)
+    unit_factor: float = 1.0
+
+    @property
+    def total_quantity(self) -> float:
+        """Total in the reported unit"""
+        return round(self.base_quantity / self.unit_factor, 2)
+
+
+def consolidate_ingredients(ingredients: Iterable[Dict], meals: Iterable[Dict]) -> List[ConsolidatedIngredient]:
+    """
+    Consolidate template ingredient rows for the meals of a plan.
+
+    Args:
+        ingredients: Rows with template_id, ingredient_name, quantity, unit, estimated_cost
+        meals: Rows with meal_id and template_id
+
+    Returns:
+        Consolidated lines in first-seen order
+    """
+    # template -> meals using it, built once instead of scanning meals per ingredient
+    meals_by_template: Dict[int, List[int]] = {}
+    for meal in meals:
+        meals_by_template.setdefault(meal["template_id"], []).append(meal["meal_id"])
+
+    consolidated: Dict[Tuple[str, str], ConsolidatedIngredient] = {}
+    seen_meals: Dict[Tuple[str, str], set] = {}
+
+    for ingredient in ingredients:
+        dimension, factor = unit_dimension(ingredient["unit"])
+        key = (canonical_ingredient_name(ingredient["ingredient_name"]), dimension)
+
+        item = consolidated.get(key)
+        if item is None:
+            item = consolidated[key] = ConsolidatedIngredient(
+                name=ingredient["ingredient_name"],
+                unit=ingredient["unit"],
+                dimension=dimension,
+                unit_factor=factor,
+            )
+            seen_meals[key] = set()
+
+        item.base_quantity += float(ingredient["quantity"] or 0) * factor
+        item.total_cost += float(ingredient["estimated_cost"] or 0)
+
+        # Track which meals use this ingredient
+        for meal_id in meals_by_template.get(ingredient["template_id"], []):
+            if meal_id not in seen_meals[key]:
+                seen_meals[key].add(meal_id)
+                item.meals_using.append(meal_id)
+
+    return list(consolidated.values())
+
+
+def insert_session_shopping_list(cursor, session_id, rows: List[Tuple]):
+    """
+    Write session_shopping_lists lines with one multi-row insert.
+
+    Args:
+        rows: (ingredient_name, total_quantity, unit, estimated_cost, category, meals_using) tuples
+    """
+    if not rows:
+        return
+    cursor.executemany("""
+        INSERT INTO session_shopping_lists (
+            session_id, ingredient_name, total_quantity, unit,
+            estimated_cost, category, meals_using
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            total_quantity = total_quantity + VALUES(total_quantity),
+            estimated_cost = estimated_cost + VALUES(estimated_cost)
+    """, [
+        (session_id, name, quantity, unit, cost, category, json.dumps(meals_using))
+        for name, quantity, unit, cost, category, meals_using in rows
+    ])
+
+
+def insert_generation_matches(cursor, generation_id, rows: List[Tuple]):
+    """
+    Write generation_ingredient_matches rows with one multi-row insert.
+
+    Args:
+        rows: (ingredient_name, required_quantity, required_unit, pantry_item_id,
+            pantry_available_quantity, match_confidence, match_type,
+            needs_to_buy_quantity, estimated_cost) tuples
+    """
+    if not rows:
+        return
+    cursor.executemany("""
+        INSERT INTO generation_ingredient_matches
+        (generation_id, ingredient_name, required_quantity, required_unit,
+         pantry_item_id, pantry_available_quantity, match_confidence,
+         match_type, needs_to_buy_quantity, estimated_cost)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, [(generation_id,) + tuple(row) for row in rows])
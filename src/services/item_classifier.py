@@ -0,0 +1,173 @@
+"""
+Keyword Classifier for Food Items
+
+Replaces the per-call if/elif keyword chains with precompiled rule sets. All
+keywords of a rule set are compiled into one alternation regex, so an item name
+is scanned once; when several rules match, the earliest rule wins (the same
+precedence the old chains had).
+
+Regression table (item name -> pantry category, shopping section):
+
+>>> names = ["pineapple", "grapefruit", "cornbread", "flatbread", "shellfish",
+...          "swordfish", "cornflour", "oatmilk", "apples", "buttermilk", "pecans", "steak"]
+>>> for name in names:
+...     print(name, PANTRY_CLASSIFIER.classify(name).category, SHOPPING_CLASSIFIER.classify(name).category, sep=" | ")
+pineapple | Produce | Produce
+grapefruit | Produce | Other
+cornbread | Bread | Grains
+flatbread | Bread | Grains
+shellfish | Meat | Meat & Seafood
+swordfish | Meat | Meat & Seafood
+cornflour | Baking Supplies | Grains
+oatmilk | Dairy | Dairy
+apples | Produce | Produce
+buttermilk | Dairy | Dairy
+pecans | Other | Other
+steak | Other | Other
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class Classification:
+    """Category and base shelf life (days, before storage adjustment) for an item"""
+    category: str
+    days: Optional[int] = None
+
+
+class KeywordClassifier:
+    """
+    Ordered keyword rules compiled into a single regex.
+
+    Keywords must start at a word boundary but may continue into a longer word,
+    so "apple" matches "apples" and "butter" matches "buttermilk", while "can"
+    no longer matches "pecans" and "tea" no longer matches "steak". Compound
+    keywords may also end a longer word ("pineapple", "swordfish").
+
+    Args:
+        rules: Ordered (category, base_days, keywords) tuples; earlier rules win
+        default: Classification returned when no keyword matches
+        compound_keywords: Keywords that also match inside a word
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, Optional[int], Sequence[str]]], default: Classification,
+                 compound_keywords: Iterable[str] = ()):
+        self.default = default
+        self._classifications: List[Classification] = []
+        keyword_priority: Dict[str, int] = {}
+
+        for priority, (category, days, keywords) in enumerate(rules):
+            self._classifications.append(Classification(category, days))
+            for keyword in keywords:
+                # A keyword listed under several rules belongs to the first one
+                keyword_priority.setdefault(keyword.lower(), priority)
+
+        self._keyword_priority = keyword_priority
+        # Longest first so "canned" wins over "can" at the same position. The lookahead
+        # keeps matches zero-width, so overlapping keywords ("cream" inside "ice cream")
+        # are all seen, as with the old substring checks.
+        alternation = "|".join(
+            re.escape(keyword) for keyword in sorted(keyword_priority, key=len, reverse=True)
+        )
+        compounds = sorted(
+            (keyword.lower() for keyword in compound_keywords if keyword.lower() in keyword_priority),
+            key=len, reverse=True
+        )
+        if compounds:
+            # Word starts try every keyword; other positions only the compound ones
+            compound_alternation = "|".join(re.escape(keyword) for keyword in compounds)
+            self._pattern = re.compile(rf"\b(?=({alternation}))|\B(?=({compound_alternation}))")
+        else:
+            self._pattern = re.compile(rf"\b(?=({alternation}))")
+
+    def classify(self, name: str) -> Classification:
+        """Classify a single item name"""
+        best = None
+        for match in self._pattern.finditer(name.lower()):
+            priority = self._keyword_priority[match.group(match.lastindex)]
+            if best is None or priority < best:
+                best = priority
+                if best == 0:
+                    break
+        return self._classifications[best] if best is not None else self.default
+
+    def classify_many(self, names: Iterable[str]) -> List[Classification]:
+        """Classify a list of item names, scanning each distinct name once"""
+        names = list(names)
+        results = {name: self.classify(name) for name in set(names)}
+        return [results[name] for name in names]
+
+
+# Keywords that name the food at the end of compound words (pineapple, grapefruit,
+# cornbread, shellfish, cornflour, oatmilk); short or ambiguous keywords such as
+# "can", "tea" or "oil" stay word-start only
+COMPOUND_KEYWORDS = ["apple", "fruit", "bread", "fish", "flour", "milk"]
+
+# Pantry categories with base shelf life in days (fridge/pantry)
+PANTRY_CLASSIFIER = KeywordClassifier(
+    rules=[
+        ("Dairy", 14, ["milk", "dairy", "yogurt", "cheese", "butter", "cream"]),
+        ("Meat", 3, ["meat", "chicken", "beef", "pork", "fish", "turkey", "lamb"]),
+        ("Bread", 5, ["bread", "bagel", "muffin", "baguette", "roll"]),
+        ("Produce", 7, ["apple", "banana", "orange", "fruit", "vegetable", "lettuce", "carrot", "tomato", "onion", "potato"]),
+        ("Grains", 365, ["rice", "pasta", "grain", "cereal", "oats", "quinoa", "barley"]),
+        ("Canned Goods", 730, ["canned", "can", "jar"]),
+        ("Frozen Foods", 90, ["frozen", "ice cream"]),
+        ("Beverages", 30, ["juice", "soda", "water", "beer", "wine", "coffee", "tea"]),
+        ("Snacks", 60, ["chips", "crackers", "cookies", "candy", "chocolate"]),
+        ("Condiments", 180, ["ketchup", "mustard", "mayo", "sauce", "dressing", "vinegar"]),
+        ("Spices", 1095, ["salt", "pepper", "spice", "herb", "oregano", "basil", "thyme"]),
+        ("Fresh Herbs", 7, ["parsley", "cilantro", "mint", "dill", "chives"]),
+        ("Oils & Vinegars", 365, ["oil", "olive oil", "coconut oil", "vinegar", "balsamic"]),
+        ("Baking Supplies", 730, ["flour", "sugar", "baking powder", "baking soda", "vanilla", "cocoa"]),
+    ],
+    default=Classification("Other"),
+    compound_keywords=COMPOUND_KEYWORDS,
+)
+
+# Shopping list sections for consolidated ingredients
+SHOPPING_CLASSIFIER = KeywordClassifier(
+    rules=[
+        ("Produce", None, ["apple", "banana", "orange", "lettuce", "tomato", "potato", "carrot", "onion"]),
+        ("Meat & Seafood", None, ["chicken", "beef", "pork", "fish", "meat"]),
+        ("Dairy", None, ["milk", "cheese", "yogurt", "butter", "egg"]),
+        ("Grains", None, ["rice", "pasta", "bread", "flour"]),
+        ("Condiments", None, ["oil", "salt", "pepper", "spice"]),
+    ],
+    default=Classification("Other"),
+    compound_keywords=COMPOUND_KEYWORDS,
+)
+
+# Shelf-life multiplier per storage type
+STORAGE_MULTIPLIER = {"freezer": 30, "fridge": 1, "pantry": 1}
+
+# Shelf life for items no rule matches
+DEFAULT_DAYS = {"pantry": 30, "fridge": 14}
+DEFAULT_FREEZER_DAYS = 90
+
+
+def predict_shelf_life(name: str, storage_type: str) -> Dict:
+    """Heuristic expiration days and pantry category for an item in the given storage"""
+    classification = PANTRY_CLASSIFIER.classify(name)
+    return _shelf_life(classification, storage_type)
+
+
+def predict_shelf_life_many(items: Iterable[Tuple[str, str]]) -> List[Dict]:
+    """predict_shelf_life for a list of (name, storage_type) pairs"""
+    items = list(items)
+    classifications = PANTRY_CLASSIFIER.classify_many(name for name, _ in items)
+    return [
+        _shelf_life(classification, storage_type)
+        for classification, (_, storage_type) in zip(classifications, items)
+    ]
+
+
+def _shelf_life(classification: Classification, storage_type: str) -> Dict:
+    if classification.days is None:
+        days = DEFAULT_DAYS.get(storage_type, DEFAULT_FREEZER_DAYS)
+    else:
+        days = classification.days * STORAGE_MULTIPLIER.get(storage_type, 1)
+    return {"days": days, "category": classification.category}
@@ -0,0 +1,247 @@
+"""
+Meal Plan Response Cache
+
+Parsed AI meal plans are cached by a hash of the normalized generation inputs, so
+users asking for the same kind of plan (days, diet, budget bracket, cooking time,
+ingredients) are served without another provider call. An in-process LRU sits in
+front of the llm_meal_plan_cache table shared by all workers. New plans and
+hit_count increments are buffered and written by the background flusher.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+from flask import g, has_app_context, jsonify, session
+from src.logging_config import get_logger
+from src.ttl_cache import TTLCache
+
+logger = get_logger("preppr.meal_plan_cache")
+
+# Bump when _build_meal_plan_prompt changes in a way that should invalidate cached plans
+PROMPT_VERSION = 1
+
+
+class MealPlanCache:
+    """
+    Two-tier cache of parsed meal plan JSON.
+
+    Args:
+        max_size: Plans kept in the in-process LRU
+        ttl_seconds: Lifetime of a cached plan (both tiers)
+        budget_bucket: Budgets are rounded to this many dollars when building the key
+        enabled: Whether lookups and stores happen at all
+    """
+
+    def __init__(self, max_size: int = 256, ttl_seconds: int = 7 * 24 * 3600,
+                 budget_bucket: float = 10.0, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.budget_bucket = budget_bucket
+        self.enabled = enabled
+        self._local = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._stats = {"db_hits": 0, "misses": 0, "stores": 0, "errors": 0}
+        self._pending_plans: Dict[str, Dict] = {}
+        self._pending_hits = Counter()
+        self._pending_lock = threading.Lock()
+
+    def init_app(self, app):
+        """Apply MEAL_PLAN_CACHE_* settings and expose cache metrics"""
+        self.enabled = app.config.get("MEAL_PLAN_CACHE_ENABLED", self.enabled)
+        self.ttl_seconds = app.config.get("MEAL_PLAN_CACHE_TTL_SECONDS", self.ttl_seconds)
+        self.budget_bucket = app.config.get("MEAL_PLAN_CACHE_BUDGET_BUCKET", self.budget_bucket)
+        self._local.max_size = app.config.get("MEAL_PLAN_CACHE_SIZE", self._local.max_size)
+        self._local.ttl_seconds = self.ttl_seconds
+
+        from src.background_flush import background_flusher
+
+        background_flusher.register(self.flush)
+
+        @app.route("/api/health/meal-plan-cache", methods=["GET"])
+        def meal_plan_cache_stats():
+            """Expose meal plan cache metrics for this worker process to signed-in users"""
+            if "user_ID" not in session:
+                return jsonify({"error": "Not authenticated"}), 401
+            return jsonify(self.stats())
+
+    def make_key(self, days, start_date, ingredients, dietary_preference, budget, cooking_time,
+                 blocked_slots=None, minimal_cooking_sessions=False, selected_meals=None,
+                 nutrition_tracking_enabled=True) -> str:
+        """
+        Content hash of the normalized prompt inputs.
+
+        The start date only labels the plan (meals are stored by day number), so
+        blocked slots are keyed relative to it and the date itself is left out.
+        """
+        if budget and self.budget_bucket:
+            budget = round(float(budget) / self.budget_bucket) * self.budget_bucket
+
+        blocked = sorted(
+            ((slot_date - start_date).days, meal_type)
+            for slot_date, meal_type in (blocked_slots or [])
+        )
+        selected = sorted(
+            (int(selection["day"]), sorted(selection["meals"]))
+            for selection in (selected_meals or [])
+        )
+
+        normalized = {
+            "version": PROMPT_VERSION,
+            "days": int(days),
+            "ingredients": sorted(" ".join(str(item).lower().split()) for item in (ingredients or [])),
+            "dietary_preference": str(dietary_preference or "none").strip().lower(),
+            "budget": float(budget) if budget else None,
+            "cooking_time": int(cooking_time),
+            "blocked_slots": blocked,
+            "minimal_cooking_sessions": bool(minimal_cooking_sessions),
+            "selected_meals": selected,
+            "nutrition_tracking_enabled": bool(nutrition_tracking_enabled),
+        }
+        encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached plan for key, or None. Callers get their own copy to mutate."""
+        if not self.enabled:
+            return None
+
+        plan = self._local.get(key)
+        if plan is not None:
+            self._record_hit(key)
+            logger.info("Meal plan cache hit (memory)", extra={"cache_key": key})
+            return copy.deepcopy(plan)
+
+        if has_app_context():
+            try:
+                plan = self._get_persisted(key)
+            except Exception as e:
+                self._stats["errors"] += 1
+                logger.warning(f"Meal plan cache read failed: {e}")
+                plan = None
+            if plan is not None:
+                self._stats["db_hits"] += 1
+                self._local.set(key, plan)
+                self._record_hit(key)
+                logger.info("Meal plan cache hit (database)", extra={"cache_key": key})
+                return copy.deepcopy(plan)
+
+        self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, plan: Dict):
+        """Store a freshly generated plan in both tiers"""
+        if not self.enabled or not plan:
+            return
+
+        plan = copy.deepcopy(plan)
+        self._local.set(key, plan)
+        self._stats["stores"] += 1
+
+        if has_app_context():
+            from src.background_flush import background_flusher
+
+            with self._pending_lock:
+                self._pending_plans[key] = plan
+            background_flusher.wake()
+
+    def _record_hit(self, key: str):
+        """Count a cache hit (memory or database); the counts are written in the background"""
+        from src.background_flush import background_flusher
+
+        with self._pending_lock:
+            self._pending_hits[key] += 1
+        background_flusher.ensure_started()
+
+    def _get_persisted(self, key: str) -> Optional[Dict]:
+        from src.database import get_db, separate_connection
+
+        query = """
+            SELECT meal_plan FROM llm_meal_plan_cache
+            WHERE cache_key = %s AND expires_at > NOW()
+        """
+        if "db" in g:
+            # Reuse the request connection instead of checking out a second one
+            cursor = get_db().cursor()
+            try:
+                cursor.execute(query, [key])
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        else:
+            # Callers release the request connection while waiting on AI; don't
+            # re-acquire it through get_db() for the length of the provider call
+            with separate_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(query, [key])
+                    row = cursor.fetchone()
+                finally:
+                    cursor.close()
+                # Don't leave the read snapshot open on the pooled connection
+                conn.rollback()
+
+        return json.loads(row["meal_plan"]) if row is not None else None
+
+    def flush(self, force: bool = False):
+        """Write buffered plans and hit counts; called by the background flusher"""
+        with self._pending_lock:
+            plans, self._pending_plans = self._pending_plans, {}
+            hits, self._pending_hits = self._pending_hits, Counter()
+        if not plans and not hits:
+            return
+
+        from src.database import get_db
+
+        conn = get_db()
+        cursor = conn.cursor()
+        try:
+            for key, plan in plans.items():
+                cursor.execute("""
+                    INSERT INTO llm_meal_plan_cache (cache_key, meal_plan, expires_at)
+                    VALUES (%s, %s, NOW() + INTERVAL %s SECOND)
+                    ON DUPLICATE KEY UPDATE
+                        meal_plan = VALUES(meal_plan),
+                        created_at = CURRENT_TIMESTAMP,
+                        expires_at = VALUES(expires_at)
+                """, [key, json.dumps(plan), self.ttl_seconds])
+            if hits:
+                # One statement for every buffered increment
+                cases = " ".join(["WHEN %s THEN hit_count + %s"] * len(hits))
+                cursor.execute(
+                    f"""
+                    UPDATE llm_meal_plan_cache
+                    SET hit_count = CASE cache_key {cases} ELSE hit_count END
+                    WHERE cache_key IN ({', '.join(['%s'] * len(hits))})
+                    """,
+                    [value for key, count in hits.items() for value in (key, count)] + list(hits)
+                )
+            if plans:
+                # Drop expired plans so the table stays bounded by the TTL
+                cursor.execute("DELETE FROM llm_meal_plan_cache WHERE expires_at <= NOW() LIMIT 100")
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            self._stats["errors"] += 1
+            logger.warning(f"Meal plan cache write failed: {e}")
+        finally:
+            cursor.close()
+
+    def stats(self) -> Dict:
+        local = self._local.stats()
+        stats = dict(self._stats)
+        stats.update({
+            "enabled": self.enabled,
+            "memory_hits": local["hits"],
+            "size": local["size"],
+            "max_size": local["max_size"],
+            "ttl_seconds": self.ttl_seconds,
+        })
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        stats["hit_ratio"] = ((stats["memory_hits"] + stats["db_hits"]) / lookups) if lookups else 0.0
+        return stats
+
+
+# Global instance
+meal_plan_cache = MealPlanCache()
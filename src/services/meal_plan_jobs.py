@@ -0,0 +1,292 @@
+"""
+Background Meal Plan Generation Jobs
+
+Queued generations are persisted in the meal_plan_jobs table and executed by a
+small per-process thread pool, so the web worker that accepted the request is
+released immediately instead of blocking on the AI provider. Jobs abandoned by a
+dead process are recovered periodically from the background flusher thread.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Optional
+
+from flask import has_app_context
+
+from src.logging_config import get_logger
+
+logger = get_logger("preppr.meal_plan_jobs")
+
+
+class MealPlanJobRunner:
+    """Enqueues, executes and reports on meal plan generation jobs"""
+
+    # Seconds between status checks while long-polling a job run by another process
+    POLL_INTERVAL_SECONDS = 0.5
+
+    def __init__(self):
+        self.app = None
+        self.max_workers = 2
+        self.job_timeout = 300
+        self.max_wait = 30
+        self.recovery_interval = 60
+        self._last_recovery = 0.0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._done_events: Dict[str, threading.Event] = {}
+
+    def init_app(self, app):
+        """Bind the runner to the app and apply MEAL_PLAN_JOB_* settings"""
+        self.app = app
+        self.max_workers = app.config.get("MEAL_PLAN_JOB_WORKERS", self.max_workers)
+        self.job_timeout = app.config.get("MEAL_PLAN_JOB_TIMEOUT", self.job_timeout)
+        self.max_wait = app.config.get("MEAL_PLAN_JOB_MAX_WAIT", self.max_wait)
+        self.recovery_interval = app.config.get("MEAL_PLAN_JOB_RECOVERY_INTERVAL", self.recovery_interval)
+
+        from src.background_flush import background_flusher
+
+        background_flusher.register(self._background_recover)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for this process, created lazily so forked workers get their own"""
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="meal-plan-job"
+                )
+                self._pid = os.getpid()
+                self._done_events = {}
+                first_start = True
+            else:
+                first_start = False
+
+        if first_start:
+            self._recover_jobs()
+        return self._executor
+
+    def _submit(self, job_id: str):
+        with self._lock:
+            self._done_events.setdefault(job_id, threading.Event())
+        self._executor.submit(self._run_job, job_id)
+
+    def enqueue(self, user_id: str, params: Dict) -> str:
+        """Persist a queued job and hand it to the worker pool"""
+        from src.database import get_db
+
+        job_id = str(uuid.uuid4())
+        db = get_db()
+        cursor = db.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO meal_plan_jobs (job_id, user_id, status, params)
+                VALUES (%s, %s, 'queued', %s)
+            """, [job_id, user_id, json.dumps(params)])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        self._get_executor()
+        self._submit(job_id)
+
+        logger.info("Meal plan job queued", extra={"job_id": job_id, "user_id": user_id})
+        return job_id
+
+    def _background_recover(self, force: bool = False):
+        """
+        Recover jobs every recovery_interval seconds, so jobs left by a dead worker
+        finish even when this process never gets a new job submitted
+        """
+        # Forced ticks are early cache flushes or the flush at exit; skip those
+        if force or time.monotonic() - self._last_recovery < self.recovery_interval:
+            return
+        self._get_executor()  # recovers on first start
+        if time.monotonic() - self._last_recovery >= self.recovery_interval:
+            self._recover_jobs()
+
+    def _recover_jobs(self):
+        """
+        Fail jobs stuck running past the timeout and pick up queued jobs left behind
+        by a restarted process. Claiming is atomic, so only one process runs each job.
+        """
+        self._last_recovery = time.monotonic()
+        try:
+            # The background flusher already runs callbacks in an app context; reuse
+            # its connection instead of checking out another one
+            with nullcontext() if has_app_context() else self.app.app_context():
+                from src.database import get_db
+
+                db = get_db()
+                cursor = db.cursor()
+                try:
+                    cursor.execute("""
+                        UPDATE meal_plan_jobs
+                        SET status = 'failed', error_message = 'Job timed out', finished_at = NOW()
+                        WHERE status = 'running' AND started_at < NOW() - INTERVAL %s SECOND
+                    """, [self.job_timeout])
+                    cursor.execute("""
+                        SELECT job_id FROM meal_plan_jobs
+                        WHERE status = 'queued' AND created_at < NOW() - INTERVAL %s SECOND
+                        ORDER BY created_at
+                    """, [self.job_timeout])
+                    stale_queued = [row["job_id"] for row in cursor.fetchall()]
+                    db.commit()
+                finally:
+                    cursor.close()
+        except Exception as e:
+            logger.warning("Could not recover meal plan jobs", extra={"error": str(e)})
+            return
+
+        for job_id in stale_queued:
+            self._submit(job_id)
+        if stale_queued:
+            logger.info("Re-queued abandoned meal plan jobs", extra={"count": len(stale_queued)})
+
+    def _claim(self, job_id: str) -> Optional[Dict]:
+        """Move a job from queued to running; returns None if another worker got it"""
+        from src.database import get_db
+
+        db = get_db()
+        cursor = db.cursor()
+        try:
+            cursor.execute("""
+                UPDATE meal_plan_jobs
+                SET status = 'running', started_at = NOW(), attempts = attempts + 1
+                WHERE job_id = %s AND status = 'queued'
+            """, [job_id])
+            claimed = cursor.rowcount == 1
+            db.commit()
+            if not claimed:
+                return None
+            cursor.execute("SELECT user_id, params FROM meal_plan_jobs WHERE job_id = %s", [job_id])
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+    def _finish(self, job_id: str, result: Dict):
+        from src.database import get_db
+
+        db = get_db()
+        cursor = db.cursor()
+        try:
+            if result.get("success"):
+                cursor.execute("""
+                    UPDATE meal_plan_jobs
+                    SET status = 'succeeded', session_id = %s, result = %s, finished_at = NOW()
+                    WHERE job_id = %s
+                """, [result.get("session_id"), json.dumps(result), job_id])
+            else:
+                cursor.execute("""
+                    UPDATE meal_plan_jobs
+                    SET status = 'failed', error_message = %s, result = %s, finished_at = NOW()
+                    WHERE job_id = %s
+                """, [result.get("message"), json.dumps(result), job_id])
+            db.commit()
+        finally:
+            cursor.close()
+
+    def _run_job(self, job_id: str):
+        from src.backend.apis.meals import run_meal_plan_generation
+
+        started = time.monotonic()
+        try:
+            with self.app.app_context():
+                job = self._claim(job_id)
+                if job is None:
+                    return
+                params = json.loads(job["params"])
+
+                try:
+                    result = run_meal_plan_generation(job["user_id"], params)
+                except Exception as e:
+                    logger.error("Meal plan job crashed", extra={"job_id": job_id, "error": str(e)}, exc_info=True)
+                    result = {"success": False, "message": f"Failed to generate meal plan: {str(e)}"}
+
+                self._finish(job_id, result)
+
+            logger.info(
+                "Meal plan job finished",
+                extra={
+                    "job_id": job_id,
+                    "success": result.get("success"),
+                    "duration": round((time.monotonic() - started) * 1000, 2),
+                },
+            )
+        except Exception as e:
+            logger.error("Meal plan job failed to update status", extra={"job_id": job_id, "error": str(e)}, exc_info=True)
+        finally:
+            with self._lock:
+                event = self._done_events.pop(job_id, None)
+            if event is not None:
+                event.set()
+
+    def _load_status(self, job_id: str, user_id: str) -> Optional[Dict]:
+        from src.database import get_db
+
+        cursor = get_db().cursor()
+        try:
+            cursor.execute("""
+                SELECT job_id, status, session_id, result, error_message,
+                       created_at, started_at, finished_at
+                FROM meal_plan_jobs
+                WHERE job_id = %s AND user_id = %s
+            """, [job_id, user_id])
+            job = cursor.fetchone()
+        finally:
+            cursor.close()
+
+        if job is None:
+            return None
+
+        status = {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "session_id": job["session_id"],
+            "error": job["error_message"],
+            "created_at": job["created_at"].isoformat() if job["created_at"] else None,
+            "started_at": job["started_at"].isoformat() if job["started_at"] else None,
+            "finished_at": job["finished_at"].isoformat() if job["finished_at"] else None,
+        }
+        if job["result"]:
+            status["result"] = json.loads(job["result"])
+        return status
+
+    def get_status(self, job_id: str, user_id: str, wait: float = 0) -> Optional[Dict]:
+        """
+        Current job status for its owner. With wait > 0, block until the job finishes
+        or the wait (capped at MEAL_PLAN_JOB_MAX_WAIT) expires.
+        """
+        from src.database import close_db
+
+        deadline = time.monotonic() + max(0.0, min(wait, self.max_wait))
+        while True:
+            status = self._load_status(job_id, user_id)
+            if status is None or status["status"] in ("succeeded", "failed"):
+                return status
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return status
+
+            # Give the connection back to the pool while waiting
+            close_db()
+            with self._lock:
+                event = self._done_events.get(job_id)
+            if event is not None:
+                event.wait(remaining)
+            else:
+                # Job is running in another process; fall back to polling
+                time.sleep(min(self.POLL_INTERVAL_SECONDS, remaining))
+
+
+# Global instance
+meal_plan_job_runner = MealPlanJobRunner()
@@ -0,0 +1,270 @@
+"""
+Meal Plan Bulk Writer
+
+Persists a generated meal plan with a fixed number of statements instead of a
+few round trips per meal: recipe templates are deduped in memory, existing ones
+are resolved with one query, and templates, template_ingredients, meals and
+meal_nutrition are written with multi-row inserts.
+
+Templates are identified by a content hash (normalized name, meal type,
+instructions and ingredient list) stored in the uniquely indexed
+recipe_templates.content_hash column.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+import pymysql
+
+from src.logging_config import get_logger
+
+logger = get_logger("preppr.meal_plan_writer")
+
+
+def normalize_instructions(instructions_raw) -> str:
+    """Instructions as stored in recipe_templates: numbered lines when given a list"""
+    if not isinstance(instructions_raw, list):
+        return instructions_raw or ""
+
+    instructions_list = []
+    for i, step in enumerate(instructions_raw):
+        step_str = str(step).strip()
+        # Add numbering unless the step already starts with one (e.g. "1. ")
+        if step_str and not (step_str[0].isdigit() and '. ' in step_str[:4]):
+            instructions_list.append(f"{i+1}. {step_str}")
+        else:
+            instructions_list.append(step_str)
+    return "\n".join(instructions_list)
+
+
+def _normalize_text(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def _normalize_quantity(quantity) -> str:
+    try:
+        # Matches the DECIMAL(10,2) precision of template_ingredients.quantity
+        return f"{round(float(quantity), 2):g}"
+    except (TypeError, ValueError):
+        return _normalize_text(quantity)
+
+
+def template_content_hash(recipe_name, meal_type, instructions, ingredients: Iterable[Tuple]) -> str:
+    """
+    Content hash used to dedupe recipe templates.
+
+    Args:
+        ingredients: (name, quantity, unit) tuples; order does not matter
+    """
+    normalized = {
+        "name": _normalize_text(recipe_name),
+        "meal_type": _normalize_text(meal_type),
+        "instructions": _normalize_text(instructions),
+        "ingredients": sorted(
+            [_normalize_text(name), _normalize_quantity(quantity), _normalize_text(unit)]
+            for name, quantity, unit in ingredients
+        ),
+    }
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class MealPlanWriter:
+    """
+    Buffers the meals of one meal plan session and writes them in bulk.
+
+    Args:
+        cursor: Cursor of the request transaction (the caller commits)
+        user_id: Owner of the meals
+        session_id: meal_plan_sessions row the meals belong to
+        nutrition_tracking_enabled: Whether meal_nutrition rows are written
+    """
+
+    def __init__(self, cursor, user_id, session_id, nutrition_tracking_enabled=True):
+        self.cursor = cursor
+        self.user_id = user_id
+        self.session_id = session_id
+        self.nutrition_tracking_enabled = nutrition_tracking_enabled
+        self._meals = []
+        # content hash -> (recipe_name, meal_type, instructions, recipe_data)
+        self._templates: "OrderedDict[str, Tuple]" = OrderedDict()
+
+    def add_meal(self, meal_date, meal_type, recipe_data):
+        """Queue a meal; recipe_data is the parsed AI recipe for it"""
+        recipe_name = recipe_data.get("name", "")
+        instructions = normalize_instructions(recipe_data.get("instructions", ""))
+        content_hash = template_content_hash(recipe_name, meal_type, instructions, (
+            (ingredient.get("name", ""), ingredient.get("quantity", 1), ingredient.get("unit", ""))
+            for ingredient in recipe_data.get("ingredients", [])
+        ))
+        self._templates.setdefault(content_hash, (recipe_name, meal_type, instructions, recipe_data))
+        self._meals.append((meal_date, meal_type, content_hash, recipe_data))
+
+    def flush(self):
+        """
+        Write everything queued so far.
+
+        Returns:
+            (created_meals, recipe_template_map) - the meal summaries in the order
+            they were added, and template_id -> recipe data for shopping list generation
+        """
+        if not self._meals:
+            return [], {}
+
+        template_ids = self._resolve_templates()
+        meal_ids = self._insert_meals(template_ids)
+
+        if self.nutrition_tracking_enabled:
+            self._insert_nutrition(meal_ids)
+
+        created_meals = []
+        recipe_template_map = {}
+        for meal_date, meal_type, content_hash, recipe_data in self._meals:
+            template_id = template_ids[content_hash]
+            recipe_template_map[template_id] = recipe_data
+            created_meals.append({
+                "meal_id": meal_ids[(meal_date, meal_type)],
+                "date": meal_date.strftime("%Y-%m-%d"),
+                "type": meal_type,
+                "recipe_name": recipe_data.get("name", ""),
+            })
+
+        logger.info(
+            "Persisted meal plan in bulk",
+            extra={"session_id": self.session_id, "meals": len(self._meals), "templates": len(template_ids)},
+        )
+        self._meals = []
+        self._templates = OrderedDict()
+        return created_meals, recipe_template_map
+
+    def _find_templates(self, hashes: List[str], lock: bool = False) -> Dict[str, int]:
+        """Existing template ids by content hash, as one indexed lookup"""
+        placeholders = ", ".join(["%s"] * len(hashes))
+        # A locking read sees rows committed after this transaction's snapshot
+        self.cursor.execute(f"""
+            SELECT template_id, content_hash FROM recipe_templates
+            WHERE content_hash IN ({placeholders})
+            {"LOCK IN SHARE MODE" if lock else ""}
+        """, hashes)
+        return {row["content_hash"]: row["template_id"] for row in self.cursor.fetchall()}
+
+    def _resolve_templates(self) -> Dict[str, int]:
+        template_ids = self._find_templates(list(self._templates))
+        new_hashes = [content_hash for content_hash in self._templates if content_hash not in template_ids]
+        if not new_hashes:
+            return template_ids
+
+        try:
+            self._insert_templates(new_hashes)
+        except pymysql.err.IntegrityError:
+            # A concurrent plan created some of the same templates first; reuse theirs
+            template_ids.update(self._find_templates(new_hashes, lock=True))
+            new_hashes = [content_hash for content_hash in new_hashes if content_hash not in template_ids]
+            if not new_hashes:
+                return template_ids
+            self._insert_templates(new_hashes)
+
+        # Read the ids back rather than assuming consecutive auto-increment values
+        created = self._find_templates(new_hashes)
+        template_ids.update(created)
+
+        ingredient_rows = [
+            (
+                created[content_hash],
+                ingredient.get("name", ""),
+                ingredient.get("quantity", 1),
+                ingredient.get("unit", ""),
+                ingredient.get("notes", ""),
+                ingredient.get("cost", 0),
+            )
+            for content_hash in new_hashes
+            for ingredient in self._templates[content_hash][3].get("ingredients", [])
+        ]
+        if ingredient_rows:
+            self.cursor.executemany("""
+                INSERT INTO template_ingredients (
+                    template_id, ingredient_name, quantity, unit, notes, estimated_cost
+                ) VALUES (%s, %s, %s, %s, %s, %s)
+            """, ingredient_rows)
+
+        return template_ids
+
+    def _insert_templates(self, hashes: List[str]):
+        rows = []
+        for content_hash in hashes:
+            recipe_name, meal_type, instructions, recipe_data = self._templates[content_hash]
+            rows.append((
+                recipe_name,
+                recipe_data.get("description", ""),
+                meal_type,
+                recipe_data.get("prep_time", 0),
+                recipe_data.get("cook_time", 0),
+                recipe_data.get("servings", 1),
+                recipe_data.get("cost", 0),
+                recipe_data.get("difficulty", "medium"),
+                recipe_data.get("calories", 0),
+                instructions,
+                content_hash,
+            ))
+
+        self.cursor.executemany("""
+            INSERT INTO recipe_templates (
+                recipe_name, description, meal_type, prep_time, cook_time, servings,
+                estimated_cost, difficulty, calories_per_serving, instructions, content_hash
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, rows)
+
+    def _insert_meals(self, template_ids) -> Dict[Tuple, int]:
+        self.cursor.executemany("""
+            INSERT INTO meals (
+                user_id, meal_date, meal_type, recipe_template_id, session_id
+            ) VALUES (%s, %s, %s, %s, %s)
+        """, [
+            (self.user_id, meal_date, meal_type, template_ids[content_hash], self.session_id)
+            for meal_date, meal_type, content_hash, _ in self._meals
+        ])
+
+        # The session is new, so its meals are exactly the rows just inserted
+        self.cursor.execute("""
+            SELECT meal_id, meal_date, meal_type FROM meals WHERE session_id = %s
+        """, (self.session_id,))
+        return {(row["meal_date"], row["meal_type"]): row["meal_id"] for row in self.cursor.fetchall()}
+
+    def _insert_nutrition(self, meal_ids):
+        rows = []
+        for meal_date, meal_type, _, recipe_data in self._meals:
+            calories = recipe_data.get("calories")
+            macros = recipe_data.get("macros", {})
+            # Only store if we have at least calories or macros
+            if calories is None and not macros:
+                continue
+            rows.append((
+                meal_ids[(meal_date, meal_type)],
+                self.user_id,
+                calories,
+                macros.get("protein"),
+                macros.get("carbs"),
+                macros.get("fat"),
+                recipe_data.get("fiber"),
+                recipe_data.get("sodium"),
+                recipe_data.get("servings", 1),
+                recipe_data.get("serving_size"),
+                'ai_generated',
+                'gemini-1.5-flash-latest',
+            ))
+
+        if not rows:
+            return
+
+        try:
+            self.cursor.executemany("""
+                INSERT INTO meal_nutrition (
+                    meal_id, user_id, calories, protein_g, carbohydrates_g, fat_g,
+                    fiber_g, sodium_mg, servings, serving_size, source_type, ai_model_used
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, rows)
+        except Exception as e:
+            # Nutrition is optional; the plan itself is still saved
+            logger.error(f"Failed to store nutrition for session {self.session_id}: {e}")
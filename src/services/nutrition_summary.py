@@ -0,0 +1,160 @@
+"""
+Daily Nutrition Summary
+
+Keeps daily_nutrition_summary in step with meals so nutrition stats read one
+row per day instead of re-aggregating every meal. Totals cover completed meals,
+matching what the daily nutrition endpoint reports.
+
+Writers call refresh_daily_summaries() with the days they touched, inside their
+own transaction; each call is a single INSERT ... SELECT over those days.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, List
+
+from src.logging_config import get_logger
+
+logger = get_logger("preppr.nutrition_summary")
+
+SUMMARY_COLUMNS = """
+    total_calories, total_protein_g, total_carbohydrates_g, total_fat_g,
+    total_fiber_g, total_sugar_g, total_sodium_mg,
+    breakfast_calories, lunch_calories, dinner_calories, snack_calories,
+    meals_logged
+"""
+
+SUMMARY_AGGREGATES = """
+    COALESCE(SUM(mn.calories), 0),
+    COALESCE(SUM(mn.protein_g), 0),
+    COALESCE(SUM(mn.carbohydrates_g), 0),
+    COALESCE(SUM(mn.fat_g), 0),
+    COALESCE(SUM(mn.fiber_g), 0),
+    COALESCE(SUM(mn.sugar_g), 0),
+    COALESCE(SUM(mn.sodium_mg), 0),
+    COALESCE(SUM(CASE WHEN m.meal_type = 'breakfast' THEN mn.calories END), 0),
+    COALESCE(SUM(CASE WHEN m.meal_type = 'lunch' THEN mn.calories END), 0),
+    COALESCE(SUM(CASE WHEN m.meal_type = 'dinner' THEN mn.calories END), 0),
+    COALESCE(SUM(CASE WHEN m.meal_type = 'snack' THEN mn.calories END), 0),
+    COUNT(m.meal_id)
+"""
+
+SUMMARY_UPSERT = """
+    ON DUPLICATE KEY UPDATE
+        total_calories = VALUES(total_calories),
+        total_protein_g = VALUES(total_protein_g),
+        total_carbohydrates_g = VALUES(total_carbohydrates_g),
+        total_fat_g = VALUES(total_fat_g),
+        total_fiber_g = VALUES(total_fiber_g),
+        total_sugar_g = VALUES(total_sugar_g),
+        total_sodium_mg = VALUES(total_sodium_mg),
+        breakfast_calories = VALUES(breakfast_calories),
+        lunch_calories = VALUES(lunch_calories),
+        dinner_calories = VALUES(dinner_calories),
+        snack_calories = VALUES(snack_calories),
+        meals_logged = VALUES(meals_logged)
+"""
+
+
+def dates_between(start_date: date, end_date: date) -> List[date]:
+    """Every date from start_date to end_date inclusive"""
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def refresh_daily_summaries(cursor, user_id, dates: Iterable[date]):
+    """
+    Recompute the summary rows of user_id for the given dates.
+
+    Days without completed meals are written as zero rows, so deletions and
+    un-completions are reflected too. The caller commits.
+    """
+    dates = sorted(set(dates))
+    if not dates:
+        return
+
+    # Derived table of the requested days, so every day gets a row
+    days = " UNION ALL ".join(["SELECT CAST(%s AS DATE) AS day"] * len(dates))
+    cursor.execute(f"""
+        INSERT INTO daily_nutrition_summary (user_id, date, {SUMMARY_COLUMNS})
+        SELECT %s, d.day, {SUMMARY_AGGREGATES}
+        FROM ({days}) d
+        LEFT JOIN meals m
+            ON m.user_id = %s AND m.meal_date = d.day AND m.is_completed = TRUE
+        LEFT JOIN meal_nutrition mn ON mn.meal_id = m.meal_id
+        GROUP BY d.day
+        {SUMMARY_UPSERT}
+    """, [user_id] + [day.isoformat() for day in dates] + [user_id])
+
+
+def get_daily_summaries(cursor, user_id, start_date: date, end_date: date) -> Dict[date, Dict]:
+    """
+    Summary rows of user_id between start_date and end_date, keyed by date.
+
+    Days that have never been summarized (e.g. before the backfill ran) are
+    built on first read; the caller commits.
+    """
+    cursor.execute("""
+        SELECT * FROM daily_nutrition_summary
+        WHERE user_id = %s AND date BETWEEN %s AND %s
+    """, (user_id, start_date, end_date))
+    summaries = {row["date"]: row for row in cursor.fetchall()}
+
+    missing = [day for day in dates_between(start_date, end_date) if day not in summaries]
+    if missing:
+        refresh_daily_summaries(cursor, user_id, missing)
+        placeholders = ", ".join(["%s"] * len(missing))
+        cursor.execute(f"""
+            SELECT * FROM daily_nutrition_summary
+            WHERE user_id = %s AND date IN ({placeholders})
+        """, [user_id] + missing)
+        summaries.update({row["date"]: row for row in cursor.fetchall()})
+
+    return summaries
+
+
+def rebuild_summaries(db, batch_size: int = 200) -> int:
+    """
+    Rebuild daily_nutrition_summary for every user, batch_size users per transaction.
+
+    Returns:
+        Number of users processed
+    """
+    cursor = db.cursor()
+    last_user_id = ""
+    processed = 0
+
+    try:
+        while True:
+            cursor.execute("""
+                SELECT user_ID FROM user_account
+                WHERE user_ID > %s
+                ORDER BY user_ID
+                LIMIT %s
+            """, (last_user_id, batch_size))
+            user_ids = [row["user_ID"] for row in cursor.fetchall()]
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+
+            placeholders = ", ".join(["%s"] * len(user_ids))
+            cursor.execute(
+                f"DELETE FROM daily_nutrition_summary WHERE user_id IN ({placeholders})", user_ids
+            )
+            cursor.execute(f"""
+                INSERT INTO daily_nutrition_summary (user_id, date, {SUMMARY_COLUMNS})
+                SELECT m.user_id, m.meal_date, {SUMMARY_AGGREGATES}
+                FROM meals m
+                LEFT JOIN meal_nutrition mn ON mn.meal_id = m.meal_id
+                WHERE m.user_id IN ({placeholders}) AND m.is_completed = TRUE
+                GROUP BY m.user_id, m.meal_date
+            """, user_ids)
+            db.commit()
+
+            processed += len(user_ids)
+            logger.info(f"Rebuilt nutrition summaries for {processed} users")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return processed
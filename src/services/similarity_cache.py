@@ -0,0 +1,63 @@
+"""
+Similarity Cache for Ingredient Score Rows
+
+The fuzzy scores of a normalized ingredient name against a pantry do not depend on
+the user, only on the pantry's normalized names. Whole score rows are cached per
+(pantry fingerprint, ingredient) in a bounded in-process LRU (with TTL), so users
+with the same pantry contents, and repeated matching of the same plan, reuse the
+rows; everything else is scored with one rapidfuzz cdist call.
+
+Scores are not kept per name pair or in MySQL: a cdist over a whole pantry costs
+less than looking its pairs up one by one.
+"""
+
+import hashlib
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+
+from src.ttl_cache import TTLCache
+
+
+def pantry_fingerprint(pantry_names: Sequence[str]) -> str:
+    """Content hash of the ordered, de-duplicated normalized pantry names"""
+    return hashlib.sha1("\x1f".join(pantry_names).encode("utf-8")).hexdigest()
+
+
+class SimilarityCache:
+    """
+    In-process cache of ingredient score rows keyed by pantry fingerprint.
+
+    Args:
+        max_size: Maximum number of rows kept in the LRU
+        ttl_seconds: Age after which a row is recomputed
+    """
+
+    def __init__(self, max_size: int = 20000, ttl_seconds: int = 24 * 3600):
+        self._rows = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def configure(self, config):
+        """Apply SIMILARITY_CACHE_* settings from the app configuration"""
+        self._rows.max_size = config.get("SIMILARITY_CACHE_SIZE", self._rows.max_size)
+        self._rows.ttl_seconds = config.get("SIMILARITY_CACHE_TTL_SECONDS", self._rows.ttl_seconds)
+
+    def get_rows(self, fingerprint: str, ingredients: Iterable[str]) -> Dict[str, np.ndarray]:
+        """Cached score rows of the given ingredients against the pantry (misses are omitted)"""
+        found = self._rows.get_many((fingerprint, ingredient) for ingredient in ingredients)
+        return {ingredient: row for (_, ingredient), row in found.items()}
+
+    def set_rows(self, fingerprint: str, rows: Dict[str, np.ndarray]):
+        """Store newly computed rows; they are shared, so they are made read-only"""
+        for row in rows.values():
+            row.flags.writeable = False
+        self._rows.set_many({(fingerprint, ingredient): row for ingredient, row in rows.items()})
+
+    def clear(self):
+        self._rows.clear()
+
+    def stats(self) -> Dict:
+        return self._rows.stats()
+
+
+# Global instance
+similarity_cache = SimilarityCache()
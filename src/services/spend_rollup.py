@@ -0,0 +1,125 @@
+"""
+Daily Spend Rollup
+
+user_daily_spend holds one row per user per day with the total of purchased
+carts and the number of trips, so budget charts aggregate a handful of rollup
+rows instead of every cart_item of the period.
+
+Writers call refresh_cart_spend() inside their own transaction after a cart is
+purchased or a purchased cart's items change; it recomputes the cart's day.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List
+
+from src.logging_config import get_logger
+
+logger = get_logger("preppr.spend_rollup")
+
+ROLLUP_UPSERT = """
+    ON DUPLICATE KEY UPDATE
+        total_spent = VALUES(total_spent),
+        trip_count = VALUES(trip_count)
+"""
+
+
+def refresh_cart_spend(cursor, cart_id):
+    """
+    Recompute the rollup row for the day of a purchased cart.
+
+    Active carts are skipped by the same statement, so cart edits can call this
+    unconditionally. The caller commits.
+    """
+    cursor.execute(f"""
+        INSERT INTO user_daily_spend (user_id, spend_date, total_spent, trip_count)
+        SELECT target.user_ID, DATE(target.created_at),
+               COALESCE(SUM(i.price * i.quantity), 0), COUNT(DISTINCT c.cart_ID)
+        FROM shopping_cart target
+        JOIN shopping_cart c
+            ON c.user_ID = target.user_ID
+            AND c.status = 'purchased'
+            AND c.created_at >= DATE(target.created_at)
+            AND c.created_at < DATE(target.created_at) + INTERVAL 1 DAY
+        LEFT JOIN cart_item i ON i.cart_ID = c.cart_ID
+        WHERE target.cart_ID = %s AND target.status = 'purchased'
+        GROUP BY target.user_ID, DATE(target.created_at)
+        {ROLLUP_UPSERT}
+    """, (cart_id,))
+
+
+def get_spend_totals(cursor, user_id, start_date: date, end_date: date) -> Dict:
+    """Total spent and trip count between start_date and end_date inclusive"""
+    cursor.execute("""
+        SELECT COALESCE(SUM(total_spent), 0) AS total_spent,
+               COALESCE(SUM(trip_count), 0) AS trip_count
+        FROM user_daily_spend
+        WHERE user_id = %s AND spend_date BETWEEN %s AND %s
+    """, (user_id, start_date, end_date))
+    row = cursor.fetchone()
+    return {"total_spent": float(row["total_spent"]), "trip_count": int(row["trip_count"])}
+
+
+def get_daily_spend(cursor, user_id, start_date: date, end_date: date) -> List[Dict]:
+    """Rollup rows (spend_date, total_spent, trip_count) between two dates, oldest first"""
+    cursor.execute("""
+        SELECT spend_date, total_spent, trip_count
+        FROM user_daily_spend
+        WHERE user_id = %s AND spend_date BETWEEN %s AND %s
+        ORDER BY spend_date
+    """, (user_id, start_date, end_date))
+    return cursor.fetchall()
+
+
+def week_start(day: date) -> date:
+    """Monday of the week containing day"""
+    return day - timedelta(days=day.weekday())
+
+
+def rebuild_daily_spend(db, batch_size: int = 200) -> int:
+    """
+    Rebuild user_daily_spend for every user, batch_size users per transaction.
+
+    Returns:
+        Number of users processed
+    """
+    cursor = db.cursor()
+    last_user_id = ""
+    processed = 0
+
+    try:
+        while True:
+            cursor.execute("""
+                SELECT user_ID FROM user_account
+                WHERE user_ID > %s
+                ORDER BY user_ID
+                LIMIT %s
+            """, (last_user_id, batch_size))
+            user_ids = [row["user_ID"] for row in cursor.fetchall()]
+            if not user_ids:
+                break
+            last_user_id = user_ids[-1]
+
+            placeholders = ", ".join(["%s"] * len(user_ids))
+            cursor.execute(
+                f"DELETE FROM user_daily_spend WHERE user_id IN ({placeholders})", user_ids
+            )
+            cursor.execute(f"""
+                INSERT INTO user_daily_spend (user_id, spend_date, total_spent, trip_count)
+                SELECT c.user_ID, DATE(c.created_at),
+                       COALESCE(SUM(i.price * i.quantity), 0), COUNT(DISTINCT c.cart_ID)
+                FROM shopping_cart c
+                LEFT JOIN cart_item i ON i.cart_ID = c.cart_ID
+                WHERE c.user_ID IN ({placeholders}) AND c.status = 'purchased'
+                GROUP BY c.user_ID, DATE(c.created_at)
+            """, user_ids)
+            db.commit()
+
+            processed += len(user_ids)
+            logger.info(f"Rebuilt daily spend for {processed} users")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return processed
@@ -0,0 +1,193 @@
+"""
+Subscription Maintenance
+
+Set-based batch jobs that keep subscription state current, so request
+handlers only read it:
+- daily/weekly usage counters whose period has ended are reset to 0
+- premium subscriptions past their end date are downgraded to free
+
+Runs from the `reset-usage-counters` and `downgrade-expired-subscriptions` CLI
+commands and from a background thread in each web process. Every process may
+run the thread; a MySQL named lock makes sure only one of them does the work
+at a time.
+"""
+
+import os
+import threading
+from typing import Dict
+
+from src.logging_config import get_logger
+from src.subscription_utils import PERIOD_RESET_CONDITIONS
+
+logger = get_logger("preppr.subscription_maintenance")
+
+LOCK_NAME = "preppr_subscription_maintenance"
+
+
+def reset_expired_usage_counters(db, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Reset every daily/weekly counter whose period has ended.
+
+    Each limit type is reset in chunks of batch_size rows, one transaction per
+    chunk, so no statement holds many row locks at once.
+
+    Returns:
+        Rows reset per limit type
+    """
+    cursor = db.cursor()
+    reset = {}
+
+    try:
+        for limit_type, expired in PERIOD_RESET_CONDITIONS.items():
+            reset[limit_type] = 0
+            while True:
+                # Reset rows no longer match the condition, so the loop ends
+                cursor.execute(f"""
+                    UPDATE subscription_limits
+                    SET current_usage = 0, last_reset_date = CURRENT_DATE
+                    WHERE limit_type = %s AND {expired}
+                    ORDER BY limit_id
+                    LIMIT %s
+                """, (limit_type, batch_size))
+                updated = cursor.rowcount
+                db.commit()
+
+                reset[limit_type] += updated
+                if updated < batch_size:
+                    break
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return reset
+
+
+def downgrade_expired_subscriptions(db, batch_size: int = 1000) -> int:
+    """
+    Downgrade subscriptions past their end date to free/expired.
+
+    Walks idx_subscription_end_date in chunks of batch_size users, one
+    transaction per chunk.
+
+    Returns:
+        Number of users downgraded
+    """
+    cursor = db.cursor()
+    downgraded = 0
+
+    try:
+        while True:
+            # Downgraded rows no longer match, so the loop ends
+            cursor.execute("""
+                UPDATE user_account
+                SET subscription_tier = 'free', subscription_status = 'expired'
+                WHERE subscription_end_date < NOW()
+                  AND (subscription_tier <> 'free' OR subscription_status <> 'expired')
+                ORDER BY subscription_end_date
+                LIMIT %s
+            """, (batch_size,))
+            updated = cursor.rowcount
+            db.commit()
+
+            downgraded += updated
+            if updated < batch_size:
+                break
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return downgraded
+
+
+def run_maintenance(db, batch_size: int = 1000) -> Dict[str, int]:
+    """Run every subscription maintenance task and return the row counts"""
+    results = {"downgraded_subscriptions": downgrade_expired_subscriptions(db, batch_size)}
+    for limit_type, count in reset_expired_usage_counters(db, batch_size).items():
+        results[f"reset_{limit_type}"] = count
+    return results
+
+
+class SubscriptionMaintenanceScheduler:
+    """
+    Background thread running run_maintenance() every interval seconds.
+
+    The thread is started on the first request of each process, so forked
+    workers get their own.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.interval = 900
+        self.batch_size = 1000
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Apply SUBSCRIPTION_MAINTENANCE_* settings and start with the first request"""
+        self.app = app
+        self.enabled = app.config.get("SUBSCRIPTION_MAINTENANCE_ENABLED", self.enabled)
+        self.interval = app.config.get("SUBSCRIPTION_MAINTENANCE_INTERVAL", self.interval)
+        self.batch_size = app.config.get("SUBSCRIPTION_MAINTENANCE_BATCH_SIZE", self.batch_size)
+        if self.enabled:
+            app.before_request(self.ensure_started)
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="subscription-maintenance", daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Run once at start-up, then every interval
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Subscription maintenance failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def run_once(self) -> Dict[str, int]:
+        """Run the maintenance tasks unless another process holds the lock"""
+        from src.database import separate_connection
+
+        with self.app.app_context(), separate_connection() as db:
+            cursor = db.cursor()
+            try:
+                cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (LOCK_NAME,))
+                if not cursor.fetchone()["acquired"]:
+                    return {}
+                try:
+                    results = run_maintenance(db, self.batch_size)
+                finally:
+                    cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+                    cursor.fetchall()
+            finally:
+                cursor.close()
+
+        if any(results.values()):
+            # Counts go in the message text; the text formatters drop extras
+            counts = ", ".join(f"{name}={count}" for name, count in results.items())
+            logger.info(f"Subscription maintenance completed: {counts}", extra=results)
+        return results
+
+
+# Global instance
+subscription_maintenance = SubscriptionMaintenanceScheduler()
@@ -0,0 +1,76 @@
+"""
+User Preferences Snapshot
+
+Reads every user_preferences row of a user with one query and decodes the
+typed values once. The snapshot is memoized on flask.g for the request and
+kept in a short-TTL per-process cache; the preference POST endpoints call
+invalidate_user_preferences() after saving.
+"""
+
+import json
+from typing import Any, Dict
+
+from flask import current_app, g
+
+from src.database import get_db
+from src.ttl_cache import TTLCache
+
+_preferences_cache = TTLCache(max_size=4096, ttl_seconds=30)
+
+
+def decode_preference(value: str, data_type: str) -> Any:
+    """Convert a stored preference_value based on its data_type"""
+    if data_type == "boolean":
+        return value.lower() == "true"
+    elif data_type == "number":
+        return float(value) if '.' in value else int(value)
+    elif data_type == "json":
+        return json.loads(value)
+    return value
+
+
+def get_user_preferences(user_id) -> Dict[str, Any]:
+    """
+    All preferences of user_id as {preference_key: decoded value}.
+
+    The returned dict is shared by the request and the process cache; treat it
+    as read-only.
+    """
+    memo = g.get("user_preferences")
+    if memo is None:
+        memo = g.user_preferences = {}
+    if user_id in memo:
+        return memo[user_id]
+
+    preferences = _preferences_cache.get(user_id)
+    if preferences is None:
+        db = get_db()
+        cursor = db.cursor()
+        try:
+            cursor.execute("""
+                SELECT preference_key, preference_value, data_type
+                FROM user_preferences
+                WHERE user_id = %s
+            """, (user_id,))
+            preferences = {
+                row["preference_key"]: decode_preference(row["preference_value"], row["data_type"])
+                for row in cursor.fetchall()
+            }
+        finally:
+            cursor.close()
+
+        _preferences_cache.set(
+            user_id, preferences,
+            current_app.config.get("USER_PREFERENCE_CACHE_TTL_SECONDS", _preferences_cache.ttl_seconds)
+        )
+
+    memo[user_id] = preferences
+    return preferences
+
+
+def invalidate_user_preferences(user_id):
+    """Drop the cached snapshot of user_id after its preferences changed"""
+    _preferences_cache.delete(user_id)
+    memo = g.get("user_preferences")
+    if memo is not None:
+        memo.pop(user_id, None)
@@ -171,9 +171,10 @@ function showErrorState(message) {
 }
 
 // Load More History Functionality
-let currentOffset = 0; // Start from 0 since we're loading all history
 const config = window.SHOPPING_HISTORY_CONFIG || {};
-const maxTrips = config.totalTrips || 0;
+// Keyset cursor of the next page; the page itself renders the first one
+const initialCursor = config.nextCursor || null;
+let nextCursor = initialCursor;
 
 async function loadMoreHistory() {
   const showMoreBtn = document.getElementById("showMoreBtn");
@@ -187,7 +188,7 @@ async function loadMoreHistory() {
 
   try {
     const response = await fetch(
-      `/api/shopping-history?offset=${currentOffset}&limit=35`
+      `/api/shopping-history?cursor=${encodeURIComponent(nextCursor)}&limit=35`
     );
 
     if (response.ok) {
@@ -242,7 +243,7 @@ async function loadMoreHistory() {
         tableBody.appendChild(row);
       });
 
-      currentOffset += data.history.length;
+      nextCursor = data.next_cursor;
 
       // Show the "Show Less" button
       if (showLessBtn) {
@@ -250,7 +251,7 @@ async function loadMoreHistory() {
       }
 
       // Update or hide the "Show More" button
-      if (currentOffset >= maxTrips) {
+      if (!nextCursor) {
         showMoreBtn.style.display = "none";
       } else {
         showMoreBtn.disabled = false;
@@ -282,8 +283,8 @@ function showLessHistory() {
   const additionalRows = tableBody.querySelectorAll(".additional-history");
   additionalRows.forEach((row) => row.remove());
 
-  // Reset the offset to initial value
-  currentOffset = 0;
+  // Reset the cursor to the page after the rendered one
+  nextCursor = initialCursor;
 
   // Hide the "Show Less" button
   if (showLessBtn) {
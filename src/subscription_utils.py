@@ -3,13 +3,34 @@ Subscription tier utilities for managing free vs premium features.
 """
 
 from functools import wraps
-from flask import session, jsonify, request
+from flask import session, jsonify, request, g, current_app, make_response
 from src.database import get_db
+from src.ttl_cache import TTLCache
 import logging
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# subscription_tier_features only changes with a deploy, so each process keeps a copy
+_tier_features_cache = TTLCache(max_size=1, ttl_seconds=300)
+
+# Short-lived per-process copy of each user's subscription row
+_subscription_info_cache = TTLCache(max_size=4096, ttl_seconds=60)
+
+# Counters that start over each period: SQL condition for an expired period
+PERIOD_RESET_CONDITIONS = {
+    'shopping_lists_per_day': "last_reset_date < CURRENT_DATE",
+    'upc_scans_per_week': "last_reset_date <= CURRENT_DATE - INTERVAL 7 DAY",
+}
+
+def _period_expired(limit_type, last_reset, today):
+    """Python twin of PERIOD_RESET_CONDITIONS"""
+    if limit_type == 'shopping_lists_per_day':
+        return last_reset < today
+    if limit_type == 'upc_scans_per_week':
+        return (today - last_reset).days >= 7
+    return False
+
 class SubscriptionLimitExceeded(Exception):
     """Raised when user exceeds their subscription tier limits"""
     def __init__(self, limit_type, current_limit, upgrade_message=None):
@@ -18,137 +39,152 @@ class SubscriptionLimitExceeded(Exception):
         self.upgrade_message = upgrade_message or f"Upgrade to Premium to exceed the {current_limit} limit for {limit_type}"
         super().__init__(self.upgrade_message)
 
-def get_user_subscription_info(user_id):
-    """Get user's subscription tier and status"""
+def get_tier_features():
+    """
+    All subscription_tier_features rows as {tier: {feature_name: row}}.
+
+    Served from a process-level cache; the table is static between deploys.
+    """
+    features = _tier_features_cache.get("features")
+    if features is not None:
+        return features
+
     db = get_db()
     cursor = db.cursor()
     
     try:
-        query = """
-        SELECT subscription_tier, subscription_status, subscription_end_date 
-        FROM user_account 
-        WHERE user_ID = %s
-        """
-        cursor.execute(query, (user_id,))
-        result = cursor.fetchone()
-        
-        if not result:
-            return {'tier': 'free', 'status': 'active', 'end_date': None}
+        cursor.execute("""
+        SELECT tier, feature_name, limit_value, description
+        FROM subscription_tier_features
+        """)
+        features = {}
+        for row in cursor.fetchall():
+            features.setdefault(row['tier'], {})[row['feature_name']] = row
+    finally:
+        cursor.close()
+    
+    _tier_features_cache.set(
+        "features", features,
+        current_app.config.get("SUBSCRIPTION_TIER_CACHE_TTL_SECONDS", _tier_features_cache.ttl_seconds)
+    )
+    return features
+
+def _request_memo(name):
+    """Per-request dict stored on flask.g, keyed by user id"""
+    memo = g.get(name)
+    if memo is None:
+        memo = {}
+        setattr(g, name, memo)
+    return memo
+
+def invalidate_subscription_cache(user_id):
+    """Drop the cached subscription state of user_id after changing it"""
+    _subscription_info_cache.delete(user_id)
+    _request_memo('subscription_info').pop(user_id, None)
+    _request_memo('subscription_usage').pop(user_id, None)
+
+def get_user_subscription_info(user_id):
+    """
+    Get user's subscription tier and status.
+
+    Memoized for the request and cached per process for a short time. This is
+    a read only: a subscription past its end date is reported as expired free
+    tier here, and the maintenance job downgrades the stored row.
+    """
+    memo = _request_memo('subscription_info')
+    if user_id in memo:
+        return memo[user_id]
+
+    result = _subscription_info_cache.get(user_id)
+    if result is None:
+        db = get_db()
+        cursor = db.cursor()
         
-        # Check if subscription has expired
-        if result['subscription_end_date'] and result['subscription_end_date'] < datetime.now():
-            # Auto-downgrade expired premium users to free
-            update_query = """
-            UPDATE user_account 
-            SET subscription_tier = 'free', subscription_status = 'expired'
+        try:
+            query = """
+            SELECT subscription_tier, subscription_status, subscription_end_date 
+            FROM user_account 
             WHERE user_ID = %s
             """
-            cursor.execute(update_query, (user_id,))
-            db.commit()
-            return {'tier': 'free', 'status': 'expired', 'end_date': result['subscription_end_date']}
+            cursor.execute(query, (user_id,))
+            result = cursor.fetchone() or {}
+        finally:
+            cursor.close()
         
-        return {
+        _subscription_info_cache.set(
+            user_id, result,
+            current_app.config.get("SUBSCRIPTION_INFO_CACHE_TTL_SECONDS", _subscription_info_cache.ttl_seconds)
+        )
+    
+    if not result:
+        info = {'tier': 'free', 'status': 'active', 'end_date': None}
+    # Checked on every read, so cached rows lapse at their end date
+    elif result['subscription_end_date'] and result['subscription_end_date'] < datetime.now():
+        info = {'tier': 'free', 'status': 'expired', 'end_date': result['subscription_end_date']}
+    else:
+        info = {
             'tier': result['subscription_tier'],
             'status': result['subscription_status'],
             'end_date': result['subscription_end_date']
         }
-    finally:
-        cursor.close()
+
+    memo[user_id] = info
+    return info
 
 def get_tier_limit(tier, feature_name):
     """Get the limit for a specific feature based on subscription tier"""
-    db = get_db()
-    cursor = db.cursor()
-    
-    try:
-        query = """
-        SELECT limit_value 
-        FROM subscription_tier_features 
-        WHERE tier = %s AND feature_name = %s
-        """
-        cursor.execute(query, (tier, feature_name))
-        result = cursor.fetchone()
-        
-        if not result:
-            return 0  # Default to 0 if feature not found
-        
-        return result['limit_value']
-    finally:
-        cursor.close()
+    feature = get_tier_features().get(tier, {}).get(feature_name)
+    if not feature:
+        return 0  # Default to 0 if feature not found
+    return feature['limit_value']
+
+def _get_usage_rows(user_id):
+    """
+    Every subscription_limits row of user_id keyed by limit_type, read with
+    one query per request.
+    """
+    memo = _request_memo('subscription_usage')
+    if user_id in memo:
+        return memo[user_id]
 
-def get_current_usage(user_id, limit_type):
-    """Get current usage for a specific limit type"""
     db = get_db()
     cursor = db.cursor()
     
     try:
-        query = """
-        SELECT current_usage, last_reset_date
+        cursor.execute("""
+        SELECT limit_type, current_usage, last_reset_date
         FROM subscription_limits 
-        WHERE user_id = %s AND limit_type = %s
-        """
-        cursor.execute(query, (user_id, limit_type))
-        result = cursor.fetchone()
-        
-        if not result:
-            # Initialize usage tracking if doesn't exist
-            insert_query = """
-            INSERT INTO subscription_limits (user_id, limit_type, current_usage, last_reset_date)
-            VALUES (%s, %s, 0, CURRENT_DATE)
-            """
-            cursor.execute(insert_query, (user_id, limit_type))
-            db.commit()
-            return 0
-        
-        # Check if we need to reset daily/weekly counters
-        today = datetime.now().date()
-        last_reset = result['last_reset_date']
-        
-        if limit_type in ['shopping_lists_per_day'] and last_reset < today:
-            # Reset daily counter
-            reset_query = """
-            UPDATE subscription_limits 
-            SET current_usage = 0, last_reset_date = CURRENT_DATE
-            WHERE user_id = %s AND limit_type = %s
-            """
-            cursor.execute(reset_query, (user_id, limit_type))
-            db.commit()
-            return 0
-        elif limit_type in ['upc_scans_per_week'] and (today - last_reset).days >= 7:
-            # Reset weekly counter
-            reset_query = """
-            UPDATE subscription_limits 
-            SET current_usage = 0, last_reset_date = CURRENT_DATE
-            WHERE user_id = %s AND limit_type = %s
-            """
-            cursor.execute(reset_query, (user_id, limit_type))
-            db.commit()
-            return 0
-        
-        return result['current_usage']
+        WHERE user_id = %s
+        """, (user_id,))
+        rows = {row['limit_type']: row for row in cursor.fetchall()}
     finally:
         cursor.close()
 
-def increment_usage(user_id, limit_type, increment=1):
-    """Increment usage counter for a specific limit type"""
-    db = get_db()
-    cursor = db.cursor()
+    memo[user_id] = rows
+    return rows
+
+def get_current_usage(user_id, limit_type):
+    """
+    Get current usage for a specific limit type.
+
+    A pure read: missing counters count as 0, and so do daily/weekly counters
+    whose period has ended but which the maintenance job has not reset yet.
+    """
+    result = _get_usage_rows(user_id).get(limit_type)
+    if not result:
+        return 0
     
-    try:
-        query = """
-        UPDATE subscription_limits 
-        SET current_usage = current_usage + %s, updated_at = CURRENT_TIMESTAMP
-        WHERE user_id = %s AND limit_type = %s
-        """
-        cursor.execute(query, (increment, user_id, limit_type))
-        db.commit()
-    finally:
-        cursor.close()
+    if _period_expired(limit_type, result['last_reset_date'], datetime.now().date()):
+        return 0
+    
+    return result['current_usage']
 
 def check_subscription_limit(user_id, feature_name, increment=1):
     """
     Check if user can perform an action based on their subscription tier limits.
     Returns True if allowed, raises SubscriptionLimitExceeded if not.
+
+    This is a read-only pre-check; consume_usage is what claims the usage.
     """
     subscription_info = get_user_subscription_info(user_id)
     tier = subscription_info['tier']
@@ -177,6 +213,105 @@ def check_subscription_limit(user_id, feature_name, increment=1):
     
     return True
 
+def consume_usage(user_id, feature_name, increment=1, cursor=None):
+    """
+    Atomically check the limit and increment the usage counter.
+
+    The increment is a single conditional UPDATE that only matches while the
+    new total stays within the limit, and resets an expired daily/weekly
+    period in the same statement, so concurrent requests cannot both pass.
+
+    Args:
+        cursor: Run inside the caller's transaction (the caller commits);
+            by default the increment is committed on its own
+
+    Returns:
+        The amount consumed (0 for unlimited tiers), to pass to release_usage
+        if the action fails. Raises SubscriptionLimitExceeded when over the limit.
+    """
+    if get_user_subscription_info(user_id)['tier'] == 'premium':
+        return 0
+    
+    limit = get_tier_limit('free', feature_name)
+    if limit == -1:
+        return 0
+    
+    # Fail fast on the memoized state before touching the counter row
+    check_subscription_limit(user_id, feature_name, increment)
+    
+    db = get_db()
+    own_cursor = cursor is None
+    if own_cursor:
+        cursor = db.cursor()
+    
+    usage_rows = _get_usage_rows(user_id)
+    expired = PERIOD_RESET_CONDITIONS.get(feature_name, "FALSE")
+    try:
+        if feature_name not in usage_rows:
+            # Initialize usage tracking if doesn't exist
+            cursor.execute("""
+            INSERT IGNORE INTO subscription_limits (user_id, limit_type, current_usage, last_reset_date)
+            VALUES (%s, %s, 0, CURRENT_DATE)
+            """, (user_id, feature_name))
+        
+        # current_usage is assigned before last_reset_date, so both see the old date
+        cursor.execute(f"""
+        UPDATE subscription_limits 
+        SET current_usage = IF({expired}, 0, current_usage) + %s,
+            last_reset_date = IF({expired}, CURRENT_DATE, last_reset_date),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = %s AND limit_type = %s
+          AND IF({expired}, 0, current_usage) + %s <= %s
+        """, (increment, user_id, feature_name, increment, limit))
+        consumed = cursor.rowcount == 1
+        
+        if own_cursor:
+            db.commit()
+    finally:
+        if own_cursor:
+            cursor.close()
+    
+    if not consumed:
+        # Someone else used up the remaining allowance; re-read on next access
+        _request_memo('subscription_usage').pop(user_id, None)
+        raise SubscriptionLimitExceeded(feature_name, limit, get_upgrade_message(feature_name))
+    
+    today = datetime.now().date()
+    row = usage_rows.get(feature_name)
+    if row is None or _period_expired(feature_name, row['last_reset_date'], today):
+        usage_rows[feature_name] = {'limit_type': feature_name, 'current_usage': increment, 'last_reset_date': today}
+    else:
+        row['current_usage'] += increment
+    return increment
+
+def release_usage(user_id, feature_name, amount):
+    """
+    Compensating decrement for usage consumed by an action that then failed.
+    
+    Commits on the request connection, so whatever the failed action left
+    uncommitted there is rolled back first rather than committed with it.
+    """
+    if not amount:
+        return
+    
+    db = get_db()
+    db.rollback()
+    cursor = db.cursor()
+    
+    try:
+        cursor.execute("""
+        UPDATE subscription_limits 
+        SET current_usage = GREATEST(current_usage - %s, 0), updated_at = CURRENT_TIMESTAMP
+        WHERE user_id = %s AND limit_type = %s
+        """, (amount, user_id, feature_name))
+        db.commit()
+    finally:
+        cursor.close()
+    
+    row = _request_memo('subscription_usage').get(user_id, {}).get(feature_name)
+    if row is not None:
+        row['current_usage'] = max(row['current_usage'] - amount, 0)
+
 def get_upgrade_message(feature_name):
     """Get contextual upgrade message for different features"""
     messages = {
@@ -189,10 +324,21 @@ def get_upgrade_message(feature_name):
     }
     return messages.get(feature_name, f"Upgrade to Preppr Premium to unlock unlimited {feature_name}!")
 
+def _is_failure_body(response):
+    """True for a JSON response whose body reports "success": false"""
+    if not response.is_json:
+        return False
+    body = response.get_json(silent=True)
+    return isinstance(body, dict) and body.get('success') is False
+
 def subscription_required(feature_name):
     """
     Decorator to check subscription limits before executing a function.
     Use on API endpoints that should be limited by subscription tier.
+    
+    The usage is consumed up front and given back when the view fails: when it
+    raises, returns an HTTP status >= 400, or returns a JSON body with
+    "success": false (the 200-style error responses used across the APIs).
     """
     def decorator(f):
         @wraps(f)
@@ -200,12 +346,9 @@ def subscription_required(feature_name):
             if 'user_ID' not in session:
                 return jsonify({'success': False, 'message': 'Authentication required'}), 401
             
+            user_id = session['user_ID']
             try:
-                check_subscription_limit(session['user_ID'], feature_name)
-                # If check passes, increment the usage after successful execution
-                result = f(*args, **kwargs)
-                increment_usage(session['user_ID'], feature_name)
-                return result
+                consumed = consume_usage(user_id, feature_name)
             except SubscriptionLimitExceeded as e:
                 return jsonify({
                     'success': False,
@@ -214,6 +357,16 @@ def subscription_required(feature_name):
                     'current_limit': e.current_limit,
                     'requires_upgrade': True
                 }), 403
+            
+            # Give the usage back if the view fails
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                release_usage(user_id, feature_name, consumed)
+                raise
+            if response.status_code >= 400 or _is_failure_body(response):
+                release_usage(user_id, feature_name, consumed)
+            return response
                 
         return decorated_function
     return decorator
@@ -233,19 +386,10 @@ def get_user_limits_status(user_id):
         }
     
     # Get all free tier limits
-    db = get_db()
-    cursor = db.cursor()
-    
-    try:
-        limits_query = """
-        SELECT feature_name, limit_value, description
-        FROM subscription_tier_features
-        WHERE tier = 'free' AND limit_value > 0
-        """
-        cursor.execute(limits_query)
-        features = cursor.fetchall()
-    finally:
-        cursor.close()
+    features = [
+        feature for feature in get_tier_features().get('free', {}).values()
+        if feature['limit_value'] > 0
+    ]
     
     status = {
         'tier': 'free',